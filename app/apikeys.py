@@ -0,0 +1,264 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# API key registry settings
+# Text file ("name, key, rate, burst" per line) or SQLite database (.db/.sqlite/.sqlite3)
+API_KEYS_FILE = os.getenv("API_KEYS_FILE", "")
+# How often the file is checked for changes
+API_KEYS_RELOAD_SECONDS = float(os.getenv("API_KEYS_RELOAD_SECONDS", "5"))
+# Quota of keys that do not set their own, in requests per second; 0 is unlimited
+API_KEY_DEFAULT_RATE = float(os.getenv("API_KEY_DEFAULT_RATE", "0"))
+API_KEY_DEFAULT_BURST = int(os.getenv("API_KEY_DEFAULT_BURST", "0"))
+# Worker processes enforcing the quotas side by side; each takes an equal
+# share. The production server sets it before starting its workers.
+API_KEY_QUOTA_WORKERS_ENV = "API_KEY_QUOTA_WORKERS"
+
+
+def quota_workers() -> int:
+    # Read when the registry is created in a worker, after the server has set it
+    return max(1, int(os.getenv(API_KEY_QUOTA_WORKERS_ENV, "1")))
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+HASH_PREFIX = "sha256:"
+
+
+def hash_key(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class QuotaExceededError(Exception):
+    """Raised when an API key has used up its quota"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Quota exceeded for API key {name}")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class APIKey:
+    """
+    A registered client key and its quota
+    """
+
+    def __init__(self, name: str, key_hash: str, rate: float = 0.0, burst: int = 0, workers: int = 1):
+        self.name = name
+        self.key_hash = key_hash
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        # This process's share of the quota when several workers enforce it
+        self.bucket = TokenBucket(rate / workers, max(1, -(-self.burst // workers))) if rate > 0 else None
+
+    def same_quota(self, other: "APIKey") -> bool:
+        return (self.rate, self.burst) == (other.rate, other.burst)
+
+    def consume(self) -> None:
+        """
+        Take one request from the quota without waiting
+
+        Raises:
+            QuotaExceededError: If the bucket is empty
+        """
+        if self.bucket is None or self.bucket.reserve(0) is not None:
+            return
+        retry_after = (1 - self.bucket.available()) / self.bucket.rate
+        raise QuotaExceededError(self.name, retry_after)
+
+
+def parse_key_line(line: str) -> Optional[Tuple[str, str, float, int]]:
+    """
+    Parse one line of a key file
+
+    "name, key[, rate[, burst]]"; the key is either the key itself or
+    "sha256:<hex digest>" so the file does not have to hold secrets.
+
+    Returns:
+        (name, key hash, rate, burst), or None for blank and comment lines
+    """
+    line = line.split("#", 1)[0].strip()
+    if not line:
+        return None
+    parts = [part.strip() for part in line.split(",")]
+    if len(parts) < 2 or not parts[1]:
+        raise ValueError(f"Expected 'name, key[, rate[, burst]]': {line!r}")
+    name, key = parts[0], parts[1]
+    key_hash = key[len(HASH_PREFIX):].lower() if key.startswith(HASH_PREFIX) else hash_key(key)
+    rate = float(parts[2]) if len(parts) > 2 and parts[2] else API_KEY_DEFAULT_RATE
+    burst = int(parts[3]) if len(parts) > 3 and parts[3] else API_KEY_DEFAULT_BURST
+    return name, key_hash, rate, burst
+
+
+def read_key_file(path: str) -> List[Tuple[str, str, float, int]]:
+    with open(path, encoding="utf-8") as f:
+        return [entry for entry in map(parse_key_line, f) if entry is not None]
+
+
+def read_key_database(path: str) -> List[Tuple[str, str, float, int]]:
+    """
+    Read keys from an SQLite database
+
+    Table api_keys(name TEXT, key_hash TEXT, rate REAL, burst INTEGER);
+    NULL rate and burst use the defaults.
+    """
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=5.0)
+    try:
+        rows = conn.execute("SELECT name, key_hash, rate, burst FROM api_keys").fetchall()
+    finally:
+        conn.close()
+    return [
+        (
+            name,
+            key_hash.lower(),
+            API_KEY_DEFAULT_RATE if rate is None else float(rate),
+            API_KEY_DEFAULT_BURST if burst is None else int(burst),
+        )
+        for name, key_hash, rate, burst in rows
+    ]
+
+
+class APIKeyRegistry:
+    """
+    Client API keys with per-key token-bucket quotas
+
+    Keys are stored by their SHA-256 digest, and a presented key is hashed
+    before the dict lookup, so the lookup time does not depend on how much
+    of a valid key was guessed. The source file is re-read when it changes
+    (checked at most every `reload_seconds` by `maybe_reload`, which the
+    API runs in the threadpool); keys whose quota is unchanged keep their
+    bucket across reloads. Lookups only touch memory. Buckets are per
+    process: each of `workers` processes enforces 1/workers of a key's
+    rate and burst.
+    """
+
+    def __init__(
+        self,
+        path: str = API_KEYS_FILE,
+        static_keys: Optional[List[APIKey]] = None,
+        reload_seconds: float = API_KEYS_RELOAD_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        workers: Optional[int] = None
+    ):
+        self.path = path
+        self.workers = workers or quota_workers()
+        self.static_keys = static_keys or []
+        self.reload_seconds = reload_seconds
+        self.clock = clock
+        self._keys: Dict[str, APIKey] = {}
+        self._signature: Optional[Tuple[float, ...]] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.rejected = 0
+        self.reload()
+
+    def _file_signature(self) -> Optional[Tuple[float, ...]]:
+        if not self.path or not os.path.exists(self.path):
+            return None
+        # SQLite in WAL mode commits to the -wal file first
+        paths = [self.path, f"{self.path}-wal"]
+        return tuple(os.path.getmtime(path) for path in paths if os.path.exists(path))
+
+    def _read(self) -> List[Tuple[str, str, float, int]]:
+        if not self.path or not os.path.exists(self.path):
+            return []
+        if self.path.endswith(SQLITE_EXTENSIONS):
+            return read_key_database(self.path)
+        return read_key_file(self.path)
+
+    def reload(self) -> None:
+        """
+        Re-read the key source; on errors the current keys stay in place
+        """
+        with self._lock:
+            self._next_check = self.clock() + self.reload_seconds
+            signature = self._file_signature()
+            try:
+                entries = self._read()
+            except (OSError, ValueError, sqlite3.Error):
+                logger.exception("Failed to load API keys from %s", self.path)
+                return
+            keys = {key.key_hash: key for key in self.static_keys}
+            for name, key_hash, rate, burst in entries:
+                key = APIKey(name, key_hash, rate, burst, self.workers)
+                current = self._keys.get(key_hash)
+                keys[key_hash] = current if current is not None and current.same_quota(key) else key
+            self._keys = keys
+            self._signature = signature
+            self.reloads += 1
+
+    def reload_due(self) -> bool:
+        """
+        Claim the next check of the key source; True for one caller every `reload_seconds`
+        """
+        with self._lock:
+            now = self.clock()
+            if now < self._next_check:
+                return False
+            self._next_check = now + self.reload_seconds
+            return True
+
+    def refresh(self) -> None:
+        """
+        Reload the keys if the source changed (file system and SQLite I/O, so not on the event loop)
+        """
+        if self._file_signature() != self._signature:
+            self.reload()
+
+    def maybe_reload(self) -> None:
+        if self.reload_due():
+            self.refresh()
+
+    def lookup(self, key: str) -> Optional[APIKey]:
+        return self._keys.get(hash_key(key))
+
+    def authorize(self, key: str) -> Optional[APIKey]:
+        """
+        Look up a key and charge one request to its quota
+
+        Returns:
+            The key, or None if it is not registered
+
+        Raises:
+            QuotaExceededError: If the key has used up its quota
+        """
+        api_key = self.lookup(key)
+        if api_key is None:
+            return None
+        try:
+            api_key.consume()
+        except QuotaExceededError:
+            with self._lock:
+                self.rejected += 1
+            raise
+        return api_key
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"keys": len(self._keys), "reloads": self.reloads, "rejected": self.rejected}
+
+
+_api_key_registry: Optional[APIKeyRegistry] = None
+_api_key_registry_lock = threading.Lock()
+
+
+def get_api_key_registry() -> APIKeyRegistry:
+    """
+    Return the process-wide API key registry
+    """
+    global _api_key_registry
+    if _api_key_registry is None:
+        with _api_key_registry_lock:
+            if _api_key_registry is None:
+                _api_key_registry = APIKeyRegistry()
+    return _api_key_registry
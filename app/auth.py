@@ -1,12 +1,19 @@
+import hashlib
+import hmac
 import os
+import time
 from datetime import datetime, timedelta, UTC
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import Depends, HTTPException, status, Security, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, APIKeyHeader
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
 from dotenv import load_dotenv
 
+from app.apikeys import QuotaExceededError, get_api_key_registry
+from app.cache import LRUCache
 from app.models import TokenRequest, Token
 
 # Load environment variables
@@ -17,6 +24,26 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY", "default_secret_key")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRATION_MINUTES", "0"))
 
+
+def _read_key(name: str) -> str:
+    """Read a PEM key from NAME or from the file named by NAME_FILE"""
+    path = os.getenv(f"{name}_FILE", "")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    return os.getenv(name, "").replace("\\n", "\n")
+
+
+# Asymmetric algorithms (RS*, ES*, PS*) sign with the private key and verify
+# with the public key, which defaults to the private key's public half
+JWT_PRIVATE_KEY = _read_key("JWT_PRIVATE_KEY")
+JWT_PUBLIC_KEY = _read_key("JWT_PUBLIC_KEY")
+
+# Verified tokens are cached by digest until they expire
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "4096"))
+# Upper bound for tokens without exp, so a rotated key takes effect
+TOKEN_CACHE_MAX_TTL = int(os.getenv("TOKEN_CACHE_MAX_TTL", "300"))
+
 # Client credentials
 CLIENT_ID = os.getenv("CLIENT_ID", "sample_client_id")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET", "sample_client_secret")
@@ -31,6 +58,33 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 
+def load_keys(algorithm: str = ALGORITHM) -> Tuple[Optional[Key], Key]:
+    """
+    Parse the signing and verification keys once
+
+    Returns:
+        (signing key, verification key); the signing key is None when only
+        a public key is configured
+    """
+    if algorithm.startswith(("RS", "ES", "PS")):
+        signing_key = jwk.construct(JWT_PRIVATE_KEY, algorithm) if JWT_PRIVATE_KEY else None
+        if JWT_PUBLIC_KEY:
+            verifying_key = jwk.construct(JWT_PUBLIC_KEY, algorithm)
+        elif signing_key is not None:
+            verifying_key = signing_key.public_key()
+        else:
+            raise RuntimeError(f"{algorithm} requires JWT_PUBLIC_KEY or JWT_PRIVATE_KEY")
+        return signing_key, verifying_key
+    key = jwk.construct(SECRET_KEY, algorithm)
+    return key, key
+
+
+SIGNING_KEY, VERIFYING_KEY = load_keys()
+
+# Payloads of verified tokens, keyed by the SHA-256 digest of the token
+token_cache = LRUCache(max_entries=TOKEN_CACHE_MAX_ENTRIES)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token
@@ -43,7 +97,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.now(UTC) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    if SIGNING_KEY is None:
+        raise RuntimeError("JWT_PRIVATE_KEY is required to issue tokens")
+    encoded_jwt = jwt.encode(to_encode, SIGNING_KEY, algorithm=ALGORITHM)
     
     return encoded_jwt
 
@@ -51,23 +107,42 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 def verify_token(token: str = Depends(oauth2_scheme)) -> dict:
     """
     Verify the JWT token and return the payload
+
+    A token that verified before is answered from the cache without
+    checking the signature again, until its exp passes.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return dict(payload)
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        payload = jwt.decode(token, VERIFYING_KEY, algorithms=[ALGORITHM])
     except JWTError:
         raise credentials_exception
 
+    ttl = TOKEN_CACHE_MAX_TTL
+    if isinstance(payload.get("exp"), (int, float)):
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(digest, payload, ttl=ttl)
+    return dict(payload)
+
 
-def verify_api_key(api_key: str = Security(api_key_header)) -> bool:
+async def verify_api_key(api_key: str = Security(api_key_header)) -> bool:
     """
     Verify the API key
+
+    API_KEY is always accepted; the keys of the registry (API_KEYS_FILE)
+    are accepted within their quota. The check does not block, so it runs
+    on the event loop instead of taking a threadpool round trip; only the
+    periodic check of the key file goes to the threadpool.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -78,7 +153,21 @@ def verify_api_key(api_key: str = Security(api_key_header)) -> bool:
     if api_key is None:
         raise credentials_exception
     
-    if api_key != API_KEY:
+    if API_KEY and hmac.compare_digest(api_key.encode(), API_KEY.encode()):
+        return True
+
+    registry = get_api_key_registry()
+    if registry.reload_due():
+        await run_in_threadpool(registry.refresh)
+    try:
+        client = registry.authorize(api_key)
+    except QuotaExceededError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="API key quota exceeded",
+            headers={"Retry-After": str(max(1, round(e.retry_after)))},
+        )
+    if client is None:
         raise credentials_exception
     
     return True
@@ -0,0 +1,195 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from app.limiter import TickerNotFoundError, UpstreamBusyError
+
+# Circuit breaker settings
+BREAKER_WINDOW_SECONDS = float(os.getenv("BREAKER_WINDOW_SECONDS", "60"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+# Share of failed or slow calls in the window that opens the circuit
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "5"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(UpstreamBusyError):
+    """Raised instead of calling upstream while the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for upstream calls
+
+    Closed: calls go through and their outcomes are kept for `window_seconds`.
+    Once the window holds at least `min_calls` calls and the share of errors
+    and calls slower than `slow_call_seconds` reaches `failure_rate`, the
+    circuit opens. Open: calls fail immediately with CircuitOpenError for
+    `open_seconds`. Half-open: up to `half_open_probes` calls are let through;
+    a good probe closes the circuit, a bad one opens it again.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = BREAKER_WINDOW_SECONDS,
+        min_calls: int = BREAKER_MIN_CALLS,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        half_open_probes: int = BREAKER_HALF_OPEN_PROBES,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            # (timestamp, failed) of the calls in the window
+            self._outcomes: Deque[Tuple[float, bool]] = deque()
+            self._failures = 0
+            self._opened_at = 0.0
+            self._probes = 0
+            self.opened = 0
+            self.rejected = 0
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self._failures = 0
+        self.opened += 1
+
+    def _prune(self, now: float) -> None:
+        while self._outcomes and self._outcomes[0][0] <= now - self.window_seconds:
+            _, failed = self._outcomes.popleft()
+            self._failures -= failed
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(self.clock())
+
+    def _rejection(self, now: float) -> CircuitOpenError:
+        self.rejected += 1
+        retry_after = max(0.0, self.open_seconds - (now - self._opened_at))
+        return CircuitOpenError("Upstream circuit is open", retry_after=retry_after)
+
+    def check(self) -> None:
+        """
+        Fail fast while the circuit is open, without taking a half-open probe slot
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        with self._lock:
+            now = self.clock()
+            if self._current_state(now) == OPEN:
+                raise self._rejection(now)
+
+    def _admit(self) -> bool:
+        """Admit a call and return whether it is a half-open probe"""
+        with self._lock:
+            now = self.clock()
+            state = self._current_state(now)
+            if state == OPEN or (state == HALF_OPEN and self._probes >= self.half_open_probes):
+                raise self._rejection(now)
+            if state == HALF_OPEN:
+                self._probes += 1
+                return True
+            return False
+
+    def _record(self, probe: bool, failed: Optional[bool]) -> None:
+        """Record the outcome of an admitted call; None means it never reached upstream"""
+        with self._lock:
+            now = self.clock()
+            if probe:
+                self._probes -= 1
+                if failed is None or self._state != HALF_OPEN:
+                    return
+                if failed:
+                    self._open(now)
+                else:
+                    self._state = CLOSED
+                return
+            if failed is None or self._state != CLOSED:
+                return
+            self._outcomes.append((now, failed))
+            self._failures += failed
+            self._prune(now)
+            calls = len(self._outcomes)
+            if calls >= self.min_calls and self._failures / calls >= self.failure_rate:
+                self._open(now)
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run `fn` if the circuit allows it and record the outcome
+
+        Raises:
+            CircuitOpenError: If the circuit is open or all probe slots are taken
+        """
+        probe = self._admit()
+        started = self.clock()
+        try:
+            result = fn(*args, **kwargs)
+        except UpstreamBusyError:
+            # Rejected locally, says nothing about upstream health
+            self._record(probe, None)
+            raise
+        except TickerNotFoundError:
+            self._record(probe, self.clock() - started > self.slow_call_seconds)
+            raise
+        except Exception:
+            self._record(probe, True)
+            raise
+        self._record(probe, self.clock() - started > self.slow_call_seconds)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self.clock()
+            self._prune(now)
+            calls = len(self._outcomes)
+            return {
+                "state": self._current_state(now),
+                "calls": calls,
+                "failure_rate": round(self._failures / calls, 3) if calls else 0.0,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+_circuit_breaker: Optional[CircuitBreaker] = None
+_circuit_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """
+    Return the process-wide upstream circuit breaker
+    """
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        with _circuit_breaker_lock:
+            if _circuit_breaker is None:
+                _circuit_breaker = CircuitBreaker()
+    return _circuit_breaker
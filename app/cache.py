@@ -0,0 +1,343 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Cache settings
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "")
+
+# Time-to-live settings in seconds
+INTRADAY_TTL = float(os.getenv("CACHE_INTRADAY_TTL", "60"))
+
+# Entry: (value, expires_at) where expires_at is None for permanent entries
+Entry = Tuple[Any, Optional[float]]
+
+
+class LRUCache:
+    """
+    In-process cache with a size bound, per-entry TTL and eviction stats
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_entry(self, key: Hashable) -> Optional[Entry]:
+        """
+        Return the (value, expires_at) entry for a key, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[1] is not None and entry[1] <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def set_entry(self, key: Hashable, value: Any, expires_at: Optional[float]) -> None:
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value; a ttl of None keeps it until it is evicted
+        """
+        self.set_entry(key, value, None if ttl is None else time.time() + ttl)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteCache:
+    """
+    Cache stored in a SQLite file so several worker processes share hits
+
+    Values are pickled, so the file must only be writable by this service.
+    """
+
+    PURGE_EVERY = 256
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_entry(self, key: Hashable) -> Optional[Entry]:
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (repr(key),)
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            if row[1] is not None and row[1] <= time.time():
+                self.expirations += 1
+                self.misses += 1
+                expired = True
+            else:
+                self.hits += 1
+                expired = False
+        if expired:
+            with conn:
+                conn.execute("DELETE FROM cache WHERE key = ?", (repr(key),))
+            return None
+        return pickle.loads(row[0]), row[1]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def set_entry(self, key: Hashable, value: Any, expires_at: Optional[float]) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (repr(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expires_at)
+            )
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % self.PURGE_EVERY == 0
+        if purge:
+            self.purge_expired()
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self.set_entry(key, value, None if ttl is None else time.time() + ttl)
+
+    def delete(self, key: Hashable) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (repr(key),))
+
+    def purge_expired(self) -> int:
+        """
+        Delete expired rows and return how many were removed
+        """
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),)
+            )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM cache")
+        with self._lock:
+            self.hits = self.misses = self.expirations = 0
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        size = len(self)
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "size": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "expirations": self.expirations,
+            }
+
+
+class TieredCache:
+    """
+    In-process LRU cache in front of a shared backend
+
+    Lookups are served from memory when possible; shared hits are copied
+    into memory with the same expiry time.
+    """
+
+    def __init__(self, local: LRUCache, shared: SQLiteCache):
+        self.local = local
+        self.shared = shared
+
+    def get_entry(self, key: Hashable) -> Optional[Entry]:
+        entry = self.local.get_entry(key)
+        if entry is None:
+            entry = self.shared.get_entry(key)
+            if entry is not None:
+                self.local.set_entry(key, *entry)
+        return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def set_entry(self, key: Hashable, value: Any, expires_at: Optional[float]) -> None:
+        self.local.set_entry(key, value, expires_at)
+        self.shared.set_entry(key, value, expires_at)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self.set_entry(key, value, None if ttl is None else time.time() + ttl)
+
+    def delete(self, key: Hashable) -> None:
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def clear(self) -> None:
+        self.local.clear()
+        self.shared.clear()
+
+    def __len__(self) -> int:
+        return len(self.local)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "tiered",
+            "local": self.local.stats(),
+            "shared": self.shared.stats(),
+        }
+
+
+def create_cache(
+    max_entries: int = CACHE_MAX_ENTRIES,
+    sqlite_path: str = CACHE_SQLITE_PATH
+):
+    """
+    Create the configured cache backend
+
+    Args:
+        max_entries: Size bound of the in-process LRU cache
+        sqlite_path: Optional SQLite file shared between worker processes
+
+    Returns:
+        LRUCache, or TieredCache when a shared SQLite path is configured
+    """
+    local = LRUCache(max_entries)
+    if sqlite_path:
+        return TieredCache(local, SQLiteCache(sqlite_path))
+    return local
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Return the process-wide response cache
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_cache()
+    return _cache
+
+
+def history_cache_key(
+    ticker: str,
+    specific_date: Optional[date],
+    country: str,
+    interval: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> Tuple[str, str, str, str, str]:
+    """
+    Cache key for price history: a specific date, a start/end range, or the
+    latest trading day
+    """
+    if start:
+        span = f"{start.isoformat()}/{end.isoformat() if end else ''}"
+    elif specific_date:
+        span = specific_date.isoformat()
+    else:
+        span = "latest"
+    if interval is None:
+        interval = "1d" if (start or specific_date) else "1m"
+    return ("history", ticker, span, interval, country)
+
+
+def resample_cache_key(history_key: Tuple[str, ...], resample: str) -> Tuple[str, ...]:
+    """
+    Cache key for the bars of a history entry aggregated into `resample` sized bars
+    """
+    return ("resampled", *history_key[1:], resample)
+
+
+def history_ttl(last_date: Optional[date], today: date) -> Optional[float]:
+    """
+    Pick the time-to-live for a price history entry
+
+    Bars for dates before the exchange's current local date no longer change,
+    so entries ending before today are kept permanently; intraday data and
+    anything including today use the short intraday TTL.
+    """
+    if last_date is not None and last_date < today:
+        return None
+    return INTRADAY_TTL
@@ -0,0 +1,260 @@
+import heapq
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pytz
+
+from app.finance import get_country_timezone, get_provider, get_ticker_country, load_history, ticker_metadata
+
+logger = logging.getLogger(__name__)
+
+# Collector settings
+COLLECTOR_WATCHLIST = os.getenv("COLLECTOR_WATCHLIST", "watchlist.txt")
+COLLECTOR_MAX_WORKERS = int(os.getenv("COLLECTOR_MAX_WORKERS", "4"))
+# Fetches for one exchange are spread uniformly over this many seconds
+COLLECTOR_JITTER_SECONDS = float(os.getenv("COLLECTOR_JITTER_SECONDS", "300"))
+# Wait this long after the close so Yahoo has the final bars
+COLLECTOR_CLOSE_DELAY_MINUTES = int(os.getenv("COLLECTOR_CLOSE_DELAY_MINUTES", "30"))
+# Days before the session that are re-checked for gaps on every run
+COLLECTOR_LOOKBACK_DAYS = int(os.getenv("COLLECTOR_LOOKBACK_DAYS", "7"))
+COLLECTOR_INTERVALS = [
+    interval.strip() for interval in os.getenv("COLLECTOR_INTERVALS", "1d").split(",") if interval.strip()
+]
+
+# Regular session close in exchange local time
+MARKET_CLOSE = {
+    "US": dtime(16, 0),
+    "South Korea": dtime(15, 30),
+    "Japan": dtime(15, 30),
+    "UK": dtime(16, 30),
+    "France": dtime(17, 30),
+    "Germany": dtime(17, 30),
+    "Hong Kong": dtime(16, 0),
+}
+
+# (ticker, country)
+WatchlistEntry = Tuple[str, str]
+
+
+def load_watchlist(path: str = COLLECTOR_WATCHLIST) -> List[WatchlistEntry]:
+    """
+    Read a watchlist file
+
+    One ticker per line, optionally followed by a comma and a country
+    override ("ABC.XX, South Korea"). Blank lines and lines starting with
+    # are ignored.
+
+    Returns:
+        List of (ticker, country) pairs in file order, without duplicates
+    """
+    entries: List[WatchlistEntry] = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            ticker, _, country = (part.strip() for part in line.partition(","))
+            ticker = ticker.upper()
+            if ticker in seen:
+                continue
+            seen.add(ticker)
+            entries.append((ticker, country or get_ticker_country(ticker)))
+    return entries
+
+
+def session_run_time(country: str, session: date, delay_minutes: int = COLLECTOR_CLOSE_DELAY_MINUTES) -> datetime:
+    """
+    Return when a session of an exchange should be collected, as an aware datetime
+    """
+    tz = pytz.timezone(get_country_timezone(country))
+    close = datetime.combine(session, MARKET_CLOSE.get(country, MARKET_CLOSE["US"]))
+    return tz.localize(close) + timedelta(minutes=delay_minutes)
+
+
+def last_closed_session(country: str, now: datetime, delay_minutes: int = COLLECTOR_CLOSE_DELAY_MINUTES) -> date:
+    """
+    Return the most recent weekday whose collection time has passed at `now`
+    """
+    session = now.astimezone(pytz.timezone(get_country_timezone(country))).date()
+    while session.weekday() >= 5 or session_run_time(country, session, delay_minutes) > now:
+        session -= timedelta(days=1)
+    return session
+
+
+def next_session(country: str, now: datetime, delay_minutes: int = COLLECTOR_CLOSE_DELAY_MINUTES) -> date:
+    """
+    Return the next weekday whose collection time is still ahead of `now`
+    """
+    session = last_closed_session(country, now, delay_minutes) + timedelta(days=1)
+    while session.weekday() >= 5:
+        session += timedelta(days=1)
+    return session
+
+
+def collect_ticker(
+    ticker: str,
+    country: str,
+    session: date,
+    intervals: List[str] = COLLECTOR_INTERVALS,
+    lookback_days: int = COLLECTOR_LOOKBACK_DAYS
+) -> int:
+    """
+    Download a closed session (and any gaps before it) into the local store
+
+    The session has closed, so its bars are final and are stored like any
+    other past day. The ticker metadata is refreshed as well.
+
+    Returns:
+        Number of bars for the session across all intervals
+    """
+    tz_name = get_country_timezone(country)
+    provider = get_provider(country)
+    source = provider.ticker(ticker)
+    final_until = session + timedelta(days=1)
+    bars = 0
+    for interval in intervals:
+        data = load_history(
+            source, ticker, session - timedelta(days=lookback_days), final_until, interval, tz_name, final_until
+        )
+        if not data.empty:
+            bars += int((data.index.date == session).sum())
+    ticker_metadata(ticker, provider=provider)
+    return bars
+
+
+class Collector:
+    """
+    Scheduler that collects every watchlist ticker after its exchange closes
+
+    Each exchange gets one run per weekday at close + delay. The tickers of a
+    run are spread over `jitter_seconds` at random offsets and downloaded by
+    a bounded worker pool, so a large watchlist does not hit Yahoo at once.
+    """
+
+    def __init__(
+        self,
+        watchlist: List[WatchlistEntry],
+        max_workers: int = COLLECTOR_MAX_WORKERS,
+        jitter_seconds: float = COLLECTOR_JITTER_SECONDS,
+        delay_minutes: int = COLLECTOR_CLOSE_DELAY_MINUTES,
+        collect: Callable[[str, str, date], int] = collect_ticker,
+        clock: Callable[[], float] = time.time,
+        rng: Optional[random.Random] = None
+    ):
+        self.exchanges: Dict[str, List[str]] = {}
+        for ticker, country in watchlist:
+            self.exchanges.setdefault(country, []).append(ticker)
+        self.jitter_seconds = jitter_seconds
+        self.delay_minutes = delay_minutes
+        self.collect = collect
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="collector")
+        # Min-heap of (due timestamp, sequence, action, payload)
+        self._queue: List[Tuple[float, int, str, tuple]] = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.collected = 0
+        self.failed = 0
+
+    def _push(self, due: float, action: str, payload: tuple) -> None:
+        self._sequence += 1
+        heapq.heappush(self._queue, (due, self._sequence, action, payload))
+
+    def _now(self) -> datetime:
+        return datetime.fromtimestamp(self.clock(), tz=pytz.utc)
+
+    def schedule_session(self, country: str, session: date) -> None:
+        """
+        Queue a collection run for one exchange session
+        """
+        self._push(session_run_time(country, session, self.delay_minutes).timestamp(), "session", (country, session))
+
+    def start(self, catch_up: bool = True) -> None:
+        """
+        Queue the first run of every exchange
+
+        With `catch_up`, the most recent closed session is collected right
+        away (missing days are filled by the store's gap planner); otherwise
+        the first run is the next close.
+        """
+        now = self._now()
+        for country in self.exchanges:
+            if catch_up:
+                self._push(now.timestamp(), "session", (country, last_closed_session(country, now, self.delay_minutes)))
+            else:
+                self.schedule_session(country, next_session(country, now, self.delay_minutes))
+
+    def _start_session(self, due: float, country: str, session: date) -> None:
+        tickers = self.exchanges[country]
+        logger.info("Collecting %d %s tickers for %s", len(tickers), country, session)
+        for ticker in tickers:
+            self._push(due + self.rng.uniform(0, self.jitter_seconds), "fetch", (ticker, country, session))
+        self.schedule_session(country, next_session(country, self._now(), self.delay_minutes))
+
+    def _fetch(self, ticker: str, country: str, session: date) -> None:
+        try:
+            bars = self.collect(ticker, country, session)
+            logger.info("Collected %s %s: %d bars", ticker, session, bars)
+            with self._lock:
+                self.collected += 1
+        except Exception:
+            logger.exception("Failed to collect %s %s", ticker, session)
+            with self._lock:
+                self.failed += 1
+
+    def run_pending(self) -> Optional[float]:
+        """
+        Run everything that is due and return when the next item is due
+        """
+        now = self.clock()
+        while self._queue and self._queue[0][0] <= now:
+            due, _, action, payload = heapq.heappop(self._queue)
+            if action == "session":
+                self._start_session(due, *payload)
+            else:
+                self.executor.submit(self._fetch, *payload)
+        return self._queue[0][0] if self._queue else None
+
+    def run_forever(self) -> None:
+        """
+        Run the schedule until stop() is called
+        """
+        while not self._stop.is_set():
+            next_due = self.run_pending()
+            timeout = 60.0 if next_due is None else max(0.0, next_due - self.clock())
+            self._stop.wait(min(timeout, 60.0))
+
+    def run_once(self) -> None:
+        """
+        Collect the last closed session of every exchange without jitter and wait for it
+        """
+        now = self._now()
+        futures = [
+            self.executor.submit(self._fetch, ticker, country, last_closed_session(country, now, self.delay_minutes))
+            for country, tickers in self.exchanges.items()
+            for ticker in tickers
+        ]
+        for future in futures:
+            future.result()
+
+    def stop(self, wait: bool = True) -> None:
+        self._stop.set()
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "tickers": sum(len(tickers) for tickers in self.exchanges.values()),
+                "queued": len(self._queue),
+                "collected": self.collected,
+                "failed": self.failed,
+            }
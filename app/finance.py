@@ -1,9 +1,118 @@
-import yfinance as yf
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
 from datetime import date, datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import pytz
+from pydantic import TypeAdapter
+
+from app.cache import get_cache, history_cache_key, history_ttl, resample_cache_key, LRUCache
+from app.intraday import get_intraday_buffers
+from app.metadata import get_metadata_store
+from app.metrics import CONVERSION_SECONDS, track_upstream
+from app.providers import (
+    Provider, YahooProvider, FileProvider, HTTPProvider, HedgedProvider, parse_routes,
+    FILE_PROVIDER_DIR, HTTP_PROVIDER_URL, PROVIDER_ROUTES, PROVIDER_HEDGE_SECONDS
+)
+from app.resample import bucket_start, resample_frame
+from app.store import get_price_store, DateRange
+from app.models import (
+    HistoricalPrice, PriceSeries, TickerResponse, TickerRequest, BatchTickerResult, INTRADAY_MAX_DAYS,
+    INTRADAY_MAX_SPAN_DAYS
+)
+from app.singleflight import SingleFlight
+
+# Maximum number of blocking upstream fetches running at the same time
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+
+_fetch_executor: Optional[ThreadPoolExecutor] = None
+_fetch_executor_lock = threading.Lock()
+
+# Batch settings: tickers per request, symbols per multi-symbol download,
+# and concurrent fetches per batch
+BATCH_MAX_TICKERS = int(os.getenv("BATCH_MAX_TICKERS", "500"))
+BATCH_DOWNLOAD_SIZE = int(os.getenv("BATCH_DOWNLOAD_SIZE", "50"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "8"))
+
+# Bar intervals: defaults for the latest day and for dated queries, and the
+# intervals whose bars are kept in the local price store
+DEFAULT_LATEST_INTERVAL = "1m"
+DEFAULT_RANGE_INTERVAL = "1d"
+STORED_INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d"}
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Validates a whole list of prices in one call
+_price_list_adapter = TypeAdapter(List[HistoricalPrice])
+
+# Concurrent identical requests and upstream calls share one in-flight fetch
+request_flights = SingleFlight()
+upstream_flights = SingleFlight()
+
+
+def get_fetch_executor() -> ThreadPoolExecutor:
+    """
+    Return the bounded executor used to run blocking upstream fetches
+    """
+    global _fetch_executor
+    if _fetch_executor is None:
+        with _fetch_executor_lock:
+            if _fetch_executor is None:
+                _fetch_executor = ThreadPoolExecutor(
+                    max_workers=FETCH_MAX_WORKERS,
+                    thread_name_prefix="finance-fetch"
+                )
+    return _fetch_executor
+
+
+def shutdown_fetch_executor() -> None:
+    """
+    Shut down the fetch executor, waiting for running fetches to finish
+    """
+    global _fetch_executor
+    with _fetch_executor_lock:
+        if _fetch_executor is not None:
+            _fetch_executor.shutdown(wait=True)
+            _fetch_executor = None
+
+
+# Last successful response per request, served marked stale when upstream fails
+STALE_MAX_ENTRIES = int(os.getenv("STALE_MAX_ENTRIES", "1024"))
+STALE_MAX_AGE_SECONDS = int(os.getenv("STALE_MAX_AGE_SECONDS", "86400"))
+last_good_responses = LRUCache(max_entries=STALE_MAX_ENTRIES)
 
-from app.models import HistoricalPrice, TickerResponse
+# 국가별 타임존 매핑
+COUNTRY_TZ = {
+    "US": "America/New_York",
+    "South Korea": "Asia/Seoul",
+    "Japan": "Asia/Tokyo",
+    "UK": "Europe/London",
+    "France": "Europe/Paris",
+    "Germany": "Europe/Berlin",
+    "Hong Kong": "Asia/Hong_Kong",
+}
+
+
+def get_country_timezone(country: str) -> str:
+    """
+    Return the exchange time zone name for a country
+    """
+    return COUNTRY_TZ.get(country, "America/New_York")
+
+
+def get_coalescing_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Return originated vs. coalesced counts for requests and upstream calls
+    """
+    return {
+        "requests": request_flights.stats(),
+        "upstream": upstream_flights.stats(),
+    }
 
 
 def get_ticker_country(ticker_symbol: str) -> str:
@@ -29,10 +138,92 @@ def get_ticker_country(ticker_symbol: str) -> str:
     return "US"
 
 
+_providers: Dict[str, Provider] = {}
+_providers_lock = threading.Lock()
+_routes = parse_routes(PROVIDER_ROUTES)
+# One HedgedProvider per multi-provider route, so its counters accumulate
+_hedged_providers: Dict[Tuple[str, ...], HedgedProvider] = {}
+
+
+def get_providers() -> Dict[str, Provider]:
+    """
+    Return the configured providers by route name
+    """
+    if not _providers:
+        with _providers_lock:
+            if not _providers:
+                _providers["yahoo"] = YahooProvider()
+                _providers["file"] = FileProvider(
+                    FILE_PROVIDER_DIR,
+                    timezone_for=lambda symbol: get_country_timezone(get_ticker_country(symbol))
+                )
+                if HTTP_PROVIDER_URL:
+                    _providers["http"] = HTTPProvider(HTTP_PROVIDER_URL)
+    return _providers
+
+
+def register_provider(name: str, provider: Provider) -> None:
+    """
+    Add or replace a provider that routes can refer to by name
+    """
+    get_providers()[name] = provider
+    with _providers_lock:
+        _hedged_providers.clear()
+
+
+def set_provider_routes(spec: str) -> None:
+    """
+    Replace the country routes, in PROVIDER_ROUTES format
+    """
+    global _routes
+    _routes = parse_routes(spec)
+    with _providers_lock:
+        _hedged_providers.clear()
+
+
+def get_provider(country: str) -> Provider:
+    """
+    Return the provider routed to a country
+
+    A route with several providers becomes a HedgedProvider that fails over
+    (and with PROVIDER_HEDGE_SECONDS also hedges) in route order. It is kept
+    until the routes or providers change.
+    """
+    providers = get_providers()
+    names = [name for name in _routes.get(country, _routes["*"]) if name in providers]
+    if not names:
+        raise ValueError(f"No configured provider for {country}")
+    if len(names) == 1:
+        return providers[names[0]]
+    key = tuple(names)
+    with _providers_lock:
+        hedged = _hedged_providers.get(key)
+        if hedged is None:
+            hedged = _hedged_providers[key] = HedgedProvider(
+                [providers[name] for name in names], hedge_after=PROVIDER_HEDGE_SECONDS
+            )
+    return hedged
+
+
+def get_provider_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Return hedged vs. failed-over calls of each multi-provider route, e.g. "file_yahoo"
+    """
+    with _providers_lock:
+        hedged_providers = dict(_hedged_providers)
+    return {"_".join(names): hedged.stats() for names, hedged in hedged_providers.items()}
+
+
 def fetch_historical_data(
     ticker: str, 
     specific_date: Optional[date] = None, 
-    country: Optional[str] = None
+    country: Optional[str] = None,
+    include_metadata: bool = True,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    interval: Optional[str] = None,
+    since: Optional[datetime] = None,
+    resample: Optional[str] = None
 ) -> TickerResponse:
     """
     Fetch historical price data for a ticker
@@ -41,6 +232,12 @@ def fetch_historical_data(
         ticker: The ticker symbol
         specific_date: Optional specific date to fetch data for
         country: Optional country override
+        include_metadata: Whether to look up name/sector/industry/... metadata
+        start: Optional first date of a range
+        end: Optional last date of a range (inclusive, defaults to today)
+        interval: Optional bar interval, e.g. "1d" or "5m"
+        since: Optional cursor; only the latest day's bars from then on are returned
+        resample: Optional bar size to aggregate the bars into, e.g. "15m"
     
     Returns:
         TickerResponse object with historical price data
@@ -48,130 +245,715 @@ def fetch_historical_data(
     # Determine the country if not provided
     if not country:
         country = get_ticker_country(ticker)
-    
-    # For US tickers, use Yahoo Finance
-    if country == "US":
-        return fetch_from_yahoo(ticker, country, specific_date)
-    else:
-        # For non-US tickers, we could implement other data sources
-        # For now, we'll still use Yahoo Finance but with a note
-        response = fetch_from_yahoo(ticker, country, specific_date)
+
+    # Each country is served by the provider(s) routed to it
+    provider = get_provider(country)
+    response = fetch_from_provider(
+        ticker, country, specific_date, include_metadata=include_metadata,
+        start=start, end=end, interval=interval, since=since, resample=resample, provider=provider
+    )
+    if country != "US" and isinstance(provider, YahooProvider):
+        # Yahoo's coverage outside the US has gaps
         response.metadata["note"] = f"Data for {country} tickers may not be complete"
-        return response
+    return response
 
 
-def fetch_from_yahoo(ticker: str, country: str,specific_date: Optional[date] = None) -> TickerResponse:
+def apply_country_override(response: TickerResponse, country: Optional[str]) -> TickerResponse:
     """
-    Fetch historical price data from Yahoo Finance
-    
+    Apply a caller's country override to a response
+    """
+    if country:
+        response.country = country
+        if "note" not in response.metadata:
+            response.metadata["note"] = f"Data for {country} tickers may not be complete"
+    return response
+
+
+async def afetch_historical_data(
+    ticker: str,
+    specific_date: Optional[date] = None,
+    country: Optional[str] = None,
+    include_metadata: bool = True,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    interval: Optional[str] = None,
+    since: Optional[datetime] = None,
+    resample: Optional[str] = None
+) -> TickerResponse:
+    """
+    Fetch historical price data for a ticker without blocking the event loop
+
+    The Yahoo Finance client is synchronous, so the fetch runs on the bounded
+    fetch executor and the caller awaits its result. Concurrent calls with the
+    same arguments share a single fetch; each caller gets its own copy of the
+    response so it can adjust country and metadata independently.
+
     Args:
         ticker: The ticker symbol
-        country: The country of the ticker
         specific_date: Optional specific date to fetch data for
-    
+        country: Optional country override
+        include_metadata: Whether to look up name/sector/industry/... metadata
+        start: Optional first date of a range
+        end: Optional last date of a range (inclusive, defaults to today)
+        interval: Optional bar interval, e.g. "1d" or "5m"
+        since: Optional cursor; only the latest day's bars from then on are returned
+        resample: Optional bar size to aggregate the bars into, e.g. "15m"
+
     Returns:
         TickerResponse object with historical price data
     """
-    # Initialize the ticker object
-    yf_ticker = yf.Ticker(ticker)
-    
-        # 국가별 타임존 매핑
-    country_tz = {
-        "US": "America/New_York",
-        "South Korea": "Asia/Seoul",
-        "Japan": "Asia/Tokyo",
-        "UK": "Europe/London",
-        "France": "Europe/Paris",
-        "Germany": "Europe/Berlin",
-        "Hong Kong": "Asia/Hong_Kong",
-    }
+    loop = asyncio.get_running_loop()
+    response = await request_flights.ado(
+        (ticker, specific_date, country, include_metadata, start, end, interval, since, resample),
+        loop.run_in_executor,
+        get_fetch_executor(),
+        partial(
+            fetch_historical_data, ticker, specific_date, country, include_metadata=include_metadata,
+            start=start, end=end, interval=interval, since=since, resample=resample
+        )
+    )
+    return response.model_copy(update={"metadata": dict(response.metadata)})
+
+
+async def afetch_history_frame(
+    ticker: str,
+    specific_date: Optional[date] = None,
+    country: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    interval: Optional[str] = None,
+    since: Optional[datetime] = None,
+    resample: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Fetch the price history of a ticker as a DataFrame without blocking the event loop
+
+    Used by the streaming response formats, which read rows straight off
+    the DataFrame instead of building a TickerResponse. The returned frame
+    may be shared with the cache and other requests and must not be modified.
+
+    Args:
+        ticker: The ticker symbol
+        specific_date: Optional specific date to fetch data for
+        country: Optional country override
+        start: Optional first date of a range
+        end: Optional last date of a range (inclusive, defaults to today)
+        interval: Optional bar interval, e.g. "1d" or "5m"
+        since: Optional cursor; only the latest day's bars from then on are returned
+        resample: Optional bar size to aggregate the bars into, e.g. "15m"
+
+    Returns:
+        DataFrame with Open/High/Low/Close/Volume columns
+    """
+    country = country or get_ticker_country(ticker)
+    loop = asyncio.get_running_loop()
+    return await request_flights.ado(
+        ("frame", ticker, specific_date, country, start, end, interval, since, resample),
+        loop.run_in_executor,
+        get_fetch_executor(),
+        partial(
+            fetch_history_frame, ticker, country, specific_date, start=start, end=end, interval=interval,
+            since=since, resample=resample
+        )
+    )
+
+
+def select_date(hist_data: pd.DataFrame, specific_date: date) -> pd.DataFrame:
+    """
+    Keep only the rows of one exchange-local date, using a boolean mask
+    """
+    if hist_data.empty:
+        return hist_data
+    day_start = pd.Timestamp(specific_date).tz_localize(hist_data.index.tz)
+    index = hist_data.index
+    return hist_data[(index >= day_start) & (index < day_start + pd.Timedelta(days=1))]
+
+
+def frame_to_prices(hist_data: pd.DataFrame, specific_date: Optional[date] = None) -> List[HistoricalPrice]:
+    """
+    Convert a yfinance history DataFrame to HistoricalPrice objects
+
+    The conversion works on whole columns: the date filter is a boolean mask
+    on the index and the values are pulled out as NumPy arrays, then the
+    whole list is validated in a single pydantic-core call. (model_construct
+    is slower than validation in pydantic 2, so it is not used here.)
+
+    Args:
+        hist_data: DataFrame with Open/High/Low/Close/Volume columns and a DatetimeIndex
+        specific_date: Optional date; rows on other dates are dropped
+
+    Returns:
+        List of HistoricalPrice objects in index order
+    """
+    if specific_date:
+        hist_data = select_date(hist_data, specific_date)
+
+    if hist_data.empty:
+        return []
+
+    with CONVERSION_SECONDS.time():
+        index = hist_data.index
+        return _price_list_adapter.validate_python([
+            {"date": d, "time": t, "open": o, "high": h, "low": l, "close": c, "volume": v}
+            for d, t, o, h, l, c, v in zip(
+                index.date,
+                index.time,
+                hist_data["Open"].to_numpy(dtype=np.float64).tolist(),
+                hist_data["High"].to_numpy(dtype=np.float64).tolist(),
+                hist_data["Low"].to_numpy(dtype=np.float64).tolist(),
+                hist_data["Close"].to_numpy(dtype=np.float64).tolist(),
+                hist_data["Volume"].to_numpy().astype(np.int64).tolist(),
+            )
+        ])
+
+
+def plan_fetch_ranges(
+    covered: List[DateRange], start: date, end: date, max_days: Optional[int] = None
+) -> List[DateRange]:
+    """
+    Work out which parts of a date range still have to be fetched upstream
+
+    Args:
+        covered: Sorted, disjoint ranges already in the local store
+        start: First date of the requested range
+        end: Day after the last date of the requested range
+        max_days: Optional longest gap; longer ones are split into several
+
+    Returns:
+        Sorted list of [start, end) gaps inside the requested range
+    """
+    gaps: List[DateRange] = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start))
+        cursor = covered_end
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    if max_days:
+        step = timedelta(days=max_days)
+        gaps = [
+            (gap_start + step * i, min(gap_start + step * (i + 1), gap_end))
+            for gap_start, gap_end in gaps
+            for i in range(-(-(gap_end - gap_start).days // max_days))
+        ]
+    return gaps
+
+
+def _price_columns(frame: pd.DataFrame) -> pd.DataFrame:
+    return frame[PRICE_COLUMNS] if not frame.empty else pd.DataFrame(columns=PRICE_COLUMNS)
+
+
+def load_history(
+    source: Any,
+    ticker: str,
+    start_date: date,
+    end_date: date,
+    interval: str,
+    tz_name: str,
+    today: date
+) -> pd.DataFrame:
+    """
+    Load bars for a date range, fetching only what the local store lacks
+
+    Days before `today` are final: the range planner finds the gaps in the
+    store, only those are downloaded and written back, and the whole past
+    part is then read from disk. Intraday gaps older than Yahoo keeps the
+    bars for are not marked as downloaded when they come back empty, and
+    1 minute bars are fetched a week at a time, the most Yahoo returns.
+    Today's (or future) bars are still changing, so that part is always
+    fetched live and not stored.
+
+    Args:
+        source: Ticker object of the provider (ProviderTicker or yf.Ticker) used for the gaps
+        ticker: The ticker symbol
+        start_date: First date to load
+        end_date: Day after the last date to load
+        interval: Bar interval, e.g. "1d" or "5m"
+        tz_name: Exchange time zone of the ticker
+        today: Current date in the exchange time zone
+
+    Returns:
+        DataFrame with Open/High/Low/Close/Volume columns for [start_date, end_date)
+    """
+    if interval not in STORED_INTERVALS:
+        # Weekly and monthly bars depend on where the range starts
+        return source.history(start=start_date, end=end_date, interval=interval)
+
+    store = get_price_store()
+    stored_end = min(end_date, today)
+    frames = []
+    # Yahoo answers "no prices" for intraday bars older than it keeps, which
+    # is not the same as a day without trading
+    window_start = today - timedelta(days=INTRADAY_MAX_DAYS[interval]) if interval in INTRADAY_MAX_DAYS else None
+
+    if start_date < stored_end:
+        for gap_start, gap_end in plan_fetch_ranges(
+            store.covered_ranges(ticker, interval), start_date, stored_end, INTRADAY_MAX_SPAN_DAYS.get(interval)
+        ):
+            data = source.history(start=gap_start, end=gap_end, interval=interval)
+            if data.empty and window_start and gap_start < window_start:
+                continue
+            store.write(ticker, interval, data, gap_start, gap_end, tz_name)
+        frames.append(store.read(ticker, interval, start_date, stored_end))
+
+    if end_date > stored_end:
+        live = source.history(start=max(start_date, stored_end), end=end_date, interval=interval)
+        frames.append(_price_columns(live))
+
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+    return frames[0] if len(frames) == 1 else pd.concat(frames)
+
+
+def fetch_history_frame(
+    ticker: str,
+    country: str,
+    specific_date: Optional[date] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    interval: Optional[str] = None,
+    provider: Optional[Provider] = None,
+    refresh: bool = False,
+    since: Optional[datetime] = None,
+    resample: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Fetch the price history of a ticker as a DataFrame
+
+    Without a date or range, the latest trading day is returned at 1 minute
+    bars (empty if the exchange has not traded yet today). A specific date or
+    a start/end range is returned at daily bars unless another interval is
+    given.
+
+    Every fetch of the latest day is merged into the symbol's intraday
+    buffer, which appends only the bars it does not have yet. With `since`,
+    the bars from that time on are read from the buffer, so the result (and
+    its conversion) grows with the new bars rather than the whole day.
+
+    With `resample`, the bars are aggregated into larger ones aligned to the
+    exchange's local midnight, and the aggregate is cached under its own key
+    so repeated views skip the aggregation. Combined with `since`, the
+    result starts at the bucket holding the cursor, rebuilt from all its bars.
+
+    Args:
+        ticker: The ticker symbol
+        country: The country of the ticker
+        specific_date: Optional specific date to fetch data for
+        start: Optional first date of a range
+        end: Optional last date of a range (inclusive, defaults to today)
+        interval: Optional bar interval, e.g. "1d" or "5m"
+        provider: Optional provider; defaults to the one routed to the country
+        refresh: Fetch again even if a cached copy is still fresh (and replace it)
+        since: Optional cursor for the latest day: only bars at or after it are
+            returned (naive times are in the exchange time zone)
+        resample: Optional bar size to aggregate the bars into, e.g. "15m"
+
+    Returns:
+        DataFrame with Open/High/Low/Close/Volume columns and a DatetimeIndex
+        in the exchange time zone
+    """
     if not country:
         country = get_ticker_country(ticker)
-    tz_name = country_tz.get(country, "America/New_York")
+    # Initialize the ticker object
+    source = (provider or get_provider(country)).ticker(ticker)
+    tz_name = get_country_timezone(country)
     tz = pytz.timezone(tz_name)
     # 현지 기준 오늘 날짜
     now_local = datetime.now(tz).date()
 
-    # Determine the date range
+    # Determine the date range; a specific date is a one-day range
     if specific_date:
-        # If a specific date is provided, fetch data for that day
-        # Yahoo Finance API needs a range, so we'll use a 1-day range
-        start_date = specific_date
-        end_date = specific_date + timedelta(days=1)
+        start_date, last_date = specific_date, specific_date
+    elif start:
+        start_date, last_date = start, end or now_local
     else:
-        # If no date is provided, fetch data for the last 30 days
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=30)
-    
-    # Initialize a flag to check if prices are available
-    bPrices = True
+        start_date = last_date = None
+    dated = start_date is not None
+    interval = interval or (DEFAULT_RANGE_INTERVAL if dated else DEFAULT_LATEST_INTERVAL)
 
-    # Fetch the historical data
-    if specific_date:
-        # For a specific date, fetch daily data for that date
-        hist_data = yf_ticker.history(start=start_date, end=end_date)
+    cache = get_cache()
+
+    # Fetch the historical data, unless a cached copy is still fresh
+    history_key = history_cache_key(
+        ticker, specific_date, country, interval=interval, start=start, end=last_date if start else None
+    )
+    # A cursor selects a few bars out of the buffer; those are not worth caching
+    resample_key = resample_cache_key(history_key, resample) if resample and since is None else None
+    if resample_key and not refresh:
+        cached = cache.get(resample_key)
+        if cached is not None:
+            return cached.to_frame()
+
+    cached = None if refresh else cache.get(history_key)
+    if cached is not None:
+        # Entries are PriceSeries; a shared SQLite cache may still hold DataFrames of older versions
+        hist_data = cached.to_frame() if isinstance(cached, PriceSeries) else cached
     else:
-        # For current data, fetch 1-minute interval data for the last day
-        hist_data = yf_ticker.history(period="1d", interval="1m")
-    
-        print(f"local time zone: {tz_name}")
-        print(f"now local date: {now_local}")
+        def fetch_history():
+            if dated:
+                # Past bars come from the local store; only missing ranges are downloaded
+                data = load_history(
+                    source, ticker, start_date, last_date + timedelta(days=1), interval, tz_name, now_local
+                )
+            else:
+                # For current data, fetch intraday data for the last day
+                data = source.history(period="1d", interval=interval)
+            cache.set(history_key, PriceSeries.from_frame(data, tz_name), ttl=history_ttl(last_date, now_local))
+            return data
 
-        hist_data_date = hist_data.index.date[0] 
-        print(f"historical data date: {hist_data_date}")
+        hist_data = upstream_flights.do(history_key, fetch_history)
 
-        if hist_data_date != now_local:
-            bPrices = False
-            
+    if not dated and not hist_data.empty and hist_data.index[0].date() != now_local:
+        # The latest data is from a previous session: nothing for today yet
+        hist_data = hist_data.iloc[0:0]
+    elif not dated:
+        # Cheap when the buffer already has these bars (a cache hit)
+        buffer = get_intraday_buffers().get(ticker, country, interval)
+        buffer.merge(hist_data)
+        if since is not None and not hist_data.empty:
+            hist_data = buffer.since(bucket_start(since, resample, tz_name) if resample else since)
+    elif specific_date:
+        hist_data = select_date(hist_data, specific_date)
 
+    if resample:
+        hist_data = resample_frame(hist_data, resample)
+        if resample_key:
+            cache.set(resample_key, PriceSeries.from_frame(hist_data, tz_name), ttl=history_ttl(last_date, now_local))
+    return hist_data
 
-    # Convert the data to our model format
-    prices: List[HistoricalPrice] = []
 
-    if hist_data.empty or not bPrices:
-        # Nothing
-        prices: List[HistoricalPrice] = []
-    else:
+def ticker_metadata(ticker: str, country: Optional[str] = None, provider: Optional[Provider] = None) -> Dict[str, Any]:
+    """
+    Return the name/sector/industry/currency/exchange metadata of a ticker
+    """
+    provider = provider or get_provider(country or get_ticker_country(ticker))
+    def load_info(symbol: str) -> Dict[str, Any]:
+        with track_upstream(provider.name, "info"):
+            return provider.info(symbol)
 
-        for index, row in hist_data.iterrows():
-            # Convert pandas timestamp to date
-            price_date = index.date()
-            price_time = index.time()
-            
-            # Skip if we're looking for a specific date and this isn't it
-            if specific_date and price_date != specific_date:
-                continue
-            
-            # Create a HistoricalPrice object
-            price = HistoricalPrice(
-                date=price_date,
-                time=price_time,
-                open=float(row["Open"]),
-                high=float(row["High"]),
-                low=float(row["Low"]),
-                close=float(row["Close"]),
-                volume=int(row["Volume"])
-            )
-            
-            prices.append(price)
-    
-    # Get additional info about the ticker
-    info = yf_ticker.info
-    
-    # Create metadata
-    metadata: Dict[str, Any] = {
+    # Get additional info about the ticker from the long-lived metadata store
+    info = get_metadata_store().get(
+        ticker,
+        lambda symbol: upstream_flights.do(("info", symbol), lambda: load_info(symbol))
+    )
+    return {
         "name": info.get("shortName", ""),
         "sector": info.get("sector", ""),
         "industry": info.get("industry", ""),
         "currency": info.get("currency", "USD"),
         "exchange": info.get("exchange", ""),
-        "data_source": "Yahoo Finance"
     }
+
+
+def fetch_from_yahoo(
+    ticker: str,
+    country: str,
+    specific_date: Optional[date] = None,
+    include_metadata: bool = True,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    interval: Optional[str] = None,
+    since: Optional[datetime] = None,
+    resample: Optional[str] = None
+) -> TickerResponse:
+    """
+    Fetch historical price data from Yahoo Finance, regardless of the country routes
+    """
+    return fetch_from_provider(
+        ticker, country, specific_date, include_metadata=include_metadata,
+        start=start, end=end, interval=interval, since=since, resample=resample, provider=get_providers()["yahoo"]
+    )
+
+
+def fetch_from_provider(
+    ticker: str,
+    country: str,
+    specific_date: Optional[date] = None,
+    include_metadata: bool = True,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    interval: Optional[str] = None,
+    since: Optional[datetime] = None,
+    resample: Optional[str] = None,
+    provider: Optional[Provider] = None
+) -> TickerResponse:
+    """
+    Fetch historical price data from a provider
+
+    When the fetch fails (including while the upstream circuit is open) and
+    the same request succeeded within STALE_MAX_AGE_SECONDS, that response is
+    returned with `stale` and `fetched_at` added to its metadata instead. It
+    is kept with its prices as a PriceSeries and only converted back then;
+    a response without prices does not replace one with prices. Requests
+    with `since` do not keep their own: they fall back to the bars of the
+    full response from the cursor on.
+
+    Args:
+        ticker: The ticker symbol
+        country: The country of the ticker
+        specific_date: Optional specific date to fetch data for
+        include_metadata: Whether to look up name/sector/industry/... metadata
+        start: Optional first date of a range
+        end: Optional last date of a range (inclusive, defaults to today)
+        interval: Optional bar interval, e.g. "1d" or "5m"
+        since: Optional cursor; only the latest day's bars from then on are returned
+        resample: Optional bar size to aggregate the bars into, e.g. "15m"
+        provider: Optional provider; defaults to the one routed to the country
+
+    Returns:
+        TickerResponse object with historical price data
+    """
+    provider = provider or get_provider(country or get_ticker_country(ticker))
+    # Without the cursor: polls share the entry of the full response
+    key = (provider.name, ticker, country, specific_date, include_metadata, start, end, interval, resample)
+    try:
+        response, hist_data = _fetch_from_provider(
+            ticker, country, specific_date, include_metadata, start, end, interval, since, resample, provider
+        )
+    except Exception:
+        last_good = last_good_responses.get(key)
+        if last_good is None:
+            raise
+        response, series, fetched_at = last_good
+        frame = series.to_frame()
+        if since is not None:
+            tz_name = get_country_timezone(country)
+            cursor = bucket_start(since, resample, tz_name) if resample else pd.Timestamp(since)
+            frame = frame[frame.index >= (cursor.tz_localize(tz_name) if cursor.tzinfo is None else cursor)]
+        return response.model_copy(update={
+            "prices": frame_to_prices(frame),
+            "metadata": {**response.metadata, "stale": True, "fetched_at": fetched_at}
+        })
+    if since is not None:
+        return response
+    if hist_data.empty:
+        # An answer without bars is a poorer fallback than the bars of an earlier one
+        last_good = last_good_responses.get(key)
+        if last_good is not None and not last_good[1].empty:
+            return response
+    last_good_responses.set(
+        key,
+        (
+            response.model_copy(update={"prices": []}),
+            PriceSeries.from_frame(hist_data, get_country_timezone(country)),
+            datetime.now(pytz.utc).isoformat()
+        ),
+        ttl=STALE_MAX_AGE_SECONDS
+    )
+    return response
+
+
+def _fetch_from_provider(
+    ticker: str,
+    country: str,
+    specific_date: Optional[date],
+    include_metadata: bool,
+    start: Optional[date],
+    end: Optional[date],
+    interval: Optional[str],
+    since: Optional[datetime],
+    resample: Optional[str],
+    provider: Provider
+) -> Tuple[TickerResponse, pd.DataFrame]:
+    hist_data = fetch_history_frame(
+        ticker, country, specific_date, start=start, end=end, interval=interval, provider=provider, since=since,
+        resample=resample
+    )
+
+    # Convert the data to our model format
+    prices = frame_to_prices(hist_data)
+    
+    # Create metadata
+    metadata: Dict[str, Any] = {"data_source": provider.name}
+    if include_metadata:
+        metadata = {**ticker_metadata(ticker, provider=provider), **metadata}
     
-    # Create and return the response
-    return TickerResponse(
+    # Create and return the response, with the bars it was built from
+    response = TickerResponse(
         ticker=ticker,
         country=get_ticker_country(ticker),
         prices=prices,
         metadata=metadata
     )
+    return response, hist_data
+
+
+def _download_histories(
+    provider: YahooProvider, tickers: List[str], specific_date: Optional[date], tz_name: str
+) -> Dict[str, pd.DataFrame]:
+    """
+    Download the history of several tickers with one multi-symbol request
+
+    Args:
+        provider: Yahoo provider making the download
+        tickers: Ticker symbols sharing the same date and exchange time zone
+        specific_date: Optional specific date; otherwise the last day at 1 minute
+        tz_name: Exchange time zone the index is converted to
+
+    Returns:
+        Dict of ticker -> DataFrame shaped like Ticker.history(); tickers that
+        came back empty are left out
+    """
+    with track_upstream(provider.name, "download"):
+        if specific_date:
+            data = provider.download(tickers, start=specific_date, end=specific_date + timedelta(days=1))
+        else:
+            data = provider.download(tickers, period="1d", interval="1m")
+
+    frames: Dict[str, pd.DataFrame] = {}
+    for ticker in tickers:
+        if isinstance(data.columns, pd.MultiIndex):
+            if ticker not in data.columns.get_level_values(0):
+                continue
+            frame = data[ticker]
+        else:
+            frame = data
+        frame = frame.dropna(how="all")
+        if frame.empty:
+            continue
+        if frame.index.tz is not None:
+            frame = frame.tz_convert(tz_name)
+        frames[ticker] = frame
+    return frames
+
+
+def _prefetch_chunks(requests: List[TickerRequest]) -> List[Tuple[List[str], Optional[date], str]]:
+    """
+    Group uncached requests into (tickers, date, country) download chunks
+
+    Only countries routed to Yahoo alone are prefetched; other providers
+    have no multi-symbol download.
+    """
+    cache = get_cache()
+    groups: Dict[Tuple[Optional[date], str], List[str]] = {}
+    for request in requests:
+        country = request.country or get_ticker_country(request.ticker)
+        if not isinstance(get_provider(country), YahooProvider):
+            continue
+        if cache.get(history_cache_key(request.ticker, request.date, country)) is not None:
+            continue
+        if request.date and get_price_store().covers(
+            request.ticker, "1d", request.date, request.date + timedelta(days=1)
+        ):
+            continue
+        tickers = groups.setdefault((request.date, country), [])
+        if request.ticker not in tickers:
+            tickers.append(request.ticker)
+
+    return [
+        (tickers[i:i + BATCH_DOWNLOAD_SIZE], specific_date, country)
+        for (specific_date, country), tickers in groups.items()
+        for i in range(0, len(tickers), BATCH_DOWNLOAD_SIZE)
+    ]
+
+
+def _prefetch_chunk(tickers: List[str], specific_date: Optional[date], country: str) -> None:
+    """
+    Download one chunk and cache each ticker's history
+
+    Failures are ignored here: tickers missing from the cache are fetched
+    one by one afterwards, which reports their errors individually.
+    """
+    tz_name = get_country_timezone(country)
+    today = datetime.now(pytz.timezone(tz_name)).date()
+    try:
+        frames = _download_histories(get_provider(country), tickers, specific_date, tz_name)
+    except Exception:
+        return
+    cache = get_cache()
+    for ticker, frame in frames.items():
+        if specific_date and specific_date < today:
+            get_price_store().write(
+                ticker, "1d", frame, specific_date, specific_date + timedelta(days=1), tz_name
+            )
+        cache.set(
+            history_cache_key(ticker, specific_date, country),
+            PriceSeries.from_frame(frame, tz_name),
+            ttl=history_ttl(specific_date, today)
+        )
+
+
+def _batch_result(request: TickerRequest, outcome: Any) -> BatchTickerResult:
+    if isinstance(outcome, BaseException):
+        return BatchTickerResult(
+            ticker=request.ticker, date=request.date, country=request.country, error=str(outcome)
+        )
+    return BatchTickerResult(
+        ticker=request.ticker,
+        date=request.date,
+        country=request.country,
+        data=apply_country_override(outcome, request.country)
+    )
+
+
+def fetch_many(requests: List[TickerRequest], include_metadata: bool = True) -> List[BatchTickerResult]:
+    """
+    Fetch historical price data for many tickers
+
+    For tickers routed to Yahoo, histories that are not cached yet are
+    downloaded with Yahoo's multi-symbol download in chunks of BATCH_DOWNLOAD_SIZE, then every ticker
+    is resolved through fetch_historical_data with at most BATCH_MAX_WORKERS
+    running at once. A failing ticker does not fail the batch.
+
+    Args:
+        requests: Tickers with optional date and country each
+        include_metadata: Whether to look up name/sector/industry/... metadata
+
+    Returns:
+        One BatchTickerResult per request, in request order, carrying either
+        the data or the error message
+    """
+    def fetch_one(request: TickerRequest) -> Any:
+        try:
+            return fetch_historical_data(
+                request.ticker, request.date, request.country, include_metadata=include_metadata
+            )
+        except Exception as exc:
+            return exc
+
+    with ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix="finance-batch") as executor:
+        list(executor.map(lambda chunk: _prefetch_chunk(*chunk), _prefetch_chunks(requests)))
+        outcomes = list(executor.map(fetch_one, requests))
+
+    return [_batch_result(request, outcome) for request, outcome in zip(requests, outcomes)]
+
+
+async def afetch_many(requests: List[TickerRequest], include_metadata: bool = True) -> List[BatchTickerResult]:
+    """
+    Async variant of fetch_many running on the shared fetch executor
+
+    Args:
+        requests: Tickers with optional date and country each
+        include_metadata: Whether to look up name/sector/industry/... metadata
+
+    Returns:
+        One BatchTickerResult per request, in request order
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_fetch_executor()
+    semaphore = asyncio.Semaphore(BATCH_MAX_WORKERS)
+
+    async def bounded(awaitable):
+        async with semaphore:
+            return await awaitable
+
+    chunks = await loop.run_in_executor(executor, _prefetch_chunks, requests)
+    await asyncio.gather(*(loop.run_in_executor(executor, _prefetch_chunk, *chunk) for chunk in chunks))
+    outcomes = await asyncio.gather(
+        *(
+            bounded(afetch_historical_data(
+                request.ticker, request.date, request.country, include_metadata=include_metadata
+            ))
+            for request in requests
+        ),
+        return_exceptions=True
+    )
+    return [_batch_result(request, outcome) for request, outcome in zip(requests, outcomes)]
@@ -0,0 +1,153 @@
+import os
+from typing import Iterator, List
+
+import numpy as np
+import pandas as pd
+
+# Media types and negotiation live in app.mediatypes, which the API imports without pandas
+from app.mediatypes import (
+    JSON_MEDIA_TYPE, NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE, ARROW_MEDIA_TYPE, ARROW_FILE_MEDIA_TYPE, PARQUET_MEDIA_TYPE,
+    STREAMING_MEDIA_TYPES, BINARY_MEDIA_TYPES, MEDIA_TYPE_ALIASES, negotiate_format
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+# Number of rows formatted per streamed chunk
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "1000"))
+
+CSV_HEADER = "date,time,open,high,low,close,volume\n"
+
+
+def _iter_row_chunks(frame: pd.DataFrame, chunk_rows: int) -> Iterator[zip]:
+    """
+    Yield the rows of a price DataFrame chunk by chunk as plain Python values
+
+    Only one chunk is converted to Python objects at a time, so memory use
+    does not grow with the length of the series.
+    """
+    if frame.empty:
+        return
+    frame = frame.dropna(subset=["Close"])
+    for start in range(0, len(frame), chunk_rows):
+        part = frame.iloc[start:start + chunk_rows]
+        index = part.index
+        yield zip(
+            index.date,
+            index.time,
+            part["Open"].to_numpy(dtype=np.float64).tolist(),
+            part["High"].to_numpy(dtype=np.float64).tolist(),
+            part["Low"].to_numpy(dtype=np.float64).tolist(),
+            part["Close"].to_numpy(dtype=np.float64).tolist(),
+            part["Volume"].fillna(0).to_numpy().astype(np.int64).tolist(),
+        )
+
+
+def iter_ndjson(frame: pd.DataFrame, chunk_rows: int = STREAM_CHUNK_ROWS) -> Iterator[str]:
+    """
+    Stream a price DataFrame as newline-delimited JSON, one price per line
+
+    Each line has the same fields as HistoricalPrice.
+    """
+    for rows in _iter_row_chunks(frame, chunk_rows):
+        lines: List[str] = [
+            f'{{"date":"{d}","time":"{t}","open":{o!r},"high":{h!r},'
+            f'"low":{l!r},"close":{c!r},"volume":{v}}}\n'
+            for d, t, o, h, l, c, v in rows
+        ]
+        yield "".join(lines)
+
+
+def iter_csv(frame: pd.DataFrame, chunk_rows: int = STREAM_CHUNK_ROWS) -> Iterator[str]:
+    """
+    Stream a price DataFrame as CSV with a header row
+    """
+    yield CSV_HEADER
+    for rows in _iter_row_chunks(frame, chunk_rows):
+        yield "".join([f"{d},{t},{o!r},{h!r},{l!r},{c!r},{v}\n" for d, t, o, h, l, c, v in rows])
+
+
+def stream_frame(frame: pd.DataFrame, media_type: str) -> Iterator[str]:
+    """
+    Return the chunk generator for a streaming media type
+    """
+    if media_type == CSV_MEDIA_TYPE:
+        return iter_csv(frame)
+    return iter_ndjson(frame)
+
+
+def frame_to_table(frame: pd.DataFrame) -> "pa.Table":
+    """
+    Convert a price DataFrame to an Arrow table without going through HistoricalPrice
+
+    The table has a tz-aware `timestamp` column in the exchange time zone
+    followed by open/high/low/close (float64) and volume (int64).
+    """
+    if frame.empty:
+        index = pd.DatetimeIndex([], tz="UTC")
+    else:
+        frame = frame.dropna(subset=["Close"])
+        index = frame.index if frame.index.tz is not None else frame.index.tz_localize("UTC")
+
+    def column(name, dtype):
+        if name not in frame:
+            return np.array([], dtype=dtype)
+        values = frame[name]
+        if dtype == np.int64:
+            values = values.fillna(0)
+        return values.to_numpy().astype(dtype)
+
+    return pa.table({
+        "timestamp": pa.array(index, type=pa.timestamp("s", tz=str(index.tz))),
+        "open": column("Open", np.float64),
+        "high": column("High", np.float64),
+        "low": column("Low", np.float64),
+        "close": column("Close", np.float64),
+        "volume": column("Volume", np.int64),
+    })
+
+
+def encode_arrow(frame: pd.DataFrame) -> bytes:
+    """
+    Serialize a price DataFrame as an Arrow IPC stream
+    """
+    table = frame_to_table(frame)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_arrow_file(frame: pd.DataFrame) -> bytes:
+    """
+    Serialize a price DataFrame in the Arrow IPC file format (Feather v2)
+    """
+    table = frame_to_table(frame)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_parquet(frame: pd.DataFrame) -> bytes:
+    """
+    Serialize a price DataFrame as a Parquet file
+    """
+    sink = pa.BufferOutputStream()
+    pq.write_table(frame_to_table(frame), sink, compression="zstd")
+    return sink.getvalue().to_pybytes()
+
+
+def encode_frame(frame: pd.DataFrame, media_type: str) -> bytes:
+    """
+    Serialize a price DataFrame in one of the columnar binary formats
+    """
+    if media_type == PARQUET_MEDIA_TYPE:
+        return encode_parquet(frame)
+    if media_type == ARROW_FILE_MEDIA_TYPE:
+        return encode_arrow_file(frame)
+    return encode_arrow(frame)
@@ -0,0 +1,421 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from functools import partial
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from pydantic import TypeAdapter
+
+from app.finance import (
+    DEFAULT_LATEST_INTERVAL, DEFAULT_RANGE_INTERVAL, fetch_history_frame, get_fetch_executor, get_ticker_country,
+    request_flights
+)
+from app.models import BAR_SECONDS, IndicatorResponse, IndicatorValue
+from app.resample import local_seconds
+
+# Bars kept across all indicator states before the least recently used series is
+# dropped; each bar holds the ten COLUMNS below, 80 bytes
+INDICATOR_MAX_BARS = int(os.getenv("INDICATOR_MAX_BARS", "1000000"))
+
+# Per-bar arrays an IndicatorState keeps; everything returned is derived from them
+COLUMNS = ("ts", "close", "session", "sma", "std", "ema", "avg_gain", "avg_loss", "cum_pv", "cum_volume")
+
+# Inputs up to this length are smoothed in a Python loop instead of pandas' ewm
+SMOOTH_LOOP_MAX = 32
+
+_value_list_adapter = TypeAdapter(List[IndicatorValue])
+
+
+def rolling_mean_std(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean and population standard deviation of each trailing window
+
+    Positions with fewer than `window` values up to them are NaN.
+    """
+    mean = np.full(len(values), np.nan)
+    std = np.full(len(values), np.nan)
+    if len(values) >= window:
+        windows = sliding_window_view(values, window)
+        mean[window - 1:] = windows.mean(axis=1)
+        std[window - 1:] = windows.std(axis=1)
+    return mean, std
+
+
+def smooth(values: np.ndarray, alpha: float, seed: float) -> np.ndarray:
+    """
+    Exponential smoothing y[i] = y[i-1] + alpha * (x[i] - y[i-1]), continuing from y[-1] = seed
+    """
+    if len(values) <= SMOOTH_LOOP_MAX:
+        # The few bars of an update: a loop is cheaper than setting up ewm
+        result = np.empty(len(values))
+        level = seed
+        for i, value in enumerate(values.tolist()):
+            level += alpha * (value - level)
+            result[i] = level
+        return result
+    # The recursion runs in pandas' compiled ewm; the seed is its first value
+    return pd.Series(np.concatenate(([seed], values))).ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+
+def seeded_smooth(values: np.ndarray, alpha: float, period: int) -> np.ndarray:
+    """
+    Exponential smoothing seeded with the mean of the first `period` values
+
+    The first `period - 1` positions are NaN.
+    """
+    result = np.full(len(values), np.nan)
+    if len(values) >= period:
+        result[period - 1] = values[:period].mean()
+        result[period:] = smooth(values[period:], alpha, result[period - 1])
+    return result
+
+
+def session_sums(values: np.ndarray, session: np.ndarray, seed: float = 0.0) -> np.ndarray:
+    """
+    Running sums of `values` that restart at every change of `session`
+
+    `seed` is added to the run of the first session, to continue a sum
+    from earlier bars of the same session.
+    """
+    if not len(values):
+        return np.empty(0)
+    sums = np.cumsum(values)
+    changes = np.concatenate(([True], session[1:] != session[:-1]))
+    starts = np.flatnonzero(changes)
+    runs = np.cumsum(changes) - 1
+    sums -= (sums - values)[starts][runs]
+    sums[runs == 0] += seed
+    return sums
+
+
+class IndicatorState:
+    """
+    SMA, EMA, RSI, VWAP and Bollinger bands of one bar series
+
+    The values of every bar are kept in NumPy arrays along with what the
+    recursive indicators need to continue: the EMA, Wilder's average gain
+    and loss for the RSI, and the session's running price x volume and
+    volume sums for the VWAP. When a later fetch of the same series
+    arrives, only the bars after the last settled one are computed (the
+    last bar is recomputed, as it may still have been running), each
+    kernel seeded from the stored values and, for the rolling windows, the
+    preceding `window - 1` closes. A series that no longer lines up with
+    the stored bars, e.g. a new session, is computed from scratch.
+
+    RSI and EMA are seeded with the simple mean of their first period. VWAP
+    restarts at each exchange-local day for intraday bars and is anchored
+    at the first bar for daily bars.
+    """
+
+    def __init__(self, window: int = 20, rsi_period: int = 14, intraday: bool = True):
+        self.window = window
+        self.rsi_period = rsi_period
+        self.intraday = intraday
+        self.tz = "UTC"
+        self.arrays: Dict[str, np.ndarray] = {
+            name: np.empty(0, dtype=np.int64 if name in ("ts", "session") else np.float64) for name in COLUMNS
+        }
+        self._lock = threading.Lock()
+        self.computed = 0
+        self.recomputed = 0
+
+    def __len__(self) -> int:
+        return len(self.arrays["ts"])
+
+    def update(self, frame: pd.DataFrame) -> int:
+        """
+        Bring the values up to date with a fetch of the series
+
+        Args:
+            frame: DataFrame with Open/High/Low/Close/Volume columns and a
+                tz-aware DatetimeIndex, sorted by time
+
+        Returns:
+            Number of bars computed
+        """
+        valid = frame["Close"].notna().to_numpy()
+        if not valid.all():
+            frame = frame[valid]
+        stamps = frame.index.as_unit("s").asi8
+        with self._lock:
+            if len(frame):
+                self.tz = str(frame.index.tz)
+            ts = self.arrays["ts"]
+            settled = len(ts) - 1
+            # Continue after the settled bars when the fetch starts with them
+            # and every seed is past its warm-up
+            if (
+                settled > max(self.window, self.rsi_period + 1)
+                and len(stamps) > settled
+                and stamps[0] == ts[0]
+                and stamps[settled - 1] == ts[settled - 1]
+            ):
+                first = settled
+            else:
+                first = 0
+                self.recomputed += 1
+            new = self._compute(frame.iloc[first:], stamps[first:], first)
+            self.arrays = {name: np.concatenate((self.arrays[name][:first], new[name])) for name in COLUMNS}
+            self.computed += len(frame) - first
+            return len(frame) - first
+
+    def _compute(self, frame: pd.DataFrame, stamps: np.ndarray, first: int) -> Dict[str, np.ndarray]:
+        """Indicator arrays of `frame`, the bars from position `first` on"""
+        held = self.arrays
+        close = frame["Close"].to_numpy(dtype=np.float64)
+        high = frame["High"].to_numpy(dtype=np.float64)
+        low = frame["Low"].to_numpy(dtype=np.float64)
+        volume = frame["Volume"].fillna(0).to_numpy(dtype=np.float64)
+
+        # Rolling windows reach back over the `window - 1` closes before the new bars
+        context = held["close"][max(0, first - self.window + 1):first]
+        sma, std = rolling_mean_std(np.concatenate((context, close)), self.window)
+
+        ema_alpha = 2.0 / (self.window + 1)
+        rsi_alpha = 1.0 / self.rsi_period
+        previous = held["close"][first - 1] if first else (close[0] if len(close) else 0.0)
+        delta = np.diff(close, prepend=previous)
+        gain = np.clip(delta, 0, None)
+        loss = np.clip(-delta, 0, None)
+        if first:
+            ema = smooth(close, ema_alpha, held["ema"][first - 1])
+            avg_gain = smooth(gain, rsi_alpha, held["avg_gain"][first - 1])
+            avg_loss = smooth(loss, rsi_alpha, held["avg_loss"][first - 1])
+        else:
+            ema = seeded_smooth(close, ema_alpha, self.window)
+            # The first bar has no change; averages start from the second
+            avg_gain = np.concatenate(([np.nan], seeded_smooth(gain[1:], rsi_alpha, self.rsi_period)))[:len(close)]
+            avg_loss = np.concatenate(([np.nan], seeded_smooth(loss[1:], rsi_alpha, self.rsi_period)))[:len(close)]
+
+        if self.intraday and len(frame):
+            session = local_seconds(frame.index) // 86400
+        else:
+            session = np.zeros(len(frame), dtype=np.int64)
+        continues = bool(first) and len(session) and session[0] == held["session"][first - 1]
+        pv = (high + low + close) / 3 * volume
+        cum_pv = session_sums(pv, session, held["cum_pv"][first - 1] if continues else 0.0)
+        cum_volume = session_sums(volume, session, held["cum_volume"][first - 1] if continues else 0.0)
+
+        return {
+            "ts": stamps,
+            "close": close,
+            "session": session,
+            "sma": sma[len(context):],
+            "std": std[len(context):],
+            "ema": ema,
+            "avg_gain": avg_gain,
+            "avg_loss": avg_loss,
+            "cum_pv": cum_pv,
+            "cum_volume": cum_volume,
+        }
+
+    def to_frame(self, since: Optional[datetime] = None, bollinger_std: float = 2.0) -> pd.DataFrame:
+        """
+        Indicator values as a DataFrame, from `since` on (naive times are in the exchange time zone)
+
+        Columns are Close, SMA, EMA, RSI, VWAP, BollingerUpper and
+        BollingerLower, the bands `bollinger_std` standard deviations
+        around the SMA; values still warming up are NaN.
+        """
+        with self._lock:
+            arrays = self.arrays
+            tz = self.tz
+        first = 0
+        if since is not None:
+            stamp = pd.Timestamp(since)
+            stamp = stamp.tz_localize(tz) if stamp.tzinfo is None else stamp
+            first = int(np.searchsorted(arrays["ts"], int(stamp.timestamp()), side="left"))
+        a = {name: values[first:] for name, values in arrays.items()}
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(a["avg_loss"] == 0, 100.0, 100.0 - 100.0 / (1.0 + a["avg_gain"] / a["avg_loss"]))
+            vwap = np.where(a["cum_volume"] > 0, a["cum_pv"] / a["cum_volume"], np.nan)
+        return pd.DataFrame(
+            {
+                "Close": a["close"],
+                "SMA": a["sma"],
+                "EMA": a["ema"],
+                "RSI": np.where(np.isnan(a["avg_gain"]), np.nan, rsi),
+                "VWAP": vwap,
+                "BollingerUpper": a["sma"] + bollinger_std * a["std"],
+                "BollingerLower": a["sma"] - bollinger_std * a["std"],
+            },
+            index=pd.to_datetime(a["ts"], unit="s", utc=True).tz_convert(tz)
+        )
+
+
+class IndicatorStates:
+    """
+    Indicator states by series and parameters, least recently used dropped first
+
+    The bound is on the bars stored across all states rather than on their
+    number, since a single series of a long range at a short interval
+    holds as much as thousands of short ones.
+    """
+
+    def __init__(self, max_bars: int = INDICATOR_MAX_BARS):
+        self.max_bars = max_bars
+        self._states: "OrderedDict[Hashable, IndicatorState]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._bars = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def update(self, key: Hashable, factory: Callable[[], IndicatorState], frame: pd.DataFrame) -> IndicatorState:
+        """
+        Bring the state under `key` (made by `factory` if missing) up to date with `frame`
+
+        Least recently used states are dropped once the bars stored exceed
+        `max_bars`; the state just updated is kept even if it alone does.
+        """
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = factory()
+            else:
+                self._states.move_to_end(key)
+        state.update(frame)
+        size = len(state)
+        with self._lock:
+            if self._states.get(key) is state:
+                self._bars += size - self._sizes.get(key, 0)
+                self._sizes[key] = size
+            while self._bars > self.max_bars and len(self._states) > 1 and next(iter(self._states)) != key:
+                evicted, _ = self._states.popitem(last=False)
+                self._bars -= self._sizes.pop(evicted, 0)
+                self.evictions += 1
+        return state
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+            self._sizes.clear()
+            self._bars = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            states = list(self._states.values())
+            bars = self._bars
+            evictions = self.evictions
+        return {
+            "series": len(states),
+            "bars": bars,
+            "computed": sum(state.computed for state in states),
+            "recomputed": sum(state.recomputed for state in states),
+            "evictions": evictions,
+        }
+
+
+_indicator_states: Optional[IndicatorStates] = None
+_indicator_states_lock = threading.Lock()
+
+
+def get_indicator_states() -> IndicatorStates:
+    """
+    Return the process-wide indicator states
+    """
+    global _indicator_states
+    if _indicator_states is None:
+        with _indicator_states_lock:
+            if _indicator_states is None:
+                _indicator_states = IndicatorStates()
+    return _indicator_states
+
+
+def frame_to_indicators(values: pd.DataFrame) -> List[IndicatorValue]:
+    """
+    Convert an IndicatorState.to_frame() DataFrame to IndicatorValue objects, NaN as None
+    """
+    if values.empty:
+        return []
+    columns = []
+    for name in ("Close", "SMA", "EMA", "RSI", "VWAP", "BollingerUpper", "BollingerLower"):
+        column = values[name].to_numpy(dtype=np.float64)
+        converted = column.astype(object)
+        converted[np.isnan(column)] = None
+        columns.append(converted.tolist())
+    index = values.index
+    return _value_list_adapter.validate_python([
+        {
+            "date": d, "time": t, "close": c, "sma": sma, "ema": ema, "rsi": rsi, "vwap": vwap,
+            "bollinger_upper": upper, "bollinger_lower": lower,
+        }
+        for d, t, c, sma, ema, rsi, vwap, upper, lower in zip(index.date, index.time, *columns)
+    ])
+
+
+def fetch_indicators(
+    ticker: str,
+    country: Optional[str] = None,
+    specific_date: Optional[date] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    interval: Optional[str] = None,
+    resample: Optional[str] = None,
+    since: Optional[datetime] = None,
+    window: int = 20,
+    rsi_period: int = 14,
+    bollinger_std: float = 2.0
+) -> IndicatorResponse:
+    """
+    Compute technical indicators over the price history of a ticker
+
+    The bars come from fetch_history_frame (and so from the cache and the
+    price store); the indicator state of the series is kept between calls
+    so a refetch with new bars only computes those.
+
+    Args:
+        ticker: The ticker symbol
+        country: Optional country override
+        specific_date: Optional specific date to fetch data for
+        start: Optional first date of a range
+        end: Optional last date of a range (inclusive, defaults to today)
+        interval: Optional bar interval, e.g. "1d" or "5m"
+        resample: Optional bar size to aggregate the bars into, e.g. "15m"
+        since: Optional cursor; only values from then on are returned
+        window: Bars in the SMA, EMA and Bollinger band windows
+        rsi_period: Bars in the RSI period
+        bollinger_std: Width of the Bollinger bands in standard deviations
+
+    Returns:
+        IndicatorResponse with one entry per bar
+    """
+    country = country or get_ticker_country(ticker)
+    interval = interval or (DEFAULT_RANGE_INTERVAL if (specific_date or start) else DEFAULT_LATEST_INTERVAL)
+    frame = fetch_history_frame(
+        ticker, country, specific_date, start=start, end=end, interval=interval, resample=resample
+    )
+    bar = resample or interval
+    state = get_indicator_states().update(
+        (ticker, country, specific_date, start, end, interval, resample, window, rsi_period),
+        lambda: IndicatorState(window, rsi_period, intraday=BAR_SECONDS.get(bar, 86400) < 86400),
+        frame
+    )
+    return IndicatorResponse(
+        ticker=ticker,
+        country=country,
+        interval=bar,
+        parameters={"window": window, "rsi_period": rsi_period, "bollinger_std": bollinger_std},
+        values=frame_to_indicators(state.to_frame(since, bollinger_std))
+    )
+
+
+async def afetch_indicators(ticker: str, *args, **kwargs) -> IndicatorResponse:
+    """
+    Compute technical indicators without blocking the event loop; see fetch_indicators
+
+    Concurrent identical calls share a single computation.
+    """
+    loop = asyncio.get_running_loop()
+    return await request_flights.ado(
+        ("indicators", ticker, args, tuple(sorted(kwargs.items()))),
+        loop.run_in_executor,
+        get_fetch_executor(),
+        partial(fetch_indicators, ticker, *args, **kwargs)
+    )
@@ -0,0 +1,200 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Intraday buffer settings: bars kept per symbol (a 24 hour session of
+# 1 minute bars) and symbols kept before the least recently used is dropped
+INTRADAY_BUFFER_BARS = int(os.getenv("INTRADAY_BUFFER_BARS", "1440"))
+INTRADAY_MAX_TICKERS = int(os.getenv("INTRADAY_MAX_TICKERS", "1024"))
+
+# (ticker, country, interval)
+BufferKey = Tuple[str, str, str]
+
+
+class IntradayBuffer:
+    """
+    Ring buffer of the current session's bars of one symbol
+
+    Timestamps (epoch seconds), OHLC and volume live in preallocated NumPy
+    arrays. Each fetch of the session is merged in by appending only the
+    bars after the last one held (the last bar itself is overwritten, as it
+    is still changing), so reading the bars since a cursor costs a binary
+    search plus a copy of the new bars, not a pass over the whole day. A new
+    session date clears the buffer; past `capacity` bars the oldest are
+    overwritten.
+    """
+
+    def __init__(self, capacity: int = INTRADAY_BUFFER_BARS):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity, dtype=np.int64)
+        self.ohlc = np.zeros((capacity, 4), dtype=np.float64)
+        self.volume = np.zeros(capacity, dtype=np.int64)
+        self.start = 0
+        self.size = 0
+        self.tz: Optional[str] = None
+        self.session: Optional[date] = None
+        self._lock = threading.Lock()
+        self.appended = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _slots(self, first: int, last: int) -> np.ndarray:
+        """Physical slots of the logical positions [first, last)"""
+        return (self.start + np.arange(first, last)) % self.capacity
+
+    def _position(self, ts: int) -> int:
+        """Logical position of the first bar at or after `ts`"""
+        head = self.ts[self.start:min(self.start + self.size, self.capacity)]
+        position = int(np.searchsorted(head, ts, side="left"))
+        if position < len(head):
+            return position
+        tail = self.ts[:self.size - len(head)]
+        return len(head) + int(np.searchsorted(tail, ts, side="left"))
+
+    def merge(self, frame: pd.DataFrame) -> int:
+        """
+        Add the bars of a session fetch that the buffer does not have yet
+
+        Args:
+            frame: DataFrame with Open/High/Low/Close/Volume columns and a
+                tz-aware DatetimeIndex, sorted by time
+
+        Returns:
+            Number of bars appended
+        """
+        if frame.empty:
+            return 0
+        index = frame.index
+        stamps = index.as_unit("s").asi8
+        session = index[-1].date()
+
+        with self._lock:
+            if session != self.session:
+                self.start = self.size = 0
+                self.session = session
+                self.tz = str(index.tz)
+            last_slot = (self.start + self.size - 1) % self.capacity
+            # Only the bars from the last one held on are looked at
+            first = int(np.searchsorted(stamps, self.ts[last_slot], side="left")) if self.size else 0
+            tail = frame.iloc[first:]
+            stamps = stamps[first:]
+            valid = tail["Close"].notna().to_numpy()
+            if not valid.all():
+                tail, stamps = tail[valid], stamps[valid]
+            ohlc = tail[["Open", "High", "Low", "Close"]].to_numpy(dtype=np.float64)
+            volume = tail["Volume"].fillna(0).to_numpy().astype(np.int64)
+
+            if self.size and len(stamps) and stamps[0] == self.ts[last_slot]:
+                # The running bar: replace it in place
+                self.ohlc[last_slot] = ohlc[0]
+                self.volume[last_slot] = volume[0]
+                stamps, ohlc, volume = stamps[1:], ohlc[1:], volume[1:]
+            count = len(stamps)
+            if count == 0:
+                return 0
+            if count > self.capacity:
+                stamps, ohlc, volume = stamps[-self.capacity:], ohlc[-self.capacity:], volume[-self.capacity:]
+                count = self.capacity
+            overflow = max(0, self.size + count - self.capacity)
+            slots = self._slots(self.size, self.size + count)
+            self.ts[slots] = stamps
+            self.ohlc[slots] = ohlc
+            self.volume[slots] = volume
+            self.start = (self.start + overflow) % self.capacity
+            self.size += count - overflow
+            self.appended += count
+            return count
+
+    def since(self, cursor: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Bars from `cursor` on (all bars without one) as a DataFrame
+
+        The bar at the cursor itself is included, since it may still have
+        changed. A naive cursor is in the exchange time zone.
+        """
+        with self._lock:
+            tz = self.tz or "UTC"
+            first = 0
+            if cursor is not None and self.size:
+                stamp = pd.Timestamp(cursor)
+                stamp = stamp.tz_localize(tz) if stamp.tzinfo is None else stamp
+                first = self._position(int(stamp.timestamp()))
+            slots = self._slots(first, self.size)
+            ts = self.ts[slots]
+            ohlc = self.ohlc[slots]
+            volume = self.volume[slots]
+
+        return pd.DataFrame(
+            {
+                "Open": ohlc[:, 0],
+                "High": ohlc[:, 1],
+                "Low": ohlc[:, 2],
+                "Close": ohlc[:, 3],
+                "Volume": volume,
+            },
+            index=pd.to_datetime(ts, unit="s", utc=True).tz_convert(tz)
+        )
+
+
+class IntradayBuffers:
+    """
+    Intraday buffers by (ticker, country, interval), least recently used dropped first
+    """
+
+    def __init__(self, max_tickers: int = INTRADAY_MAX_TICKERS, capacity: int = INTRADAY_BUFFER_BARS):
+        self.max_tickers = max_tickers
+        self.capacity = capacity
+        self._buffers: "OrderedDict[BufferKey, IntradayBuffer]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, ticker: str, country: str, interval: str) -> IntradayBuffer:
+        key = (ticker, country, interval)
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = IntradayBuffer(self.capacity)
+                while len(self._buffers) > self.max_tickers:
+                    self._buffers.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._buffers.move_to_end(key)
+            return buffer
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffers.clear()
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            buffers = list(self._buffers.values())
+            evictions = self.evictions
+        return {
+            "tickers": len(buffers),
+            "bars": sum(len(buffer) for buffer in buffers),
+            "appended": sum(buffer.appended for buffer in buffers),
+            "evictions": evictions,
+        }
+
+
+_intraday_buffers: Optional[IntradayBuffers] = None
+_intraday_buffers_lock = threading.Lock()
+
+
+def get_intraday_buffers() -> IntradayBuffers:
+    """
+    Return the process-wide intraday buffers
+    """
+    global _intraday_buffers
+    if _intraday_buffers is None:
+        with _intraday_buffers_lock:
+            if _intraday_buffers is None:
+                _intraday_buffers = IntradayBuffers()
+    return _intraday_buffers
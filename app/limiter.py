@@ -0,0 +1,239 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Upstream limiter settings
+UPSTREAM_RATE = float(os.getenv("UPSTREAM_RATE", "10"))
+UPSTREAM_BURST = int(os.getenv("UPSTREAM_BURST", "20"))
+UPSTREAM_MIN_CONCURRENCY = int(os.getenv("UPSTREAM_MIN_CONCURRENCY", "1"))
+UPSTREAM_INITIAL_CONCURRENCY = int(os.getenv("UPSTREAM_INITIAL_CONCURRENCY", "4"))
+UPSTREAM_MAX_CONCURRENCY = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "16"))
+# Calls slower than this count as congestion, like errors
+UPSTREAM_LATENCY_TARGET = float(os.getenv("UPSTREAM_LATENCY_TARGET", "2.0"))
+# Longest a call may queue for a slot and a token before it is rejected
+UPSTREAM_MAX_WAIT = float(os.getenv("UPSTREAM_MAX_WAIT", "10"))
+
+
+class UpstreamBusyError(Exception):
+    """Raised when an upstream call could not start within the maximum wait"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TickerNotFoundError(Exception):
+    """
+    Raised when upstream does not know a symbol
+
+    Upstream answered, so this is the client's error: the limiter and the
+    circuit breaker count the call as a success.
+    """
+
+    def __init__(self, ticker: str):
+        super().__init__(f"Unknown ticker: {ticker}")
+        self.ticker = ticker
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the rate of upstream calls
+
+    A caller reserves a token immediately (the balance may go negative) and
+    then sleeps until its token is due, so waiters are served in order.
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, timeout: float) -> Optional[float]:
+        """
+        Reserve a token
+
+        Returns:
+            Seconds to wait before the token may be used, or None if that
+            would take longer than `timeout` (nothing is reserved then)
+        """
+        with self._lock:
+            self._refill(self.clock())
+            wait = max(0.0, (1 - self.tokens) / self.rate)
+            if wait > timeout:
+                return None
+            self.tokens -= 1
+            return wait
+
+    def acquire(self, timeout: float) -> bool:
+        wait = self.reserve(timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill(self.clock())
+            return self.tokens
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limit that adapts to upstream health with AIMD
+
+    Every call that succeeds within the latency target raises the limit by
+    1/limit (about +1 per limit's worth of calls); an error or a slow call
+    multiplies it by `backoff`. Callers over the limit queue until a slot
+    frees up or their timeout passes.
+    """
+
+    def __init__(
+        self,
+        initial: int = UPSTREAM_INITIAL_CONCURRENCY,
+        min_limit: int = UPSTREAM_MIN_CONCURRENCY,
+        max_limit: int = UPSTREAM_MAX_CONCURRENCY,
+        latency_target: float = UPSTREAM_LATENCY_TARGET,
+        backoff: float = 0.5
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.in_flight = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self.waiting += 1
+            try:
+                while self.in_flight >= int(self.limit):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self, latency: Optional[float] = None, ok: bool = True) -> None:
+        """
+        Free a slot and adjust the limit
+
+        Args:
+            latency: Duration of the call, or None if no call was made
+            ok: Whether the call succeeded
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if latency is not None:
+                if ok and latency <= self.latency_target:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                else:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+            self._cond.notify_all()
+
+
+class UpstreamLimiter:
+    """
+    Rate and adaptive concurrency limit for every call to the upstream provider
+    """
+
+    def __init__(
+        self,
+        rate: float = UPSTREAM_RATE,
+        burst: int = UPSTREAM_BURST,
+        max_wait: float = UPSTREAM_MAX_WAIT,
+        concurrency: Optional[AdaptiveConcurrencyLimiter] = None
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = concurrency or AdaptiveConcurrencyLimiter()
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+
+    def _reject(self, reason: str) -> UpstreamBusyError:
+        with self._lock:
+            self.rejected += 1
+        return UpstreamBusyError(f"Upstream is busy: {reason}", retry_after=self.max_wait)
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run `fn` once a concurrency slot and a rate token are available
+
+        Raises:
+            UpstreamBusyError: If the call could not start within max_wait
+        """
+        started = time.monotonic()
+        if not self.concurrency.acquire(self.max_wait):
+            raise self._reject("concurrency limit reached")
+        remaining = self.max_wait - (time.monotonic() - started)
+        if not self.bucket.acquire(max(0.0, remaining)):
+            self.concurrency.release()
+            raise self._reject("rate limit reached")
+
+        call_started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except UpstreamBusyError:
+            # Rejected further down (e.g. by the circuit breaker) without reaching upstream
+            self.concurrency.release()
+            raise
+        except TickerNotFoundError:
+            self.concurrency.release(time.monotonic() - call_started, ok=True)
+            with self._lock:
+                self.calls += 1
+            raise
+        except Exception:
+            self.concurrency.release(time.monotonic() - call_started, ok=False)
+            with self._lock:
+                self.calls += 1
+                self.errors += 1
+            raise
+        self.concurrency.release(time.monotonic() - call_started, ok=True)
+        with self._lock:
+            self.calls += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls, errors, rejected = self.calls, self.errors, self.rejected
+        return {
+            "limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "queued": self.concurrency.waiting,
+            "tokens": round(self.bucket.available(), 2),
+            "calls": calls,
+            "errors": errors,
+            "rejected": rejected,
+        }
+
+
+_upstream_limiter: Optional[UpstreamLimiter] = None
+_upstream_limiter_lock = threading.Lock()
+
+
+def get_upstream_limiter() -> UpstreamLimiter:
+    """
+    Return the process-wide upstream limiter
+    """
+    global _upstream_limiter
+    if _upstream_limiter is None:
+        with _upstream_limiter_lock:
+            if _upstream_limiter is None:
+                _upstream_limiter = UpstreamLimiter()
+    return _upstream_limiter
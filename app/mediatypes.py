@@ -0,0 +1,58 @@
+from importlib.util import find_spec
+from typing import Optional
+
+# Response media types
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_FILE_MEDIA_TYPE = "application/vnd.apache.arrow.file"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+STREAMING_MEDIA_TYPES = (NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE)
+# Columnar formats need pyarrow (pip install "finance-collector[arrow]")
+BINARY_MEDIA_TYPES = (
+    (ARROW_MEDIA_TYPE, ARROW_FILE_MEDIA_TYPE, PARQUET_MEDIA_TYPE) if find_spec("pyarrow") is not None else ()
+)
+MEDIA_TYPE_ALIASES = {
+    "application/x-parquet": PARQUET_MEDIA_TYPE,
+}
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """
+    Pick the response media type for an Accept header
+
+    The highest-quality supported type wins; wildcards and unknown types
+    fall back to JSON. Arrow and Parquet are only offered when pyarrow is
+    installed.
+
+    Args:
+        accept: Value of the Accept request header
+
+    Returns:
+        JSON_MEDIA_TYPE or one of STREAMING_MEDIA_TYPES / BINARY_MEDIA_TYPES
+    """
+    if not accept:
+        return JSON_MEDIA_TYPE
+
+    candidates = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        media_type = media_type.lower()
+        candidates.append((-quality, position, MEDIA_TYPE_ALIASES.get(media_type, media_type)))
+
+    for negative_quality, _, media_type in sorted(candidates):
+        if negative_quality == 0:
+            break
+        if media_type == JSON_MEDIA_TYPE or media_type in STREAMING_MEDIA_TYPES + BINARY_MEDIA_TYPES:
+            return media_type
+        if media_type in ("*/*", "application/*"):
+            return JSON_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
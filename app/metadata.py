@@ -0,0 +1,198 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Metadata store settings
+FINANCE_DATA_DIR = os.getenv("FINANCE_DATA_DIR", "data")
+METADATA_DB_PATH = os.getenv("METADATA_DB_PATH", os.path.join(FINANCE_DATA_DIR, "metadata.sqlite3"))
+METADATA_REFRESH_SECONDS = float(os.getenv("METADATA_REFRESH_SECONDS", "86400"))
+# Fraction of the refresh interval after which a background refresh starts
+METADATA_REFRESH_AHEAD = float(os.getenv("METADATA_REFRESH_AHEAD", "0.8"))
+
+# Fields of yfinance's Ticker.info that are kept for TickerResponse.metadata
+METADATA_FIELDS = ("shortName", "sector", "industry", "currency", "exchange")
+
+# Entry: (info, fetched_at)
+Entry = Tuple[Dict[str, Any], float]
+
+
+class MetadataStore:
+    """
+    Long-lived ticker metadata kept in memory and persisted to SQLite
+
+    Entries younger than `refresh_ahead * refresh_seconds` are served as is.
+    Older entries are still served, but a background refresh is started so
+    the next request sees fresh data. Entries older than `refresh_seconds`
+    are reloaded before being returned, falling back to the old value if the
+    reload fails.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = METADATA_DB_PATH,
+        refresh_seconds: float = METADATA_REFRESH_SECONDS,
+        refresh_ahead: float = METADATA_REFRESH_AHEAD
+    ):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self.refresh_ahead = refresh_ahead
+        self._entries: Dict[str, Entry] = {}
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="metadata-refresh")
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        if self.path:
+            with self._connection() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS metadata ("
+                    "ticker TEXT PRIMARY KEY, info TEXT NOT NULL, fetched_at REAL NOT NULL)"
+                )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _lookup(self, ticker: str) -> Optional[Entry]:
+        with self._lock:
+            entry = self._entries.get(ticker)
+        if entry is None and self.path:
+            row = self._connection().execute(
+                "SELECT info, fetched_at FROM metadata WHERE ticker = ?", (ticker,)
+            ).fetchone()
+            if row is not None:
+                entry = (json.loads(row[0]), row[1])
+                with self._lock:
+                    self._entries[ticker] = entry
+        return entry
+
+    def put(self, ticker: str, info: Dict[str, Any], fetched_at: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Store the metadata fields of a Ticker.info dict and return them
+        """
+        trimmed = {field: info[field] for field in METADATA_FIELDS if field in info}
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock:
+            self._entries[ticker] = (trimmed, fetched_at)
+        if self.path:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO metadata (ticker, info, fetched_at) VALUES (?, ?, ?)",
+                    (ticker, json.dumps(trimmed), fetched_at)
+                )
+        return trimmed
+
+    def get(self, ticker: str, loader: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return metadata for a ticker, calling `loader` only when needed
+
+        Args:
+            ticker: The ticker symbol
+            loader: Function fetching the full Ticker.info dict upstream
+
+        Returns:
+            Dict with the fields listed in METADATA_FIELDS
+        """
+        entry = self._lookup(ticker)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return self.put(ticker, loader(ticker))
+
+        info, fetched_at = entry
+        age = time.time() - fetched_at
+        with self._lock:
+            self.hits += 1
+
+        if age >= self.refresh_seconds:
+            try:
+                return self._refresh(ticker, loader)
+            except Exception:
+                # Serve the outdated entry rather than failing the request
+                return info
+        if age >= self.refresh_seconds * self.refresh_ahead:
+            self.refresh_in_background(ticker, loader)
+        return info
+
+    def _refresh(self, ticker: str, loader: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            info = self.put(ticker, loader(ticker))
+        except Exception:
+            with self._lock:
+                self.refresh_errors += 1
+            raise
+        with self._lock:
+            self.refreshes += 1
+        return info
+
+    def refresh_in_background(self, ticker: str, loader: Callable[[str], Dict[str, Any]]) -> bool:
+        """
+        Schedule a refresh unless one is already running for the ticker
+        """
+        with self._lock:
+            if ticker in self._refreshing:
+                return False
+            self._refreshing.add(ticker)
+
+        def run():
+            try:
+                self._refresh(ticker, loader)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(ticker)
+
+        self._refresher.submit(run)
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.refreshes = self.refresh_errors = 0
+        if self.path:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM metadata")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "refreshing": len(self._refreshing),
+            }
+
+
+_metadata_store: Optional[MetadataStore] = None
+_metadata_store_lock = threading.Lock()
+
+
+def get_metadata_store() -> MetadataStore:
+    """
+    Return the process-wide ticker metadata store
+    """
+    global _metadata_store
+    if _metadata_store is None:
+        with _metadata_store_lock:
+            if _metadata_store is None:
+                _metadata_store = MetadataStore()
+    return _metadata_store
@@ -1,8 +1,28 @@
+from array import array
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
+import datetime
 from datetime import date, time
 
 
+# Bar intervals supported by Yahoo Finance
+Interval = Literal["1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo"]
+
+# Bar sizes the server can aggregate fetched bars into
+Resample = Literal["2m", "5m", "15m", "30m", "1h", "2h", "4h", "1d"]
+
+# Length in seconds of the fixed-width intervals and bar sizes
+BAR_SECONDS = {
+    "1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800, "60m": 3600, "90m": 5400,
+    "1h": 3600, "2h": 7200, "4h": 14400, "1d": 86400,
+}
+
+# Days back Yahoo Finance keeps intraday bars for; older ranges come back without prices
+INTRADAY_MAX_DAYS = {"1m": 30, "2m": 60, "5m": 60, "15m": 60, "30m": 60, "90m": 60, "60m": 730, "1h": 730}
+# Longest range of 1 minute bars Yahoo Finance returns per request
+INTRADAY_MAX_SPAN_DAYS = {"1m": 7}
+
+
 class TokenRequest(BaseModel):
     client_id: str
     client_secret: str
@@ -15,7 +35,8 @@ class Token(BaseModel):
 
 class TickerRequest(BaseModel):
     ticker: str
-    date: Optional[date] = None
+    # datetime.date: a bare `date` here would refer to the field's own default
+    date: Optional[datetime.date] = None
     country: Optional[str] = None
 
 
@@ -34,3 +55,171 @@ class TickerResponse(BaseModel):
     country: str
     prices: List[HistoricalPrice]
     metadata: Dict[str, Any] = Field(default_factory=dict)
+
+
+# Indicator values of one bar; None while an indicator is still warming up
+class IndicatorValue(BaseModel):
+    date: date
+    time: time
+    close: float
+    sma: Optional[float] = None
+    ema: Optional[float] = None
+    rsi: Optional[float] = None
+    vwap: Optional[float] = None
+    bollinger_upper: Optional[float] = None
+    bollinger_lower: Optional[float] = None
+
+
+class IndicatorResponse(BaseModel):
+    ticker: str
+    country: str
+    interval: str
+    parameters: Dict[str, Any] = Field(default_factory=dict)
+    values: List[IndicatorValue]
+
+
+class BatchTickerRequest(BaseModel):
+    tickers: List[TickerRequest] = Field(..., min_length=1)
+    # Defaults for items that do not set their own date/country
+    date: Optional[datetime.date] = None
+    country: Optional[str] = None
+    metadata: bool = True
+
+
+class BatchTickerResult(BaseModel):
+    ticker: str
+    date: Optional[datetime.date] = None
+    country: Optional[str] = None
+    data: Optional[TickerResponse] = None
+    error: Optional[str] = None
+
+
+class BatchTickerResponse(BaseModel):
+    results: List[BatchTickerResult]
+
+
+# Message of /stream/{ticker}: a snapshot of the session, then only new or changed bars
+class PriceUpdate(BaseModel):
+    type: Literal["snapshot", "bars", "error"]
+    ticker: str
+    prices: List[HistoricalPrice] = Field(default_factory=list)
+    detail: Optional[str] = None
+
+
+class PriceSeries:
+    """
+    Compact columnar OHLCV bars, the in-memory form of cached and stored histories
+
+    A HistoricalPrice object with its date and time costs several hundred
+    bytes per bar. Here the bars are six typed arrays - epoch seconds and
+    volume as int64, open/high/low/close as float64, 48 bytes per bar - plus
+    the exchange time zone. The cache, the stale-response fallback and the
+    price store keep histories in this form; DataFrames and HistoricalPrice
+    lists are only built from it for a response. NumPy and pandas are
+    imported on use, so this module stays cheap to import.
+    """
+
+    __slots__ = ("tz", "ts", "open", "high", "low", "close", "volume")
+
+    def __init__(
+        self,
+        tz: str = "UTC",
+        ts: Optional[array] = None,
+        open: Optional[array] = None,
+        high: Optional[array] = None,
+        low: Optional[array] = None,
+        close: Optional[array] = None,
+        volume: Optional[array] = None
+    ):
+        self.tz = tz
+        self.ts = ts if ts is not None else array("q")
+        self.open = open if open is not None else array("d")
+        self.high = high if high is not None else array("d")
+        self.low = low if low is not None else array("d")
+        self.close = close if close is not None else array("d")
+        self.volume = volume if volume is not None else array("q")
+
+    @classmethod
+    def from_frame(cls, frame, tz: Optional[str] = None) -> "PriceSeries":
+        """
+        Copy the bars of a DataFrame shaped like Ticker.history()
+
+        Args:
+            frame: DataFrame with Open/High/Low/Close/Volume columns and a DatetimeIndex
+            tz: Time zone of a naive index (and of an empty frame); defaults to UTC
+        """
+        import numpy as np
+
+        index = frame.index
+        if getattr(index, "tz", None) is None:
+            tz = tz or "UTC"
+            if len(frame):
+                index = index.tz_localize(tz)
+        else:
+            tz = str(index.tz)
+        if not len(frame):
+            return cls(tz)
+
+        def column(name: str, typecode: str, dtype) -> array:
+            values = frame[name]
+            if typecode == "q":
+                values = values.fillna(0)
+            return array(typecode, np.ascontiguousarray(values.to_numpy(), dtype=dtype).tobytes())
+
+        return cls(
+            tz,
+            array("q", np.ascontiguousarray(index.as_unit("s").asi8, dtype=np.int64).tobytes()),
+            column("Open", "d", np.float64),
+            column("High", "d", np.float64),
+            column("Low", "d", np.float64),
+            column("Close", "d", np.float64),
+            column("Volume", "q", np.int64),
+        )
+
+    def to_frame(self):
+        """
+        DataFrame with Open/High/Low/Close/Volume columns and a DatetimeIndex in `tz`
+        """
+        import numpy as np
+        import pandas as pd
+
+        index = pd.to_datetime(np.frombuffer(self.ts, dtype=np.int64), unit="s", utc=True).tz_convert(self.tz)
+        return pd.DataFrame(
+            {
+                "Open": np.frombuffer(self.open, dtype=np.float64),
+                "High": np.frombuffer(self.high, dtype=np.float64),
+                "Low": np.frombuffer(self.low, dtype=np.float64),
+                "Close": np.frombuffer(self.close, dtype=np.float64),
+                "Volume": np.frombuffer(self.volume, dtype=np.int64),
+            },
+            index=index
+        )
+
+    @property
+    def empty(self) -> bool:
+        return not self.ts
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the bar arrays"""
+        return sum(column.itemsize * len(column) for column in self._columns())
+
+    def _columns(self):
+        return (self.ts, self.open, self.high, self.low, self.close, self.volume)
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PriceSeries):
+            return NotImplemented
+        return self.tz == other.tz and self._columns() == other._columns()
+
+    def __repr__(self) -> str:
+        return f"PriceSeries(tz={self.tz!r}, bars={len(self)})"
+
+    def __getstate__(self):
+        return (self.tz, *self._columns())
+
+    def __setstate__(self, state):
+        self.tz, self.ts, self.open, self.high, self.low, self.close, self.volume = state
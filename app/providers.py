@@ -0,0 +1,360 @@
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from yfinance.exceptions import YFPricesMissingError, YFTickerMissingError
+
+from app.breaker import get_circuit_breaker
+from app.limiter import TickerNotFoundError, get_upstream_limiter
+from app.metrics import track_upstream
+
+# Provider settings
+FINANCE_DATA_DIR = os.getenv("FINANCE_DATA_DIR", "data")
+FILE_PROVIDER_DIR = os.getenv("FILE_PROVIDER_DIR", os.path.join(FINANCE_DATA_DIR, "files"))
+HTTP_PROVIDER_URL = os.getenv("HTTP_PROVIDER_URL", "")
+HTTP_PROVIDER_TIMEOUT = float(os.getenv("HTTP_PROVIDER_TIMEOUT", "10"))
+# "country=provider,provider;..." with "*" as the default route
+PROVIDER_ROUTES = os.getenv("PROVIDER_ROUTES", "*=yahoo")
+# Start the next provider of a route if the current one has not answered
+# within this many seconds; 0 only fails over on errors
+PROVIDER_HEDGE_SECONDS = float(os.getenv("PROVIDER_HEDGE_SECONDS", "0"))
+PROVIDER_HEDGE_WORKERS = int(os.getenv("PROVIDER_HEDGE_WORKERS", "8"))
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def upstream_call(fn, *args, **kwargs):
+    """
+    Call Yahoo Finance through the circuit breaker and the rate and concurrency limiter
+
+    Raises:
+        CircuitOpenError: If the circuit is open (checked before queueing)
+        UpstreamBusyError: If the call could not start within UPSTREAM_MAX_WAIT
+    """
+    breaker = get_circuit_breaker()
+    breaker.check()
+    return get_upstream_limiter().call(breaker.call, fn, *args, **kwargs)
+
+
+def empty_history() -> pd.DataFrame:
+    return pd.DataFrame(columns=PRICE_COLUMNS, index=pd.DatetimeIndex([], tz="UTC"))
+
+
+class Provider:
+    """
+    Source of price history and ticker metadata
+
+    history() returns a DataFrame shaped like yfinance's Ticker.history():
+    Open/High/Low/Close/Volume columns and a tz-aware DatetimeIndex. Either
+    `period` (e.g. "1d" for the latest session) or `start`/`end` (end
+    exclusive) is given.
+    """
+
+    name = "provider"
+
+    def history(
+        self,
+        ticker: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        interval: str = "1d",
+        period: Optional[str] = None
+    ) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def info(self, ticker: str) -> Dict[str, Any]:
+        return {}
+
+    def ticker(self, symbol: str) -> "ProviderTicker":
+        return ProviderTicker(self, symbol)
+
+
+class ProviderTicker:
+    """
+    yfinance.Ticker-like view of one symbol on a provider
+    """
+
+    def __init__(self, provider: Provider, symbol: str):
+        self.provider = provider
+        self.symbol = symbol
+
+    def history(self, **kwargs) -> pd.DataFrame:
+        with track_upstream(self.provider.name, "history"):
+            return self.provider.history(self.symbol, **kwargs)
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        with track_upstream(self.provider.name, "info"):
+            return self.provider.info(self.symbol)
+
+
+class YahooProvider(Provider):
+    """
+    Yahoo Finance through yfinance, guarded by the upstream limiter and circuit breaker
+    """
+
+    name = "Yahoo Finance"
+
+    def history(self, ticker, start=None, end=None, interval="1d", period=None):
+        yf_ticker = yf.Ticker(ticker)
+        if period:
+            return upstream_call(self._history, yf_ticker, period=period, interval=interval)
+        return upstream_call(self._history, yf_ticker, start=start, end=end, interval=interval)
+
+    @staticmethod
+    def _history(yf_ticker, **kwargs) -> pd.DataFrame:
+        # By default yfinance logs failures and returns an empty frame, which
+        # would be stored and cached as "no bars". Raised, they reach the
+        # breaker and the limiter and nothing is kept; only a range that
+        # Yahoo answered without prices (a holiday, a weekend) is empty. An
+        # unknown or delisted symbol is the client's error, not Yahoo's.
+        try:
+            return yf_ticker.history(raise_errors=True, **kwargs)
+        except YFPricesMissingError:
+            return empty_history()
+        except YFTickerMissingError:
+            raise TickerNotFoundError(yf_ticker.ticker)
+
+    def info(self, ticker):
+        return upstream_call(lambda: yf.Ticker(ticker).info)
+
+    def download(self, tickers: List[str], **kwargs) -> pd.DataFrame:
+        """
+        Multi-symbol download; columns are grouped by ticker
+        """
+        return upstream_call(
+            yf.download, tickers, group_by="ticker", auto_adjust=True, progress=False, threads=False, **kwargs
+        )
+
+
+class FileProvider(Provider):
+    """
+    Price history from local files
+
+    Bars are read from `<root>/<interval>/<TICKER>.parquet` or `.csv` with a
+    timestamp index column and open/high/low/close/volume columns (any
+    capitalization). Naive timestamps are in the ticker's exchange time
+    zone. A ticker without a file raises FileNotFoundError. Metadata is read
+    from `<root>/info/<TICKER>.json` if present. Parsed files are kept in
+    memory until they change on disk.
+    """
+
+    name = "Local files"
+
+    def __init__(self, root: str = FILE_PROVIDER_DIR, timezone_for: Callable[[str], str] = lambda ticker: "UTC"):
+        self.root = root
+        self.timezone_for = timezone_for
+        self._frames: Dict[str, Tuple[float, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, ticker: str, interval: str) -> Optional[str]:
+        for extension in ("parquet", "csv"):
+            path = os.path.join(self.root, interval, f"{ticker}.{extension}")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _load(self, ticker: str, path: str) -> pd.DataFrame:
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._frames.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        if path.endswith(".parquet"):
+            frame = pd.read_parquet(path)
+            if not isinstance(frame.index, pd.DatetimeIndex):
+                frame = frame.set_index(frame.columns[0])
+        else:
+            frame = pd.read_csv(path, index_col=0)
+        frame = frame.rename(columns={column: column.capitalize() for column in frame.columns})[PRICE_COLUMNS]
+        index = pd.DatetimeIndex(pd.to_datetime(frame.index, utc=False))
+        tz_name = self.timezone_for(ticker)
+        index = index.tz_localize(tz_name) if index.tz is None else index.tz_convert(tz_name)
+        frame = frame.set_axis(index).sort_index()
+
+        with self._lock:
+            self._frames[path] = (mtime, frame)
+        return frame
+
+    def history(self, ticker, start=None, end=None, interval="1d", period=None):
+        path = self._path(ticker, interval)
+        if path is None:
+            # Not an answer: a route like "file,yahoo" moves on to the next provider
+            raise FileNotFoundError(f"No {interval} file for {ticker} in {self.root}")
+        frame = self._load(ticker, path)
+        if frame.empty:
+            return frame
+
+        dates = frame.index.date
+        if period:
+            if period.endswith("d") and period[:-1].isdigit():
+                sessions = np.unique(dates)[-int(period[:-1]):]
+                return frame[np.isin(dates, sessions)]
+            return frame
+        mask = np.ones(len(frame), dtype=bool)
+        if start:
+            mask &= dates >= start
+        if end:
+            mask &= dates < end
+        return frame[mask]
+
+    def info(self, ticker):
+        path = os.path.join(self.root, "info", f"{ticker}.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+
+class HTTPProvider(Provider):
+    """
+    Price history from an HTTP service speaking a minimal JSON protocol
+
+    Meant for mock and replay services in tests and benchmarks:
+
+    - GET /history/{ticker}?interval=..&start=..&end=.. (or &period=..) returns
+      {"tz": "...", "bars": [{"timestamp": epoch seconds, "open", "high", "low", "close", "volume"}]}
+    - GET /info/{ticker} returns the metadata dict
+
+    A 404 is an unknown ticker and yields no bars.
+    """
+
+    name = "HTTP"
+
+    def __init__(
+        self,
+        base_url: str = HTTP_PROVIDER_URL,
+        timeout: float = HTTP_PROVIDER_TIMEOUT,
+        client: Optional[httpx.Client] = None
+    ):
+        self.client = client or httpx.Client(base_url=base_url, timeout=timeout)
+
+    def history(self, ticker, start=None, end=None, interval="1d", period=None):
+        params = {"interval": interval}
+        if period:
+            params["period"] = period
+        if start:
+            params["start"] = start.isoformat()
+        if end:
+            params["end"] = end.isoformat()
+        response = self.client.get(f"/history/{ticker}", params=params)
+        if response.status_code == 404:
+            return empty_history()
+        response.raise_for_status()
+        payload = response.json()
+        bars = payload.get("bars", [])
+        index = pd.to_datetime([bar["timestamp"] for bar in bars], unit="s", utc=True)
+        return pd.DataFrame(
+            {column: [bar[column.lower()] for bar in bars] for column in PRICE_COLUMNS},
+            index=index.tz_convert(payload.get("tz", "UTC"))
+        )
+
+    def info(self, ticker):
+        response = self.client.get(f"/info/{ticker}")
+        if response.status_code == 404:
+            return {}
+        response.raise_for_status()
+        return response.json()
+
+
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_executor_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(
+                    max_workers=PROVIDER_HEDGE_WORKERS, thread_name_prefix="provider-hedge"
+                )
+    return _hedge_executor
+
+
+class HedgedProvider(Provider):
+    """
+    Several providers tried in order, with optional hedging
+
+    A provider that fails hands over to the next one immediately. With a
+    `hedge_after` budget, the next provider is also started when the current
+    one has not answered in time; the first successful answer wins and the
+    slower calls are left to finish in the background.
+    """
+
+    def __init__(self, providers: List[Provider], hedge_after: float = PROVIDER_HEDGE_SECONDS):
+        self.providers = providers
+        self.hedge_after = hedge_after
+        self.name = " / ".join(provider.name for provider in providers)
+        self._lock = threading.Lock()
+        self.hedged = 0
+        self.failovers = 0
+
+    def _first(self, method: str, *args, **kwargs) -> Any:
+        if not self.hedge_after:
+            error = None
+            for i, provider in enumerate(self.providers):
+                if i:
+                    with self._lock:
+                        self.failovers += 1
+                try:
+                    return getattr(provider, method)(*args, **kwargs)
+                except Exception as exc:
+                    error = exc
+            raise error
+
+        executor = get_hedge_executor()
+        remaining = list(self.providers)
+        pending: List[Future] = []
+        error = None
+        while True:
+            if remaining:
+                pending.append(executor.submit(getattr(remaining.pop(0), method), *args, **kwargs))
+            done, _ = wait(pending, timeout=self.hedge_after if remaining else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+            if not pending and not remaining:
+                raise error
+            if remaining:
+                with self._lock:
+                    if done:
+                        self.failovers += 1
+                    else:
+                        self.hedged += 1
+
+    def history(self, ticker, start=None, end=None, interval="1d", period=None):
+        return self._first("history", ticker, start=start, end=end, interval=interval, period=period)
+
+    def info(self, ticker):
+        return self._first("info", ticker)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hedged": self.hedged, "failovers": self.failovers}
+
+
+def parse_routes(spec: str) -> Dict[str, List[str]]:
+    """
+    Parse a PROVIDER_ROUTES value
+
+    "South Korea=file,yahoo;*=yahoo" -> {"South Korea": ["file", "yahoo"], "*": ["yahoo"]}
+    """
+    routes: Dict[str, List[str]] = {}
+    for entry in spec.split(";"):
+        country, _, names = entry.partition("=")
+        names_list = [name.strip() for name in names.split(",") if name.strip()]
+        if country.strip() and names_list:
+            routes[country.strip()] = names_list
+    routes.setdefault("*", ["yahoo"])
+    return routes
@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.models import BAR_SECONDS
+
+
+def local_seconds(index: pd.DatetimeIndex) -> np.ndarray:
+    """Wall-clock epoch seconds of a tz-aware index in its own time zone"""
+    return index.tz_localize(None).as_unit("s").asi8
+
+
+def bucket_start(cursor: datetime, rule: str, tz: str) -> pd.Timestamp:
+    """
+    Start of the `rule` bucket holding `cursor` (naive times are in `tz`)
+    """
+    stamp = pd.Timestamp(cursor)
+    stamp = stamp.tz_localize(tz) if stamp.tzinfo is None else stamp.tz_convert(tz)
+    # The same arithmetic as resample_frame, so the cursor maps to the bucket's label
+    offset = (stamp.tz_localize(None) - pd.Timestamp(0)) % pd.Timedelta(seconds=BAR_SECONDS[rule])
+    return stamp - offset
+
+
+def resample_frame(frame: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """
+    Aggregate bars into `rule` sized buckets (open=first, high=max, low=min,
+    close=last, volume=sum)
+
+    Buckets are aligned to midnight in the time zone of the frame's index,
+    i.e. the exchange's, so a "1d" bucket is a local trading day and "1h"
+    buckets start on the local hour. Each bucket is labelled with its start.
+    The bars are sorted, so a bucket is a run of equal bucket numbers and
+    every column is reduced in one `reduceat` pass.
+
+    Args:
+        frame: DataFrame with Open/High/Low/Close/Volume columns and a
+            tz-aware DatetimeIndex, sorted by time
+        rule: Bucket size, a key of BAR_SECONDS
+
+    Returns:
+        DataFrame of the same shape with one row per non-empty bucket
+    """
+    width = BAR_SECONDS[rule]
+    frame = frame[frame["Close"].notna()]
+    if frame.empty:
+        return frame
+
+    stamps = frame.index.as_unit("s").asi8
+    local = local_seconds(frame.index)
+    buckets = local // width
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(frame)] - 1
+
+    # Label with the UTC instant of the bucket start, from its first bar's offset
+    labels = stamps[starts] - (local[starts] - buckets[starts] * width)
+    return pd.DataFrame(
+        {
+            "Open": frame["Open"].to_numpy(dtype=np.float64)[starts],
+            "High": np.maximum.reduceat(frame["High"].to_numpy(dtype=np.float64), starts),
+            "Low": np.minimum.reduceat(frame["Low"].to_numpy(dtype=np.float64), starts),
+            "Close": frame["Close"].to_numpy(dtype=np.float64)[ends],
+            "Volume": np.add.reduceat(frame["Volume"].fillna(0).to_numpy().astype(np.int64), starts),
+        },
+        index=pd.to_datetime(labels, unit="s", utc=True).tz_convert(frame.index.tz)
+    )
@@ -0,0 +1,179 @@
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+from app.apikeys import API_KEY_QUOTA_WORKERS_ENV
+from app.warmup import get_finance_loader
+
+# Log next to uvicorn's own startup messages
+logger = logging.getLogger("uvicorn.error")
+
+# Server settings
+SERVER_MODE = os.getenv("SERVER_MODE", "development")
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+# PORT is set by Cloud Run
+SERVER_PORT = int(os.getenv("SERVER_PORT", os.getenv("PORT", "8000")))
+# 0 starts one worker per CPU
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "0"))
+# "auto" uses uvloop and httptools when they are installed (pip install -e ".[server]")
+SERVER_LOOP = os.getenv("SERVER_LOOP", "auto")
+SERVER_HTTP = os.getenv("SERVER_HTTP", "auto")
+# Keep idle connections open longer than the load balancer does, so the
+# server never closes a connection the balancer is about to reuse
+SERVER_KEEPALIVE_SECONDS = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "75"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+# Requests per worker beyond which new connections get a 503; 0 is unlimited
+SERVER_LIMIT_CONCURRENCY = int(os.getenv("SERVER_LIMIT_CONCURRENCY", "0"))
+SERVER_GRACEFUL_SHUTDOWN_SECONDS = int(os.getenv("SERVER_GRACEFUL_SHUTDOWN_SECONDS", "30"))
+
+
+def default_workers() -> int:
+    return SERVER_WORKERS or os.cpu_count() or 1
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def production_options() -> Dict[str, Any]:
+    """uvicorn settings of a production worker"""
+    return {
+        "loop": SERVER_LOOP,
+        "http": SERVER_HTTP,
+        "timeout_keep_alive": SERVER_KEEPALIVE_SECONDS,
+        "backlog": SERVER_BACKLOG,
+        "limit_concurrency": SERVER_LIMIT_CONCURRENCY or None,
+        "timeout_graceful_shutdown": SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        "access_log": False,
+    }
+
+
+class Supervisor:
+    """
+    Pre-fork process manager for production
+
+    The application (and with it pandas and yfinance) is imported and the
+    listening socket is bound once in the supervisor; the workers are forked
+    from it, so they share the imported code copy-on-write and start
+    accepting immediately. Each worker runs its own event loop on the shared
+    socket. Workers that die are replaced; SIGINT/SIGTERM stop them
+    gracefully.
+    """
+
+    def __init__(self, app_path: str, host: str, port: int, workers: int):
+        self.app_path = app_path
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self._children: Dict[int, int] = {}
+        self._stopping = threading.Event()
+
+    def preload(self):
+        started = time.perf_counter()
+        app = import_from_string(self.app_path)
+        # The workers inherit the loaded finance subsystem and are ready right away
+        get_finance_loader().load()
+        logger.info("Preloaded %s in %.2fs", self.app_path, time.perf_counter() - started)
+        return app
+
+    def _spawn(self, slot: int, app, sock: socket.socket) -> None:
+        pid = os.fork()
+        if pid:
+            self._children[pid] = slot
+            return
+        # Worker: the supervisor's handlers must not run here, uvicorn installs its own
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        code = 0
+        try:
+            config = uvicorn.Config(app, host=self.host, port=self.port, **production_options())
+            uvicorn.Server(config).run(sockets=[sock])
+        except BaseException:
+            logger.exception("Worker %d failed", slot)
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _stop(self, signum, frame) -> None:
+        self._stopping.set()
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        # Creating a config sets up uvicorn's logging for the supervisor as well
+        uvicorn.Config(self.app_path, **production_options())
+        sock = bind_socket(self.host, self.port, SERVER_BACKLOG)
+        app = self.preload()
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+        logger.info("Starting %d workers on %s:%d", self.workers, self.host, self.port)
+        for slot in range(self.workers):
+            self._spawn(slot, app, sock)
+        self._supervise(app, sock)
+        sock.close()
+
+    def _supervise(self, app, sock: socket.socket) -> None:
+        """
+        Replace workers that die until all have exited after a stop signal
+        """
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            slot = self._children.pop(pid, None)
+            if slot is None or self._stopping.is_set():
+                continue
+            logger.warning(
+                "Worker %d (pid %d) exited with code %d, restarting", slot, pid, os.waitstatus_to_exitcode(status)
+            )
+            # A stop signal during the pause must not fork a worker nobody will stop
+            if self._stopping.wait(1):
+                continue
+            self._spawn(slot, app, sock)
+
+
+def serve(
+    app_path: str,
+    production: bool = SERVER_MODE == "production",
+    host: str = SERVER_HOST,
+    port: int = SERVER_PORT,
+    workers: Optional[int] = None
+) -> None:
+    """
+    Run the API
+
+    Development mode is a single worker that reloads on code changes.
+    Production mode runs `workers` processes (one per CPU by default)
+    without the file watcher.
+    """
+    if not production:
+        uvicorn.run(app_path, host=host, port=port, reload=True)
+        return
+
+    workers = workers or default_workers()
+    # Each worker enforces its share of the API key quotas
+    os.environ.setdefault(API_KEY_QUOTA_WORKERS_ENV, str(workers))
+    if not hasattr(os, "fork"):
+        # No fork (Windows): uvicorn spawns the workers, each importing the app itself
+        uvicorn.run(app_path, host=host, port=port, workers=workers, **production_options())
+        return
+    Supervisor(app_path, host, port, workers).run()
@@ -0,0 +1,228 @@
+import os
+import sqlite3
+import threading
+from array import array
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.models import PriceSeries
+
+# Price store settings
+FINANCE_DATA_DIR = os.getenv("FINANCE_DATA_DIR", "data")
+STORE_DB_PATH = os.getenv("STORE_DB_PATH", os.path.join(FINANCE_DATA_DIR, "prices.sqlite3"))
+
+# Half-open range of exchange-local dates: [start, end)
+DateRange = Tuple[date, date]
+
+
+def merge_ranges(ranges: List[DateRange]) -> List[DateRange]:
+    """
+    Merge overlapping or touching date ranges into a sorted, disjoint list
+    """
+    merged: List[DateRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class PriceStore:
+    """
+    Local OHLCV time-series store backed by SQLite
+
+    Bars are stored per (ticker, interval) with epoch-second timestamps. The
+    store also records which date ranges were downloaded from upstream, so a
+    range without bars (a holiday) is known to be empty instead of missing.
+    """
+
+    def __init__(self, path: str = STORE_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bars ("
+                "ticker TEXT NOT NULL, interval TEXT NOT NULL, ts INTEGER NOT NULL, "
+                "open REAL, high REAL, low REAL, close REAL, volume INTEGER, "
+                "PRIMARY KEY (ticker, interval, ts)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                "ticker TEXT NOT NULL, interval TEXT NOT NULL, start TEXT NOT NULL, end TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS coverage_ticker ON coverage (ticker, interval)")
+            conn.execute("CREATE TABLE IF NOT EXISTS symbols (ticker TEXT PRIMARY KEY, tz TEXT NOT NULL)")
+            # Counted once here and kept up to date by write(), so stats() stays cheap
+            self.bars = conn.execute("SELECT COUNT(*) FROM bars").fetchone()[0]
+            self.tickers = conn.execute("SELECT COUNT(*) FROM symbols").fetchone()[0]
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def covered_ranges(self, ticker: str, interval: str) -> List[DateRange]:
+        """
+        Return the sorted date ranges already downloaded for a ticker
+        """
+        rows = self._connection().execute(
+            "SELECT start, end FROM coverage WHERE ticker = ? AND interval = ? ORDER BY start",
+            (ticker, interval)
+        ).fetchall()
+        return [(date.fromisoformat(start), date.fromisoformat(end)) for start, end in rows]
+
+    def covers(self, ticker: str, interval: str, start: date, end: date) -> bool:
+        """
+        Check whether [start, end) lies inside a single downloaded range
+        """
+        return any(
+            covered_start <= start and end <= covered_end
+            for covered_start, covered_end in self.covered_ranges(ticker, interval)
+        )
+
+    def timezone(self, ticker: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT tz FROM symbols WHERE ticker = ?", (ticker,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def write(
+        self,
+        ticker: str,
+        interval: str,
+        frame: pd.DataFrame,
+        start: date,
+        end: date,
+        tz_name: str
+    ) -> None:
+        """
+        Store bars downloaded for [start, end) and mark the range as covered
+
+        Args:
+            ticker: The ticker symbol
+            interval: Bar interval, e.g. "1d"
+            frame: DataFrame shaped like Ticker.history()
+            start: First date of the downloaded range
+            end: Day after the last date of the downloaded range
+            tz_name: Exchange time zone, used when the index is not tz-aware
+        """
+        series = PriceSeries.from_frame(frame.dropna(subset=["Close"]) if not frame.empty else frame, tz_name)
+        tz = series.tz
+        rows = list(zip(
+            [ticker] * len(series),
+            [interval] * len(series),
+            series.ts, series.open, series.high, series.low, series.close, series.volume
+        ))
+
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                added = 0
+                if rows:
+                    # REPLACE counts replaced rows as changes too: count the written span before and after
+                    span = (ticker, interval, min(series.ts), max(series.ts))
+                    count = "SELECT COUNT(*) FROM bars WHERE ticker = ? AND interval = ? AND ts BETWEEN ? AND ?"
+                    added = -conn.execute(count, span).fetchone()[0]
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO bars (ticker, interval, ts, open, high, low, close, volume) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+                    added += conn.execute(count, span).fetchone()[0]
+                new_ticker = conn.execute(
+                    "INSERT OR IGNORE INTO symbols (ticker, tz) VALUES (?, ?)", (ticker, tz)
+                ).rowcount
+                ranges = merge_ranges(self.covered_ranges(ticker, interval) + [(start, end)])
+                conn.execute("DELETE FROM coverage WHERE ticker = ? AND interval = ?", (ticker, interval))
+                conn.executemany(
+                    "INSERT INTO coverage (ticker, interval, start, end) VALUES (?, ?, ?, ?)",
+                    [(ticker, interval, s.isoformat(), e.isoformat()) for s, e in ranges]
+                )
+            self.writes += 1
+            self.bars += added
+            self.tickers += new_ticker
+
+    def read_series(self, ticker: str, interval: str, start: date, end: date) -> PriceSeries:
+        """
+        Read stored bars for the local dates [start, end) in the ticker's exchange time zone
+        """
+        tz = self.timezone(ticker) or "UTC"
+        start_ts = int(pd.Timestamp(start).tz_localize(tz).timestamp())
+        end_ts = int(pd.Timestamp(end).tz_localize(tz).timestamp())
+        rows = self._connection().execute(
+            "SELECT ts, open, high, low, close, volume FROM bars "
+            "WHERE ticker = ? AND interval = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (ticker, interval, start_ts, end_ts)
+        ).fetchall()
+        with self._lock:
+            self.reads += 1
+
+        values = np.array(rows, dtype=np.float64).reshape(len(rows), 6)
+        return PriceSeries(
+            tz,
+            array("q", values[:, 0].astype(np.int64).tobytes()),
+            *(array("d", np.ascontiguousarray(values[:, column]).tobytes()) for column in range(1, 5)),
+            array("q", values[:, 5].astype(np.int64).tobytes())
+        )
+
+    def read(self, ticker: str, interval: str, start: date, end: date) -> pd.DataFrame:
+        """
+        Read stored bars for the local dates [start, end)
+
+        Returns:
+            DataFrame with Open/High/Low/Close/Volume columns and a DatetimeIndex
+            in the ticker's exchange time zone
+        """
+        return self.read_series(ticker, interval, start, end).to_frame()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM bars")
+                conn.execute("DELETE FROM coverage")
+                conn.execute("DELETE FROM symbols")
+            self.reads = self.writes = self.bars = self.tickers = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Bar and ticker counts (this process's view when several share the
+        file) and reads/writes since startup
+        """
+        with self._lock:
+            return {
+                "bars": self.bars,
+                "tickers": self.tickers,
+                "reads": self.reads,
+                "writes": self.writes,
+            }
+
+
+_price_store: Optional[PriceStore] = None
+_price_store_lock = threading.Lock()
+
+
+def get_price_store() -> PriceStore:
+    """
+    Return the process-wide local price store
+    """
+    global _price_store
+    if _price_store is None:
+        with _price_store_lock:
+            if _price_store is None:
+                _price_store = PriceStore()
+    return _price_store
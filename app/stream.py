@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+
+import pandas as pd
+from starlette.websockets import WebSocket
+
+from app.finance import (
+    DEFAULT_LATEST_INTERVAL, fetch_history_frame, frame_to_prices, get_fetch_executor, get_ticker_country
+)
+from app.models import PriceUpdate
+
+logger = logging.getLogger(__name__)
+
+# Stream settings: seconds between upstream polls of a symbol, messages
+# buffered per subscriber before the oldest are dropped, and seconds between
+# keep-alive comments on idle SSE connections
+STREAM_POLL_SECONDS = float(os.getenv("STREAM_POLL_SECONDS", "10"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "100"))
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("STREAM_KEEPALIVE_SECONDS", "15"))
+
+# (ticker, country, interval)
+FeedKey = Tuple[str, str, str]
+
+
+def new_bars(previous: Optional[pd.DataFrame], current: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bars of `current` a subscriber who has seen `previous` does not have yet
+
+    Those are the bars after the last one seen, plus that last bar again if
+    its values changed (the bar of the running minute is updated in place).
+    """
+    if previous is None or previous.empty or current.empty:
+        return current
+    cursor = previous.index[-1]
+    delta = current[current.index >= cursor]
+    if not delta.empty and delta.index[0] == cursor:
+        columns = ["Open", "High", "Low", "Close", "Volume"]
+        if delta[columns].iloc[0].equals(previous[columns].iloc[-1]):
+            delta = delta.iloc[1:]
+    return delta
+
+
+class TickerFeed:
+    """
+    One upstream poller for a symbol, fanning the bars out to every subscriber
+
+    The poller runs only while the feed has subscribers. Each poll fetches
+    the latest session once (refreshing the shared history cache on the
+    way) and sends every subscriber only the bars that are new since the
+    previous poll, encoded once for all of them. Late subscribers get a
+    snapshot of the bars so far, encoded at most once per change of them
+    and shared. A subscriber that falls
+    more than STREAM_QUEUE_SIZE messages behind loses the oldest ones.
+    """
+
+    def __init__(self, ticker: str, country: str, interval: str, poll_seconds: float, queue_size: int):
+        self.ticker = ticker
+        self.country = country
+        self.interval = interval
+        self.poll_seconds = poll_seconds
+        self.queue_size = queue_size
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.frame: Optional[pd.DataFrame] = None
+        self._snapshot: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+        self.errors = 0
+        self.messages = 0
+        self.dropped = 0
+
+    def _encode(self, type_: str, frame: Optional[pd.DataFrame] = None, detail: Optional[str] = None) -> str:
+        prices = frame_to_prices(frame) if frame is not None else []
+        return PriceUpdate(type=type_, ticker=self.ticker, prices=prices, detail=detail).model_dump_json()
+
+    def _put(self, queue: asyncio.Queue, message: str) -> None:
+        if queue.full():
+            queue.get_nowait()
+            self.dropped += 1
+        queue.put_nowait(message)
+
+    def publish(self, message: str) -> None:
+        self.messages += 1
+        for queue in self.subscribers:
+            self._put(queue, message)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.frame is not None:
+            # Late subscribers start from the bars the feed already has
+            if self._snapshot is None:
+                self._snapshot = self._encode("snapshot", self.frame)
+            self._put(queue, self._snapshot)
+        self.subscribers.add(queue)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> bool:
+        """Remove a subscriber; return True if the feed has none left and was stopped"""
+        self.subscribers.discard(queue)
+        if self.subscribers:
+            return False
+        self.stop()
+        return True
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def poll(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.polls += 1
+        try:
+            frame = await loop.run_in_executor(
+                get_fetch_executor(),
+                partial(fetch_history_frame, self.ticker, self.country, interval=self.interval, refresh=True)
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Polling %s failed: %s", self.ticker, e)
+            self.publish(self._encode("error", detail=str(e)))
+            return
+        first = self.frame is None
+        delta = new_bars(self.frame, frame)
+        self.frame = frame
+        if first:
+            self._snapshot = self._encode("snapshot", delta)
+            self.publish(self._snapshot)
+        elif not delta.empty:
+            self._snapshot = None
+            self.publish(self._encode("bars", delta))
+
+    async def _run(self) -> None:
+        while True:
+            await self.poll()
+            await asyncio.sleep(self.poll_seconds)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": len(self.subscribers),
+            "polls": self.polls,
+            "errors": self.errors,
+            "messages": self.messages,
+            "dropped": self.dropped,
+        }
+
+
+class StreamHub:
+    """
+    Live intraday feeds of the process, one per (ticker, country, interval)
+
+    However many clients stream a symbol, it is polled upstream once per
+    STREAM_POLL_SECONDS. Feeds are created by the first subscriber and
+    stopped when the last one leaves.
+    """
+
+    def __init__(self, poll_seconds: float = STREAM_POLL_SECONDS, queue_size: int = STREAM_QUEUE_SIZE):
+        self.poll_seconds = poll_seconds
+        self.queue_size = queue_size
+        self._feeds: Dict[FeedKey, TickerFeed] = {}
+        # Totals of the feeds already stopped
+        self.polls = 0
+        self.messages = 0
+        self.dropped = 0
+
+    @asynccontextmanager
+    async def subscribe(
+        self, ticker: str, country: Optional[str] = None, interval: Optional[str] = None
+    ) -> AsyncIterator[asyncio.Queue]:
+        """
+        Yield a queue receiving the encoded PriceUpdate messages of a symbol
+        """
+        key = (ticker, country or get_ticker_country(ticker), interval or DEFAULT_LATEST_INTERVAL)
+        feed = self._feeds.get(key)
+        if feed is None:
+            feed = self._feeds[key] = TickerFeed(*key, self.poll_seconds, self.queue_size)
+        queue = feed.subscribe()
+        try:
+            yield queue
+        finally:
+            if feed.unsubscribe(queue) and self._feeds.get(key) is feed:
+                del self._feeds[key]
+                self.polls += feed.polls
+                self.messages += feed.messages
+                self.dropped += feed.dropped
+
+    def feed(self, ticker: str, country: Optional[str] = None, interval: Optional[str] = None) -> Optional[TickerFeed]:
+        return self._feeds.get((ticker, country or get_ticker_country(ticker), interval or DEFAULT_LATEST_INTERVAL))
+
+    def stats(self) -> Dict[str, int]:
+        feeds = list(self._feeds.values())
+        return {
+            "feeds": len(feeds),
+            "subscribers": sum(len(feed.subscribers) for feed in feeds),
+            "polls": self.polls + sum(feed.polls for feed in feeds),
+            "messages": self.messages + sum(feed.messages for feed in feeds),
+            "dropped": self.dropped + sum(feed.dropped for feed in feeds),
+        }
+
+    def clear(self) -> None:
+        """Stop every feed (subscribers stop receiving messages)"""
+        for feed in self._feeds.values():
+            feed.stop()
+        self._feeds.clear()
+        self.polls = self.messages = self.dropped = 0
+
+
+async def sse_events(
+    hub: StreamHub, ticker: str, country: Optional[str] = None, interval: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Server-sent events of a symbol, with a comment line while it is quiet
+
+    Runs until the client disconnects, which cancels the generator and
+    unsubscribes it.
+    """
+    async with hub.subscribe(ticker, country, interval) as queue:
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing the idle connection
+                yield ": keep-alive\n\n"
+                continue
+            yield f"data: {message}\n\n"
+
+
+async def send_updates(
+    websocket: WebSocket, hub: StreamHub, ticker: str, country: Optional[str] = None, interval: Optional[str] = None
+) -> None:
+    """
+    Send the updates of a symbol over an accepted WebSocket until the client disconnects
+
+    Messages from the client are ignored; a receive is kept pending only to
+    notice the disconnect while no updates are sent.
+    """
+    async with hub.subscribe(ticker, country, interval) as queue:
+        receiver = asyncio.ensure_future(websocket.receive())
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+                if receiver in done:
+                    if receiver.result()["type"] == "websocket.disconnect":
+                        getter.cancel()
+                        return
+                    receiver = asyncio.ensure_future(websocket.receive())
+                if getter in done:
+                    await websocket.send_text(getter.result())
+                else:
+                    getter.cancel()
+        finally:
+            receiver.cancel()
+
+
+_stream_hub: Optional[StreamHub] = None
+
+
+def get_stream_hub() -> StreamHub:
+    """
+    Return the process-wide stream hub (used from the event loop only)
+    """
+    global _stream_hub
+    if _stream_hub is None:
+        _stream_hub = StreamHub()
+    return _stream_hub
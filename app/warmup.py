@@ -0,0 +1,113 @@
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# When to import the finance subsystem (pandas, yfinance):
+# "background" starts right after startup, "eager" finishes before the first
+# request is accepted, "lazy" waits for the first request that needs it
+FINANCE_WARMUP = os.getenv("FINANCE_WARMUP", "background")
+
+# Modules that pull in pandas, numpy and yfinance
+FINANCE_MODULES = ("app.finance", "app.formats", "app.store")
+
+
+class FinanceLoader:
+    """
+    Imports the finance subsystem once, in the background or on demand
+
+    Importing yfinance and pandas takes most of the startup time. The API
+    imports them through this loader so it can accept connections and
+    answer auth and health requests while they load. Requests that need
+    the data layer wait for the import instead of starting a second one.
+    """
+
+    def __init__(self, modules=FINANCE_MODULES):
+        self.modules = modules
+        self.seconds: Optional[float] = None
+        self.error: Optional[BaseException] = None
+        self._loaded = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded.is_set()
+
+    def load(self) -> None:
+        """
+        Import the modules, blocking until they are loaded
+
+        Raises:
+            ImportError: If a module cannot be imported (retried on the next call)
+        """
+        if self._loaded.is_set():
+            return
+        with self._lock:
+            if self._loaded.is_set():
+                return
+            started = time.perf_counter()
+            try:
+                for module in self.modules:
+                    importlib.import_module(module)
+            except BaseException as e:
+                self.error = e
+                raise
+            self.seconds = time.perf_counter() - started
+            self.error = None
+            self._loaded.set()
+        logger.info("Loaded the finance subsystem in %.2fs", self.seconds)
+
+    def _load_in_background(self) -> None:
+        try:
+            self.load()
+        except Exception:
+            logger.exception("Failed to load the finance subsystem")
+
+    def start(self) -> None:
+        """
+        Start loading in a daemon thread
+        """
+        with self._lock:
+            if self._loaded.is_set() or self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._load_in_background, name="finance-warmup", daemon=True
+            )
+            self._thread.start()
+
+    async def wait(self) -> None:
+        """
+        Wait for the modules without blocking the event loop
+        """
+        if not self._loaded.is_set():
+            await run_in_threadpool(self.load)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "seconds": None if self.seconds is None else round(self.seconds, 3),
+            "error": None if self.error is None else repr(self.error),
+        }
+
+
+_finance_loader: Optional[FinanceLoader] = None
+_finance_loader_lock = threading.Lock()
+
+
+def get_finance_loader() -> FinanceLoader:
+    """
+    Return the process-wide finance loader
+    """
+    global _finance_loader
+    if _finance_loader is None:
+        with _finance_loader_lock:
+            if _finance_loader is None:
+                _finance_loader = FinanceLoader()
+    return _finance_loader
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Token verification cost per request
+
+"decode" is what verify_token did before: jwt.decode() with the key given
+as a string, so it is parsed on every call. "preloaded" decodes with the
+key parsed once by load_keys(); "cached" is verify_token() answering a
+token it has seen before.
+
+$ python benchmarks/bench_auth.py --algorithms HS256 RS256 ES256
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec, rsa  # noqa: E402
+from jose import jwt  # noqa: E402
+
+from app import auth  # noqa: E402
+
+
+def private_pem(algorithm: str) -> str:
+    if algorithm.startswith("ES"):
+        key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+
+def configure(algorithm: str) -> str:
+    """Point app.auth at `algorithm` and return the raw verification key"""
+    auth.ALGORITHM = algorithm
+    if algorithm.startswith("HS"):
+        raw_key = auth.SECRET_KEY
+    else:
+        auth.JWT_PRIVATE_KEY = raw_key = private_pem(algorithm)
+        auth.JWT_PUBLIC_KEY = ""
+    auth.SIGNING_KEY, auth.VERIFYING_KEY = auth.load_keys(algorithm)
+    auth.token_cache.clear()
+    return raw_key
+
+
+def calls_per_second(fn, seconds: float) -> float:
+    calls = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        fn()
+        calls += 1
+    return calls / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--algorithms", nargs="+", default=["HS256", "RS256", "ES256"])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'algorithm':<10}{'decode/s':>12}{'preloaded/s':>14}{'cached/s':>12}{'speedup':>10}")
+    for algorithm in args.algorithms:
+        raw_key = configure(algorithm)
+        token = auth.create_access_token({"sub": auth.CLIENT_ID}, expires_delta=timedelta(minutes=30))
+        if not algorithm.startswith("HS"):
+            # Mirror the old code path: verify with the PEM text on every call
+            raw_key = auth.VERIFYING_KEY.to_pem().decode()
+
+        decode = calls_per_second(lambda: jwt.decode(token, raw_key, algorithms=[algorithm]), args.seconds)
+        preloaded = calls_per_second(
+            lambda: jwt.decode(token, auth.VERIFYING_KEY, algorithms=[algorithm]), args.seconds
+        )
+        cached = calls_per_second(lambda: auth.verify_token(token), args.seconds)
+        print(f"{algorithm:<10}{decode:>12,.0f}{preloaded:>14,.0f}{cached:>12,.0f}{cached / decode:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the DataFrame -> HistoricalPrice conversion
+
+Compares the previous iterrows() loop with the columnar frame_to_prices()
+on synthetic 1 minute and 5 year daily histories.
+
+$ python benchmarks/bench_conversion.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.finance import frame_to_prices  # noqa: E402
+from app.models import HistoricalPrice  # noqa: E402
+from benchmarks.synthetic import make_history_frame  # noqa: E402
+
+
+def iterrows_to_prices(hist_data, specific_date=None):
+    """The row-by-row conversion fetch_from_yahoo used before"""
+    prices = []
+    for index, row in hist_data.iterrows():
+        price_date = index.date()
+        price_time = index.time()
+        if specific_date and price_date != specific_date:
+            continue
+        prices.append(HistoricalPrice(
+            date=price_date,
+            time=price_time,
+            open=float(row["Open"]),
+            high=float(row["High"]),
+            low=float(row["Low"]),
+            close=float(row["Close"]),
+            volume=int(row["Volume"])
+        ))
+    return prices
+
+
+def rows_per_second(convert, hist_data, specific_date, min_seconds: float) -> float:
+    """Run `convert` repeatedly for at least `min_seconds` and return input rows/sec"""
+    rows = 0
+    started = time.perf_counter()
+    while True:
+        convert(hist_data, specific_date)
+        rows += len(hist_data)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return rows / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    daily = make_history_frame(1260, "1D", start="2019-01-02")
+    cases = {
+        "1d @ 1m (390 rows)": (make_history_frame(390, "1min"), None),
+        "5d @ 1m (1950 rows)": (make_history_frame(1950, "1min"), None),
+        "5y @ 1d (1260 rows)": (daily, None),
+        # Filtering a single day out of a long history exercises the date mask
+        "5y @ 1d, one date": (daily, daily.index[600].date()),
+    }
+
+    print(f"{'case':<24}{'iterrows rows/s':>18}{'columnar rows/s':>18}{'speedup':>10}")
+    for name, (hist_data, specific_date) in cases.items():
+        before = rows_per_second(iterrows_to_prices, hist_data, specific_date, args.min_seconds)
+        after = rows_per_second(frame_to_prices, hist_data, specific_date, args.min_seconds)
+        print(f"{name:<24}{before:>18,.0f}{after:>18,.0f}{after / before:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
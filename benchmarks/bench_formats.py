@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Serialization cost and payload size of the /ticker response formats
+
+JSON goes through frame_to_prices() and TickerResponse like the endpoint
+does; NDJSON and CSV use the streaming generators; Arrow IPC and Parquet
+are encoded straight from the DataFrame (requires pyarrow).
+
+$ python benchmarks/bench_formats.py --rows 1260 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.finance import frame_to_prices  # noqa: E402
+from app.formats import iter_ndjson, iter_csv, encode_arrow, encode_parquet, BINARY_MEDIA_TYPES  # noqa: E402
+from app.models import TickerResponse  # noqa: E402
+from benchmarks.synthetic import make_history_frame  # noqa: E402
+
+
+def encode_json(frame) -> bytes:
+    response = TickerResponse(ticker="AAPL", country="US", prices=frame_to_prices(frame), metadata={})
+    return response.model_dump_json().encode()
+
+
+FORMATS = {
+    "json": encode_json,
+    "ndjson": lambda frame: "".join(iter_ndjson(frame)).encode(),
+    "csv": lambda frame: "".join(iter_csv(frame)).encode(),
+}
+if BINARY_MEDIA_TYPES:
+    FORMATS["arrow"] = encode_arrow
+    FORMATS["parquet"] = encode_parquet
+
+
+def best_of(encode, frame, repeat: int):
+    """Return the fastest of `repeat` runs and the encoded payload"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = encode(frame)
+        best = min(best, time.perf_counter() - started)
+    return best, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1260, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'format':<8}{'ms':>10}{'KB':>12}{'speedup / size ratio vs json':>30}")
+    for rows in args.rows:
+        frame = make_history_frame(rows, "1min")
+        baseline = None
+        for name, encode in FORMATS.items():
+            seconds, payload = best_of(encode, frame, args.repeat)
+            if baseline is None:
+                baseline = (seconds, len(payload))
+            print(
+                f"{rows:>8}  {name:<8}{seconds * 1000:>10.1f}{len(payload) / 1024:>12.1f}"
+                f"{baseline[0] / seconds:>19.1f}x{baseline[1] / len(payload):>10.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
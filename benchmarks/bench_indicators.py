@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Cost of the technical indicators: full computation vs. incremental updates
+
+Two synthetic datasets: 10 years of daily bars and 30 sessions of 1 minute
+bars. For each, SMA/EMA/RSI/VWAP/Bollinger are timed computed from scratch
+(IndicatorState and, for comparison, the same indicators with pandas
+rolling/ewm/groupby), updated with `--new` bars appended to a state that
+has the rest, and converted to response values.
+
+$ python benchmarks/bench_indicators.py --new 1 5
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.indicators import IndicatorState, frame_to_indicators  # noqa: E402
+from benchmarks.synthetic import make_history_frame  # noqa: E402
+from benchmarks.timing import per_call  # noqa: E402
+
+
+def daily_bars(years: int) -> pd.DataFrame:
+    return make_history_frame(252 * years, "1B", start="2015-01-02 00:00")
+
+
+def minute_bars(sessions: int) -> pd.DataFrame:
+    days = pd.bdate_range("2024-01-02", periods=sessions)
+    return pd.concat([
+        make_history_frame(390, "1min", start=f"{day.date()} 09:30", seed=i) for i, day in enumerate(days)
+    ])
+
+
+def pandas_indicators(frame: pd.DataFrame, window: int = 20, rsi_period: int = 14, intraday: bool = True):
+    """The same indicators recomputed with pandas, the way a client would"""
+    close = frame["Close"]
+    sma = close.rolling(window).mean()
+    std = close.rolling(window).std(ddof=0)
+    ema = close.ewm(span=window, adjust=False).mean()
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / rsi_period, adjust=False).mean()
+    loss = (-delta).clip(lower=0).ewm(alpha=1 / rsi_period, adjust=False).mean()
+    session = frame.index.date if intraday else [0] * len(frame)
+    pv = (frame["High"] + frame["Low"] + close) / 3 * frame["Volume"]
+    vwap = pv.groupby(session).cumsum() / frame["Volume"].groupby(session).cumsum()
+    return pd.DataFrame({
+        "SMA": sma, "EMA": ema, "RSI": 100 - 100 / (1 + gain / loss), "VWAP": vwap,
+        "BollingerUpper": sma + 2 * std, "BollingerLower": sma - 2 * std,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=10, help="years of daily bars")
+    parser.add_argument("--sessions", type=int, default=30, help="sessions of 1 minute bars")
+    parser.add_argument("--new", type=int, nargs="+", default=[1, 5], help="bars appended per update")
+    parser.add_argument("--seconds", type=float, default=1.0, help="minimum time per measurement")
+    args = parser.parse_args()
+
+    datasets = [
+        (f"{args.years}y 1d", daily_bars(args.years), False),
+        (f"{args.sessions}d 1m", minute_bars(args.sessions), True),
+    ]
+    print(f"{'dataset':>10}{'bars':>8}{'full ms':>10}{'pandas ms':>11}{'new':>5}{'update ms':>11}{'values ms':>11}")
+    for name, frame, intraday in datasets:
+        def full():
+            state = IndicatorState(intraday=intraday)
+            state.update(frame)
+            return state.to_frame()
+
+        full_seconds = per_call(full, args.seconds)
+        pandas_seconds = per_call(lambda: pandas_indicators(frame, intraday=intraday), args.seconds)
+        values_seconds = per_call(lambda: frame_to_indicators(full()), args.seconds) - full_seconds
+        for new in args.new:
+            state = IndicatorState(intraday=intraday)
+            state.update(frame.iloc[:-new])
+            held = dict(state.arrays)
+
+            def update():
+                # Start from the state that has all but the new bars each time
+                state.arrays = dict(held)
+                state.update(frame)
+
+            update_seconds = per_call(update, args.seconds)
+            print(
+                f"{name:>10}{len(frame):>8}{full_seconds * 1000:>10.3f}{pandas_seconds * 1000:>11.3f}"
+                f"{new:>5}{update_seconds * 1000:>11.3f}{values_seconds * 1000:>11.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Memory of cached histories: HistoricalPrice lists vs DataFrames vs PriceSeries
+
+Builds one 1 minute session per ticker (1000 tickers x 390 bars by default)
+and measures with tracemalloc what holding all of them costs in each form,
+plus the time to turn one history back into a DataFrame and into response
+prices.
+
+$ python benchmarks/bench_series_memory.py --tickers 1000 --bars 390
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.finance import frame_to_prices  # noqa: E402
+from app.models import PriceSeries  # noqa: E402
+from benchmarks.synthetic import make_history_frame  # noqa: E402
+from benchmarks.timing import per_call  # noqa: E402
+
+
+def held_bytes(build) -> int:
+    """Bytes still allocated after `build()` returns, while its result is alive"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=1000, help="histories held")
+    parser.add_argument("--bars", type=int, default=390, help="1 minute bars per history")
+    parser.add_argument("--seconds", type=float, default=1.0, help="minimum time per measurement")
+    args = parser.parse_args()
+
+    total_bars = args.tickers * args.bars
+    forms = {
+        "prices": frame_to_prices,
+        "frame": lambda frame: frame,
+        "series": PriceSeries.from_frame,
+    }
+
+    def build(convert):
+        # Each history is generated inside the measurement and only its converted form is kept
+        return [convert(make_history_frame(args.bars, "1min", seed=i)) for i in range(args.tickers)]
+
+    print(f"{args.tickers} tickers x {args.bars} bars")
+    print(f"{'form':>8}{'MB':>10}{'B/bar':>10}")
+    for name, convert in forms.items():
+        size = held_bytes(lambda: build(convert))
+        print(f"{name:>8}{size / 1024 / 1024:>10.1f}{size / total_bars:>10.1f}")
+
+    series = PriceSeries.from_frame(make_history_frame(args.bars, "1min"))
+    to_frame = per_call(series.to_frame, args.seconds)
+    to_prices = per_call(lambda: frame_to_prices(series.to_frame()), args.seconds)
+    print(f"to_frame {to_frame * 1e6:.1f} us, to prices {to_prices * 1e6:.1f} us per history")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Cost of an intraday poll: the whole day vs. the bars since a cursor
+
+A poller that already has all but the last few bars of a 1 minute session
+either downloads the whole day again (GET /ticker/{ticker}) or only the
+bars since its last one (?since=). Both are timed from the cached session
+to the encoded JSON body, along with merging the next fetch into the
+intraday buffer.
+
+$ python benchmarks/bench_since.py --bars 390 960 --new 1 5
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.finance import frame_to_prices  # noqa: E402
+from app.intraday import IntradayBuffer  # noqa: E402
+from app.models import TickerResponse  # noqa: E402
+from benchmarks.synthetic import make_history_frame  # noqa: E402
+from benchmarks.timing import per_call  # noqa: E402
+
+
+def encode(frame) -> bytes:
+    return TickerResponse(ticker="AAPL", country="US", prices=frame_to_prices(frame)).model_dump_json().encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, nargs="+", default=[390, 960], help="bars in the session")
+    parser.add_argument("--new", type=int, nargs="+", default=[1, 5], help="bars the poller does not have")
+    parser.add_argument("--seconds", type=float, default=1.0, help="minimum time per measurement")
+    args = parser.parse_args()
+
+    print(f"{'bars':>6}{'new':>5}{'full ms':>10}{'since ms':>10}{'full KB':>10}{'since KB':>10}{'merge ms':>10}")
+    for bars in args.bars:
+        session = make_history_frame(bars, "1min")
+        buffer = IntradayBuffer(capacity=max(bars, 1440))
+        for new in args.new:
+            buffer.merge(session.iloc[:bars - new])
+            cursor = session.index[bars - new]
+
+            def merge():
+                # The next fetch of the session: everything but the new bars is known
+                buffer.merge(session.iloc[:bars - new])
+                buffer.merge(session)
+
+            full_seconds = per_call(lambda: encode(session), args.seconds)
+            since_seconds = per_call(lambda: encode(buffer.since(cursor)), args.seconds)
+            merge_seconds = per_call(merge, args.seconds)
+            print(
+                f"{bars:>6}{new:>5}{full_seconds * 1000:>10.3f}{since_seconds * 1000:>10.3f}"
+                f"{len(encode(session)) / 1024:>10.1f}{len(encode(buffer.since(cursor))) / 1024:>10.1f}"
+                f"{merge_seconds * 1000:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
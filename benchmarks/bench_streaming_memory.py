@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Peak memory of a large /ticker response: JSON vs NDJSON vs CSV streaming
+
+Each mode runs in its own subprocess so ru_maxrss is not shared between
+them. The upstream fetch is replaced by a synthetic 1 minute history and
+the request is sent straight to the ASGI app with a `send` that discards
+the body, so only the server side of the response is measured.
+
+$ python benchmarks/bench_streaming_memory.py --rows 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+MODES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+async def request(app, path: str, accept: str) -> dict:
+    """Send one GET through the ASGI interface and count the body bytes"""
+    from app.auth import API_KEY
+
+    result = {"status": None, "bytes": 0, "chunks": 0}
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"metadata=false",
+        "headers": [(b"accept", accept.encode()), (b"x-api-key", API_KEY.encode())],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+
+    requested = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Streaming responses listen for a disconnect while they send
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            result["bytes"] += len(message.get("body", b""))
+            result["chunks"] += 1
+
+    await app(scope, receive, send)
+    return result
+
+
+def run_mode(mode: str, rows: int) -> dict:
+    """Measure one response in the current process"""
+    import main
+    from benchmarks.synthetic import make_history_frame
+
+    frame = make_history_frame(rows, "1min")
+    before = peak_rss_mb()
+    started = time.perf_counter()
+    with patch("app.finance.fetch_history_frame", return_value=frame):
+        result = asyncio.run(request(main.app, "/ticker/AAPL", MODES[mode]))
+    return {
+        "mode": mode,
+        "rows": rows,
+        "status": result["status"],
+        "body_mb": result["bytes"] / 1024 / 1024,
+        "chunks": result["chunks"],
+        "seconds": time.perf_counter() - started,
+        "baseline_rss_mb": before,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--child", choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.child, args.rows)))
+        return
+
+    print(f"{'mode':<8}{'status':>8}{'body MB':>10}{'chunks':>8}{'seconds':>9}{'peak RSS MB':>13}{'growth MB':>11}")
+    for mode in args.modes:
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", mode, "--rows", str(args.rows)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{r['mode']:<8}{r['status']:>8}{r['body_mb']:>10.1f}{r['chunks']:>8}{r['seconds']:>9.2f}"
+            f"{r['peak_rss_mb']:>13.1f}{r['peak_rss_mb'] - r['baseline_rss_mb']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
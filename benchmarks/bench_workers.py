@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Requests per second of the production server from 1 to N workers
+
+A mock upstream speaking the HTTPProvider protocol runs in this process
+and answers every history request after a fixed latency. For each worker
+count, `python main.py --production --workers N` is started with
+PROVIDER_ROUTES=*=http pointing at the mock, and several client processes
+keep `--concurrency` requests in flight each for `--seconds`.
+
+Requests cycle through `--tickers` symbols: with few symbols almost every
+request is a cache hit (framework and serialization cost), with many the
+upstream path is exercised as well.
+
+$ python benchmarks/bench_workers.py --workers 1 2 4 --clients 4 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+import httpx
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_history_frame  # noqa: E402
+
+API_KEY = "bench-api-key"
+
+
+def make_upstream_handler(latency: float, bars: int):
+    # Bars of the current New York session, so requests for today find them
+    session = pd.Timestamp.now(tz="America/New_York").strftime("%Y-%m-%d 09:30")
+    frame = make_history_frame(bars, "1min", start=session)
+    payload = json.dumps({
+        "tz": "America/New_York",
+        "bars": [
+            {
+                "timestamp": int(ts.timestamp()),
+                "open": row.Open,
+                "high": row.High,
+                "low": row.Low,
+                "close": row.Close,
+                "volume": int(row.Volume),
+            }
+            for ts, row in zip(frame.index, frame.itertuples())
+        ],
+    }).encode()
+
+    class UpstreamHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            body = payload if self.path.startswith("/history/") else b"{}"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return UpstreamHandler
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/openapi.json", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+async def client_loop(url: str, concurrency: int, seconds: float, tickers: int, offset: int) -> Tuple[int, int]:
+    """Return the number of successful and failed requests"""
+    deadline = time.monotonic() + seconds
+    completed = failed = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, headers={"X-API-Key": API_KEY}, limits=limits) as client:
+        async def worker(i: int) -> None:
+            nonlocal completed, failed
+            n = i
+            while time.monotonic() < deadline:
+                response = await client.get(f"/ticker/T{(offset + n) % tickers}", params={"metadata": "false"})
+                if response.is_success:
+                    completed += 1
+                else:
+                    failed += 1
+                n += concurrency
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return completed, failed
+
+
+def run_client(args) -> Tuple[int, int]:
+    return asyncio.run(client_loop(*args))
+
+
+def measure(workers: int, upstream_url: str, args) -> Tuple[float, int]:
+    """Return requests per second and the number of failed requests"""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = dict(
+        os.environ,
+        API_KEY=API_KEY,
+        PROVIDER_ROUTES="*=http",
+        HTTP_PROVIDER_URL=upstream_url,
+        FINANCE_DATA_DIR=tempfile.mkdtemp(prefix="bench-workers-"),
+        SERVER_LOOP=args.loop,
+        SERVER_HTTP=args.http,
+    )
+    server = subprocess.Popen(
+        [sys.executable, "main.py", "--production", "--workers", str(workers), "--host", "127.0.0.1",
+         "--port", str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(url)
+        # Warm up the caches of every worker
+        with multiprocessing.Pool(args.clients) as pool:
+            pool.map(run_client, [(url, args.concurrency, 1.0, args.tickers, i) for i in range(args.clients)])
+            started = time.perf_counter()
+            counts = pool.map(
+                run_client,
+                [(url, args.concurrency, args.seconds, args.tickers, i * 7919) for i in range(args.clients)]
+            )
+            elapsed = time.perf_counter() - started
+        return sum(ok for ok, _ in counts) / elapsed, sum(failed for _, failed in counts)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight per client")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="mock upstream latency in seconds")
+    parser.add_argument("--bars", type=int, default=390, help="bars per mock history response")
+    parser.add_argument("--loop", default="auto", help="SERVER_LOOP (auto, asyncio, uvloop)")
+    parser.add_argument("--http", default="auto", help="SERVER_HTTP (auto, h11, httptools)")
+    args = parser.parse_args()
+
+    upstream = ThreadingHTTPServer(("127.0.0.1", 0), make_upstream_handler(args.latency, args.bars))
+    threading.Thread(target=upstream.serve_forever, daemon=True).start()
+    upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}"
+
+    print(f"{'workers':>8}{'req/s':>12}{'scaling':>10}{'errors':>8}   ({os.cpu_count()} CPUs)")
+    baseline = None
+    for workers in args.workers:
+        rate, failed = measure(workers, upstream_url, args)
+        baseline = baseline or rate
+        print(f"{workers:>8}{rate:>12,.0f}{rate / baseline:>9.2f}x{failed:>8}")
+    upstream.shutdown()
+
+
+if __name__ == "__main__":
+    main()
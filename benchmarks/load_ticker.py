@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Load test for the /ticker endpoint against a simulated slow upstream
+
+Yahoo Finance is replaced by a fake that sleeps for a fixed latency, and a
+batch of concurrent requests is sent through an in-process ASGI client. The
+test is run twice per latency: once with the fetch called directly on the
+event loop (the old behaviour) and once through afetch_historical_data.
+
+$ python benchmarks/load_ticker.py --concurrency 32 --latency 0.05 0.1 0.2
+
+With the blocking path p99 grows with concurrency x latency; with the async
+path it stays close to the upstream latency as long as concurrency fits in
+FETCH_MAX_WORKERS.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import date
+from unittest.mock import patch
+
+import httpx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import main  # noqa: E402
+from app import finance  # noqa: E402
+from app.auth import API_KEY  # noqa: E402
+from app.models import HistoricalPrice, TickerResponse  # noqa: E402
+
+
+def make_fake_upstream(latency: float):
+    """Return a fetch_from_provider replacement that sleeps for `latency` seconds"""
+    def fake_fetch_from_provider(ticker, country, specific_date=None, **kwargs):
+        time.sleep(latency)
+        return TickerResponse(
+            ticker=ticker,
+            country=country,
+            prices=[
+                HistoricalPrice(
+                    date=date.today(),
+                    time="09:30:00",
+                    open=150.0,
+                    high=155.0,
+                    low=149.0,
+                    close=153.0,
+                    volume=1000000
+                )
+            ],
+            metadata={"data_source": "Fake Yahoo"}
+        )
+    return fake_fetch_from_provider
+
+
+async def blocking_fetch(ticker, specific_date=None, country=None, **kwargs):
+    """The pre-async behaviour: call the synchronous fetch on the event loop"""
+    return finance.fetch_historical_data(ticker, specific_date, country, **kwargs)
+
+
+async def run_batch(concurrency: int) -> list:
+    """Send `concurrency` simultaneous requests and return their latencies"""
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int) -> float:
+            started = time.perf_counter()
+            response = await client.get(f"/ticker/T{i}", headers={"X-API-Key": API_KEY})
+            response.raise_for_status()
+            return time.perf_counter() - started
+
+        return await asyncio.gather(*(one(i) for i in range(concurrency)))
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, nargs="+", default=[0.05, 0.1, 0.2])
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'latency':>10}{'p50':>10}{'p99':>10}")
+    for latency in args.latency:
+        with patch.object(finance, "fetch_from_provider", make_fake_upstream(latency)):
+            for mode in ("blocking", "async"):
+                if mode == "blocking":
+                    with patch.object(main, "afetch_historical_data", blocking_fetch):
+                        latencies = asyncio.run(run_batch(args.concurrency))
+                else:
+                    latencies = asyncio.run(run_batch(args.concurrency))
+                print(
+                    f"{mode:<10}{latency:>10.3f}"
+                    f"{statistics.median(latencies):>10.3f}{percentile(latencies, 99):>10.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main_cli()
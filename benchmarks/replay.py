@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for Yahoo Finance: replays recorded or synthetic history
+
+ReplayProvider answers history(), info and download() like YahooProvider,
+from files recorded with this script or from a deterministic synthetic
+price walk, after an injected latency and with an injected error rate.
+Installed as the "yahoo" provider it takes the same code paths as the real
+upstream, including the batch download prefetch.
+
+Record real data once (needs network) and replay it later:
+
+$ python benchmarks/replay.py record AAPL MSFT 005930.KS --period 1y --interval 1d --out benchmarks/recordings
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.providers import FileProvider, Provider, YahooProvider, empty_history, upstream_call  # noqa: E402
+
+# Calendar the synthetic daily walk is drawn over
+SYNTHETIC_EPOCH = date(2000, 1, 3)
+SESSION_OPEN = (9, 30)
+SESSION_MINUTES = 390
+INTERVAL_MINUTES = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30, "60m": 60, "90m": 90, "1h": 60}
+
+
+class InjectedUpstreamError(ConnectionError):
+    """Raised by ReplayProvider to simulate an upstream failure"""
+
+
+def _seed(*parts: Any) -> int:
+    return zlib.crc32("|".join(map(str, parts)).encode())
+
+
+class SyntheticMarket:
+    """
+    Deterministic OHLCV bars for any ticker, session and interval
+
+    Every ticker has a daily close walk from SYNTHETIC_EPOCH to today;
+    intraday bars walk around the day's close with a per-session seed, so
+    the same bar has the same values whatever range it is requested in.
+    """
+
+    def __init__(self, timezone_for: Callable[[str], str] = lambda ticker: "America/New_York"):
+        self.timezone_for = timezone_for
+        self._closes: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _daily_closes(self, ticker: str) -> np.ndarray:
+        with self._lock:
+            closes = self._closes.get(ticker)
+            if closes is None:
+                # A few spare days so a run going past midnight stays in range
+                days = (date.today() - SYNTHETIC_EPOCH).days + 10
+                rng = np.random.default_rng(_seed(ticker))
+                closes = 20 + 180 * rng.random() + np.cumsum(rng.normal(0, 1, days)) * 0.5
+                closes = np.abs(closes) + 1.0
+                self._closes[ticker] = closes
+            return closes
+
+    def sessions(
+        self,
+        ticker: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        period: Optional[str] = None
+    ) -> List[date]:
+        """Weekdays in [start, end), or the last N up to today for a "Nd" period"""
+        today = pd.Timestamp.now(tz=self.timezone_for(ticker)).date()
+        if period:
+            count = int(period[:-1]) if period.endswith("d") and period[:-1].isdigit() else 1
+            sessions: List[date] = []
+            day = today
+            while len(sessions) < count:
+                if day.weekday() < 5:
+                    sessions.append(day)
+                day -= timedelta(days=1)
+            return sessions[::-1]
+        start = max(start or SYNTHETIC_EPOCH, SYNTHETIC_EPOCH)
+        end = min(end or today + timedelta(days=1), today + timedelta(days=1))
+        return [d.date() for d in pd.bdate_range(start, end - timedelta(days=1))] if start < end else []
+
+    def history(
+        self,
+        ticker: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        interval: str = "1d",
+        period: Optional[str] = None
+    ) -> pd.DataFrame:
+        sessions = self.sessions(ticker, start, end, period)
+        if not sessions:
+            return empty_history()
+        tz_name = self.timezone_for(ticker)
+        closes = self._daily_closes(ticker)
+        offsets = np.array([(session - SYNTHETIC_EPOCH).days for session in sessions])
+        step = INTERVAL_MINUTES.get(interval)
+
+        if step is None:
+            close = closes[offsets]
+            open_ = closes[np.maximum(offsets - 1, 0)]
+            index = pd.DatetimeIndex(pd.to_datetime(sessions)).tz_localize(tz_name)
+            spread = np.abs(close - open_) * 0.5 + close * 0.005
+            bar_ids = offsets
+        else:
+            bars = SESSION_MINUTES // step
+            minutes = np.arange(bars) * step
+            index_parts, open_parts, close_parts = [], [], []
+            for session, offset in zip(sessions, offsets):
+                rng = np.random.default_rng(_seed(ticker, session, step))
+                walk = closes[offset] * (1 + np.cumsum(rng.normal(0, 0.0008, bars)))
+                open_parts.append(np.concatenate(([closes[max(offset - 1, 0)]], walk[:-1])))
+                close_parts.append(walk)
+                session_open = pd.Timestamp(datetime(session.year, session.month, session.day, *SESSION_OPEN))
+                index_parts.append(session_open + pd.to_timedelta(minutes, unit="m"))
+            open_, close = np.concatenate(open_parts), np.concatenate(close_parts)
+            index = pd.DatetimeIndex(np.concatenate([part.values for part in index_parts])).tz_localize(tz_name)
+            spread = close * 0.0005
+            bar_ids = (offsets[:, None] * bars + np.arange(bars)).ravel()
+
+        volume = (np.abs(np.sin(bar_ids)) * 1e6).astype(np.int64) + 1000
+        return pd.DataFrame(
+            {
+                "Open": open_,
+                "High": np.maximum(open_, close) + spread,
+                "Low": np.minimum(open_, close) - spread,
+                "Close": close,
+                "Volume": volume,
+            },
+            index=index
+        )
+
+    def info(self, ticker: str) -> Dict[str, Any]:
+        return {
+            "shortName": f"{ticker} Replay Corp.",
+            "sector": "Technology",
+            "industry": "Software",
+            "currency": "USD",
+            "exchange": "RPL",
+        }
+
+
+class ReplayProvider(YahooProvider):
+    """
+    YahooProvider replaying recorded or synthetic data with injected latency and errors
+
+    Args:
+        source: Provider with recorded data (e.g. a FileProvider over
+            recordings); tickers it has no bars for fall back to the synthetic market
+        latency: Seconds every call takes
+        jitter: Extra seconds drawn uniformly from [0, jitter] per call
+        error_rate: Probability that a call raises InjectedUpstreamError
+        limited: Route calls through the upstream limiter and circuit breaker
+            like real Yahoo calls
+        timezone_for: Exchange time zone of a ticker for synthetic bars
+        seed: Seed of the latency and error draws
+    """
+
+    def __init__(
+        self,
+        source: Optional[Provider] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        limited: bool = False,
+        timezone_for: Callable[[str], str] = lambda ticker: "America/New_York",
+        seed: int = 0
+    ):
+        self.source = source
+        self.market = SyntheticMarket(timezone_for)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.limited = limited
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def _call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if self.limited:
+            return upstream_call(self._replay, fn, *args, **kwargs)
+        return self._replay(fn, *args, **kwargs)
+
+    def _replay(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            raise InjectedUpstreamError("Injected upstream error")
+        return fn(*args, **kwargs)
+
+    def _history(self, ticker, start=None, end=None, interval="1d", period=None) -> pd.DataFrame:
+        if self.source is not None:
+            try:
+                data = self.source.history(ticker, start=start, end=end, interval=interval, period=period)
+            except FileNotFoundError:
+                data = None
+            if data is not None and not data.empty:
+                return data
+        return self.market.history(ticker, start=start, end=end, interval=interval, period=period)
+
+    def history(self, ticker, start=None, end=None, interval="1d", period=None):
+        return self._call(self._history, ticker, start=start, end=end, interval=interval, period=period)
+
+    def _info(self, ticker: str) -> Dict[str, Any]:
+        info = self.source.info(ticker) if self.source is not None else {}
+        return info or self.market.info(ticker)
+
+    def info(self, ticker):
+        return self._call(self._info, ticker)
+
+    def _download(self, tickers: List[str], start=None, end=None, period=None, interval="1d", **kwargs):
+        frames = {ticker: self._history(ticker, start=start, end=end, interval=interval, period=period)
+                  for ticker in tickers}
+        frames = {ticker: frame for ticker, frame in frames.items() if not frame.empty}
+        if not frames:
+            return pd.DataFrame()
+        # Like yf.download(group_by="ticker"): one (ticker, field) column pair per symbol
+        return pd.concat(frames, axis=1)
+
+    def download(self, tickers: List[str], **kwargs) -> pd.DataFrame:
+        return self._call(self._download, tickers, **kwargs)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "errors": self.errors}
+
+
+def install_replay(provider: ReplayProvider) -> None:
+    """
+    Serve every country from `provider` and start from empty caches
+    """
+    from app.cache import get_cache
+    from app.finance import last_good_responses, register_provider, set_provider_routes
+    from app.metadata import get_metadata_store
+    from app.store import get_price_store
+
+    register_provider("yahoo", provider)
+    set_provider_routes("*=yahoo")
+    for store in (get_cache(), last_good_responses, get_metadata_store(), get_price_store()):
+        store.clear()
+
+
+def replay_provider_for(recordings: Optional[str] = None, **kwargs) -> ReplayProvider:
+    """
+    Build a ReplayProvider with exchange time zones from app.finance
+    """
+    from app.finance import get_country_timezone, get_ticker_country
+
+    def timezone_for(symbol: str) -> str:
+        return get_country_timezone(get_ticker_country(symbol))
+
+    source = FileProvider(recordings, timezone_for=timezone_for) if recordings else None
+    return ReplayProvider(source=source, timezone_for=timezone_for, **kwargs)
+
+
+def record(tickers: List[str], out: str, period: str, interval: str) -> None:
+    """
+    Save real Yahoo Finance history and metadata in the FileProvider layout
+    """
+    import yfinance as yf
+
+    os.makedirs(os.path.join(out, interval), exist_ok=True)
+    os.makedirs(os.path.join(out, "info"), exist_ok=True)
+    for ticker in tickers:
+        source = yf.Ticker(ticker)
+        frame = source.history(period=period, interval=interval)[["Open", "High", "Low", "Close", "Volume"]]
+        frame.to_parquet(os.path.join(out, interval, f"{ticker}.parquet"))
+        info = {key: source.info.get(key) for key in ("shortName", "sector", "industry", "currency", "exchange")}
+        with open(os.path.join(out, "info", f"{ticker}.json"), "w", encoding="utf-8") as f:
+            json.dump(info, f)
+        print(f"{ticker}: {len(frame)} bars")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="record real history for later replay")
+    record_parser.add_argument("tickers", nargs="+")
+    record_parser.add_argument("--period", default="1y")
+    record_parser.add_argument("--interval", default="1d")
+    record_parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "recordings"))
+    args = parser.parse_args()
+    record(args.tickers, args.out, args.period, args.interval)
+
+
+if __name__ == "__main__":
+    main()
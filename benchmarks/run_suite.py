@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput and latency of main.app without network
+
+Yahoo Finance is replaced by benchmarks/replay.py (recorded or synthetic
+bars after an injected latency and error rate) and requests go through an
+in-process ASGI client, so the whole stack is measured: routing, auth,
+caches, provider calls, conversion and serialization. Workloads:
+
+- single_cold: one /ticker request at a time, every ticker fetched upstream
+- single_warm: the same requests again, served from the caches
+- batch: POST /tickers/batch of --batch-size tickers, caches cleared first
+- concurrent: --concurrency clients on --tickers symbols, cold caches
+- range: one year of daily bars per request, cold caches
+
+Results are written as JSON; --compare reports the change against an
+earlier run and exits with 1 if a workload got slower than --threshold.
+
+$ python benchmarks/run_suite.py --output results.json
+$ git checkout other-branch && python benchmarks/run_suite.py --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+# Keep the price store of the run away from the real data directory
+os.environ.setdefault("FINANCE_DATA_DIR", tempfile.mkdtemp(prefix="bench-suite-"))
+
+import main  # noqa: E402
+from app.auth import API_KEY  # noqa: E402
+from app.warmup import get_finance_loader  # noqa: E402
+from benchmarks.replay import install_replay, replay_provider_for  # noqa: E402
+
+WORKLOADS = ("single_cold", "single_warm", "batch", "concurrent", "range")
+# A fixed past session, so every run requests the same bars
+SESSION = date(2024, 3, 5)
+RANGE = (date(2023, 3, 6), date(2024, 3, 5))
+
+# (ok, seconds) of one request
+Timing = Tuple[bool, float]
+
+
+async def timed(request: Callable[[], Awaitable[httpx.Response]]) -> Timing:
+    started = time.perf_counter()
+    try:
+        response = await request()
+        ok = response.is_success
+    except httpx.HTTPError:
+        ok = False
+    return ok, time.perf_counter() - started
+
+
+def summarize(timings: List[Timing], seconds: float, requests_per_call: int = 1) -> Dict[str, float]:
+    latencies = np.array([elapsed for _, elapsed in timings]) * 1000
+    errors = sum(1 for ok, _ in timings if not ok)
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "tickers": len(timings) * requests_per_call,
+        "seconds": round(seconds, 4),
+        "rps": round(len(timings) / seconds, 2) if seconds else 0.0,
+        "mean_ms": round(float(latencies.mean()), 3),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+class Suite:
+    def __init__(self, client: httpx.AsyncClient, provider, args):
+        self.client = client
+        self.provider = provider
+        self.args = args
+        self.tickers = [f"T{i:04d}" for i in range(args.tickers)]
+
+    def reset(self) -> None:
+        install_replay(self.provider)
+
+    def ticker(self, symbol: str, **params) -> Callable[[], Awaitable[httpx.Response]]:
+        return lambda: self.client.get(f"/ticker/{symbol}", params=params)
+
+    async def sequential(self, requests: List[Callable[[], Awaitable[httpx.Response]]]) -> Dict[str, float]:
+        started = time.perf_counter()
+        timings = [await timed(request) for request in requests]
+        return summarize(timings, time.perf_counter() - started)
+
+    async def single_cold(self) -> Dict[str, float]:
+        self.reset()
+        symbols = self.tickers[:self.args.requests]
+        return await self.sequential([self.ticker(symbol, date=SESSION.isoformat()) for symbol in symbols])
+
+    async def single_warm(self) -> Dict[str, float]:
+        # Runs after single_cold, whose responses are still cached
+        symbols = self.tickers[:self.args.requests]
+        return await self.sequential([self.ticker(symbol, date=SESSION.isoformat()) for symbol in symbols])
+
+    async def batch(self) -> Dict[str, float]:
+        self.reset()
+        size = self.args.batch_size
+        batches = [self.tickers[i:i + size] for i in range(0, len(self.tickers), size)]
+        failed_tickers = 0
+
+        async def post(chunk: List[str]) -> httpx.Response:
+            nonlocal failed_tickers
+            response = await self.client.post(
+                "/tickers/batch",
+                json={"tickers": [{"ticker": symbol, "date": SESSION.isoformat()} for symbol in chunk]}
+            )
+            if response.is_success:
+                # Failed tickers are reported inside a successful batch response
+                failed_tickers += sum(1 for item in response.json()["results"] if item.get("error"))
+            return response
+
+        started = time.perf_counter()
+        timings = [await timed(lambda chunk=chunk: post(chunk)) for chunk in batches]
+        result = summarize(timings, time.perf_counter() - started, size)
+        result["ticker_errors"] = failed_tickers
+        return result
+
+    async def concurrent(self) -> Dict[str, float]:
+        self.reset()
+        timings: List[Timing] = []
+        count = self.args.requests * self.args.concurrency // 4 or 1
+
+        async def client_loop(offset: int) -> None:
+            for n in range(offset, count, self.args.concurrency):
+                symbol = self.tickers[n % len(self.tickers)]
+                timings.append(await timed(self.ticker(symbol, date=SESSION.isoformat())))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(i) for i in range(self.args.concurrency)))
+        return summarize(timings, time.perf_counter() - started)
+
+    async def range(self) -> Dict[str, float]:
+        self.reset()
+        start, end = RANGE
+        symbols = self.tickers[:max(1, self.args.requests // 4)]
+        return await self.sequential([
+            self.ticker(symbol, start=start.isoformat(), end=end.isoformat(), interval="1d", metadata="false")
+            for symbol in symbols
+        ])
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args) -> Dict[str, Any]:
+    provider = replay_provider_for(
+        args.recordings,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        limited=args.limited,
+        seed=args.seed
+    )
+    # Like the production supervisor: load the finance subsystem before serving
+    get_finance_loader().load()
+    install_replay(provider)
+
+    transport = httpx.ASGITransport(app=main.app)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers={"X-API-Key": API_KEY}, limits=limits, timeout=None
+    ) as client:
+        suite = Suite(client, provider, args)
+        results = {}
+        for name in args.workloads:
+            calls = provider.stats()["calls"]
+            results[name] = await getattr(suite, name)()
+            results[name]["upstream_calls"] = provider.stats()["calls"] - calls
+            print(format_row(name, results[name]), flush=True)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "results": results,
+    }
+
+
+def format_row(name: str, result: Dict[str, float]) -> str:
+    return (
+        f"{name:<12}{result['requests']:>9}{result['errors']:>8}{result['rps']:>10,.1f}"
+        f"{result['mean_ms']:>10.2f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+    )
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> bool:
+    """Print the change per workload; return False if any workload regressed"""
+    ok = True
+    print(f"\ncompared with {baseline['meta']['commit']} ({baseline['meta']['timestamp']})")
+    print(f"{'workload':<12}{'rps':>10}{'p50':>10}{'p99':>10}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+        changes = {
+            "rps": result["rps"] / before["rps"] - 1 if before["rps"] else 0.0,
+            "p50": result["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0,
+            "p99": result["p99_ms"] / before["p99_ms"] - 1 if before["p99_ms"] else 0.0,
+        }
+        # Lower throughput or higher median latency is a regression; p99 is too noisy to gate on
+        regressed = changes["rps"] < -threshold or changes["p50"] > threshold
+        ok = ok and not regressed
+        print(
+            f"{name:<12}{changes['rps']:>+10.1%}{changes['p50']:>+10.1%}{changes['p99']:>+10.1%}"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    return ok
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--tickers", type=int, default=200, help="distinct symbols")
+    parser.add_argument("--requests", type=int, default=100, help="requests of the sequential workloads")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.02, help="upstream latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="extra random upstream latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of upstream calls that fail")
+    parser.add_argument("--limited", action="store_true", help="apply the upstream limiter and circuit breaker")
+    parser.add_argument("--recordings", help="directory written by `replay.py record`; synthetic bars otherwise")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    print(f"{'workload':<12}{'requests':>9}{'errors':>8}{'req/s':>10}{'mean ms':>10}{'p50 ms':>10}"
+          f"{'p95 ms':>10}{'p99 ms':>10}")
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
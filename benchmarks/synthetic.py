@@ -0,0 +1,44 @@
+"""
+Synthetic yfinance-shaped price history for benchmarks
+"""
+import numpy as np
+import pandas as pd
+
+
+def make_history_frame(
+    rows: int,
+    freq: str = "1min",
+    start: str = "2020-01-02 09:30",
+    tz: str = "America/New_York",
+    seed: int = 0
+) -> pd.DataFrame:
+    """
+    Build a DataFrame with the columns and index yfinance's history() returns
+
+    Args:
+        rows: Number of bars
+        freq: pandas frequency of the bars ("1min", "1D", ...)
+        start: Timestamp of the first bar in exchange local time
+        tz: Exchange time zone
+        seed: Random seed for the price walk
+
+    Returns:
+        DataFrame with Open/High/Low/Close/Volume columns and a tz-aware DatetimeIndex
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start=start, periods=rows, freq=freq, tz=tz)
+    close = 100.0 + np.cumsum(rng.normal(0, 0.1, rows))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.05, rows))
+    return pd.DataFrame(
+        {
+            "Open": open_,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Close": close,
+            "Volume": rng.integers(1_000, 1_000_000, rows),
+            "Dividends": np.zeros(rows),
+            "Stock Splits": np.zeros(rows),
+        },
+        index=index
+    )
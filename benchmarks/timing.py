@@ -0,0 +1,16 @@
+"""
+Timing helpers for benchmarks
+"""
+import time
+
+
+def per_call(fn, min_seconds: float) -> float:
+    """Mean seconds of `fn` over at least `min_seconds`"""
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return elapsed / calls
@@ -0,0 +1,46 @@
+import argparse
+import logging
+import signal
+
+from dotenv import load_dotenv
+
+# Settings are read from the environment at import time
+load_dotenv()
+
+from app.collector import (  # noqa: E402
+    Collector, load_watchlist, COLLECTOR_WATCHLIST, COLLECTOR_MAX_WORKERS, COLLECTOR_JITTER_SECONDS
+)
+
+
+def main():
+    """Run the watchlist collector until interrupted"""
+    parser = argparse.ArgumentParser(description="Collect watchlist prices into the local store after each market close")
+    parser.add_argument("--watchlist", default=COLLECTOR_WATCHLIST, help="File with one ticker per line")
+    parser.add_argument("--workers", type=int, default=COLLECTOR_MAX_WORKERS, help="Concurrent upstream fetches")
+    parser.add_argument("--jitter", type=float, default=COLLECTOR_JITTER_SECONDS,
+                        help="Seconds over which each exchange's fetches are spread")
+    parser.add_argument("--once", action="store_true", help="Collect the last closed session and exit")
+    parser.add_argument("--no-catch-up", action="store_true",
+                        help="Wait for the next close instead of collecting the last one at startup")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    collector = Collector(load_watchlist(args.watchlist), max_workers=args.workers, jitter_seconds=args.jitter)
+
+    if args.once:
+        collector.run_once()
+        collector.stop()
+        return
+
+    signal.signal(signal.SIGTERM, lambda *_: collector.stop(wait=False))
+    collector.start(catch_up=not args.no_catch_up)
+    try:
+        collector.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.stop(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,55 @@
-import uvicorn
-from fastapi import FastAPI, Depends, HTTPException, status
+import argparse
+import importlib
+import sys
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, status, Header, Query, WebSocket
+from fastapi.responses import Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import date
-from typing import Optional
+from datetime import date, datetime
+from typing import Optional, Dict, Any
 
-from app.models import TokenRequest, Token, TickerResponse
+from app.models import (
+    TokenRequest, Token, TickerResponse, BatchTickerRequest, BatchTickerResponse, TickerRequest, Interval, Resample,
+    IndicatorResponse, BAR_SECONDS, INTRADAY_MAX_DAYS
+)
 from app.auth import authenticate_client, verify_token, verify_api_key
-from app.finance import fetch_historical_data
+from app.apikeys import get_api_key_registry
+from app.cache import get_cache
+from app.breaker import get_circuit_breaker
+from app.limiter import TickerNotFoundError, UpstreamBusyError, get_upstream_limiter
+from app.metrics import REGISTRY, SERIALIZATION_SECONDS, MetricsMiddleware, PROMETHEUS_MEDIA_TYPE, flatten_stats
+from app.mediatypes import negotiate_format, JSON_MEDIA_TYPE, STREAMING_MEDIA_TYPES, BINARY_MEDIA_TYPES
+from app.metadata import get_metadata_store
+from app.server import SERVER_HOST, SERVER_MODE, SERVER_PORT, serve
+from app.warmup import FINANCE_WARMUP, get_finance_loader
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start loading the finance subsystem and release its fetch workers when the application stops"""
+    loader = get_finance_loader()
+    if FINANCE_WARMUP == "eager":
+        await loader.wait()
+    elif FINANCE_WARMUP == "background":
+        loader.start()
+    yield
+    if not loader.ready:
+        # A warm-up still importing in the background leaves partially initialized
+        # modules in sys.modules, and nothing has been started that needs stopping
+        return
+    if "app.stream" in sys.modules:
+        sys.modules["app.stream"].get_stream_hub().clear()
+    if "app.finance" in sys.modules:
+        sys.modules["app.finance"].shutdown_fetch_executor()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="Finance Collector API",
     description="API for collecting financial data from various sources",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -23,6 +60,86 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+
+# pandas and yfinance are imported by app.warmup in the background, so the
+# data layer is only reached through these helpers
+
+async def load_finance(module: str = "app.finance"):
+    """
+    Return a finance subsystem module, waiting for the warm-up if it is still running
+    """
+    await get_finance_loader().wait()
+    return importlib.import_module(module)
+
+async def afetch_historical_data(*args, **kwargs) -> TickerResponse:
+    finance = await load_finance()
+    return await finance.afetch_historical_data(*args, **kwargs)
+
+async def afetch_history_frame(*args, **kwargs):
+    finance = await load_finance()
+    return await finance.afetch_history_frame(*args, **kwargs)
+
+async def afetch_many(*args, **kwargs):
+    finance = await load_finance()
+    return await finance.afetch_many(*args, **kwargs)
+
+def validate_range(
+    specific_date: Optional[date], start: Optional[date], end: Optional[date], since: Optional[datetime] = None
+) -> None:
+    """
+    Reject contradictory date, range and cursor query parameters
+    """
+    if specific_date and (start or end):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either date or start/end, not both"
+        )
+    if end and not start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end requires start"
+        )
+    if start and end and end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must not be before start"
+        )
+    if since and (specific_date or start):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="since only applies to the latest trading day, not to a date or range"
+        )
+
+def validate_interval(interval: Optional[str], first_date: Optional[date]) -> None:
+    """
+    Reject intraday bars from before the days Yahoo Finance keeps them for
+    """
+    if not first_date or interval not in INTRADAY_MAX_DAYS:
+        return
+    if (date.today() - first_date).days > INTRADAY_MAX_DAYS[interval]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{interval} bars are only available for the last {INTRADAY_MAX_DAYS[interval]} days"
+        )
+
+def validate_resample(interval: Optional[str], resample: Optional[str], dated: bool) -> None:
+    """
+    Reject a resample bar size that is not a whole multiple of the fetched interval
+    """
+    if not resample:
+        return
+    interval = interval or ("1d" if dated else "1m")
+    if interval not in BAR_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"resample needs a fixed-length interval, not {interval}"
+        )
+    if BAR_SECONDS[resample] <= BAR_SECONDS[interval] or BAR_SECONDS[resample] % BAR_SECONDS[interval]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"resample must be a multiple of the {interval} interval"
+        )
 
 @app.post("/token", response_model=Token)
 async def login_for_access_token(token_request: TokenRequest):
@@ -31,11 +148,56 @@ async def login_for_access_token(token_request: TokenRequest):
     """
     return authenticate_client(token_request)
 
-@app.get("/ticker/{ticker}", response_model=TickerResponse)
+def upstream_busy(error: UpstreamBusyError) -> HTTPException:
+    """
+    Report an upstream call rejected by the limiter as a retryable 503
+    """
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": str(max(1, round(error.retry_after)))}
+    )
+
+# Alternative representations of the /ticker endpoints, selected by the Accept header
+PRICE_RESPONSES = {
+    200: {"content": {media_type: {} for media_type in STREAMING_MEDIA_TYPES + BINARY_MEDIA_TYPES}}
+}
+
+def json_response(model) -> Response:
+    """
+    Serialize a response model directly with pydantic-core, timing the encoding
+    """
+    with SERIALIZATION_SECONDS.time(format="json"):
+        content = model.model_dump_json()
+    return Response(content=content, media_type=JSON_MEDIA_TYPE)
+
+def timed_encode(encode, frame, media_type: str) -> bytes:
+    with SERIALIZATION_SECONDS.time(format=media_type):
+        return encode(frame, media_type)
+
+async def frame_response(frame, media_type: str) -> Response:
+    """
+    Build a non-JSON /ticker response directly from the price DataFrame
+    """
+    formats = await load_finance("app.formats")
+    if media_type in STREAMING_MEDIA_TYPES:
+        return StreamingResponse(formats.stream_frame(frame, media_type), media_type=media_type)
+    # Arrow/Parquet encoding is CPU bound, keep it off the event loop
+    content = await run_in_threadpool(timed_encode, formats.encode_frame, frame, media_type)
+    return Response(content=content, media_type=media_type)
+
+@app.get("/ticker/{ticker}", response_model=TickerResponse, responses=PRICE_RESPONSES)
 async def get_ticker_data(
     ticker: str,
     date: Optional[date] = None,
     country: Optional[str] = None,
+    metadata: bool = True,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    interval: Optional[Interval] = None,
+    resample: Optional[Resample] = None,
+    since: Optional[datetime] = None,
+    accept: Optional[str] = Header(None),
     api_key: bool = Depends(verify_api_key)
 ):
     """
@@ -44,27 +206,54 @@ async def get_ticker_data(
     - **ticker**: The ticker symbol (e.g., AAPL for Apple)
     - **date**: Optional specific date to fetch data for (format: YYYY-MM-DD)
     - **country**: Optional country override
+    - **metadata**: Set to false to skip the name/sector/industry lookup
+    - **start**: Optional first date of a range (format: YYYY-MM-DD)
+    - **end**: Optional last date of a range, inclusive (defaults to today)
+    - **interval**: Optional bar interval (1m for the latest day, 1d for dates and ranges by default)
+    - **resample**: Optional larger bar size the `interval` bars are aggregated into on the server
+      (e.g. 5m, 1h), aligned to midnight in the exchange time zone
+    - **since**: Optional cursor for the latest day (ISO time, exchange time zone if naive, or epoch
+      seconds): only bars from then on are returned, including the bar at `since`, which may have changed
+    - **Accept**: `application/x-ndjson` or `text/csv` to stream the prices instead of JSON,
+      `application/vnd.apache.arrow.stream` or `application/vnd.apache.parquet` for columnar binary output
     - **X-API-Key**: Required API key in header
     """
+    validate_range(date, start, end, since)
+    validate_interval(interval, date or start)
+    validate_resample(interval, resample, bool(date or start))
+    media_type = negotiate_format(accept)
     try:
-        response = fetch_historical_data(ticker, date, country)
+        if media_type != JSON_MEDIA_TYPE:
+            frame = await afetch_history_frame(
+                ticker, date, country, start=start, end=end, interval=interval, since=since, resample=resample
+            )
+            return await frame_response(frame, media_type)
+        response = await afetch_historical_data(
+            ticker, date, country, include_metadata=metadata, start=start, end=end, interval=interval, since=since,
+            resample=resample
+        )
         # Ensure country override is applied
-        if country:
-            response.country = country
-            if "note" not in response.metadata:
-                response.metadata["note"] = f"Data for {country} tickers may not be complete"
-        return response
+        finance = await load_finance()
+        return json_response(finance.apply_country_override(response, country))
+    except UpstreamBusyError as e:
+        raise upstream_busy(e)
+    except TickerNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching data: {str(e)}"
         )
 
-@app.get("/ticker/{ticker}/date/{specific_date}", response_model=TickerResponse)
+@app.get("/ticker/{ticker}/date/{specific_date}", response_model=TickerResponse, responses=PRICE_RESPONSES)
 async def get_ticker_data_by_date(
     ticker: str,
     specific_date: date,
     country: Optional[str] = None,
+    metadata: bool = True,
+    interval: Optional[Interval] = None,
+    resample: Optional[Resample] = None,
+    accept: Optional[str] = Header(None),
     token: dict = Depends(verify_token)
 ):
     """
@@ -73,25 +262,261 @@ async def get_ticker_data_by_date(
     - **ticker**: The ticker symbol (e.g., AAPL for Apple)
     - **specific_date**: The specific date to fetch data for (format: YYYY-MM-DD)
     - **country**: Optional country override
+    - **metadata**: Set to false to skip the name/sector/industry lookup
+    - **interval**: Optional bar interval (defaults to 1d)
+    - **resample**: Optional larger bar size the `interval` bars are aggregated into on the server
+    - **Accept**: `application/x-ndjson` or `text/csv` to stream the prices instead of JSON,
+      `application/vnd.apache.arrow.stream` or `application/vnd.apache.parquet` for columnar binary output
     - **Authorization**: Bearer token required in header
     """
+    validate_interval(interval, specific_date)
+    validate_resample(interval, resample, True)
+    media_type = negotiate_format(accept)
     try:
-        response = fetch_historical_data(ticker, specific_date, country)
+        if media_type != JSON_MEDIA_TYPE:
+            frame = await afetch_history_frame(ticker, specific_date, country, interval=interval, resample=resample)
+            return await frame_response(frame, media_type)
+        response = await afetch_historical_data(
+            ticker, specific_date, country, include_metadata=metadata, interval=interval, resample=resample
+        )
         # Ensure country override is applied
-        if country:
-            response.country = country
-            if "note" not in response.metadata:
-                response.metadata["note"] = f"Data for {country} tickers may not be complete"
-        return response
+        finance = await load_finance()
+        return json_response(finance.apply_country_override(response, country))
+    except UpstreamBusyError as e:
+        raise upstream_busy(e)
+    except TickerNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching data: {str(e)}"
         )
 
+@app.get("/ticker/{ticker}/indicators", response_model=IndicatorResponse)
+async def get_ticker_indicators(
+    ticker: str,
+    date: Optional[date] = None,
+    country: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    interval: Optional[Interval] = None,
+    resample: Optional[Resample] = None,
+    since: Optional[datetime] = None,
+    window: int = Query(20, ge=2, le=1000),
+    rsi_period: int = Query(14, ge=2, le=1000),
+    bollinger_std: float = Query(2.0, gt=0),
+    api_key: bool = Depends(verify_api_key)
+):
+    """
+    Get SMA, EMA, RSI, VWAP and Bollinger bands computed over a ticker's bars
+
+    - **ticker**: The ticker symbol (e.g., AAPL for Apple)
+    - **date**, **start**, **end**, **interval**, **resample**: Select the bars as for /ticker/{ticker}
+    - **country**: Optional country override
+    - **since**: Optional cursor for the latest day: only values from then on are returned
+    - **window**: Bars in the SMA, EMA and Bollinger band windows (default 20)
+    - **rsi_period**: Bars in the RSI period (default 14)
+    - **bollinger_std**: Width of the Bollinger bands in standard deviations (default 2)
+    - **X-API-Key**: Required API key in header
+
+    Values are null for the bars before an indicator has a full window.
+    """
+    validate_range(date, start, end, since)
+    validate_interval(interval, date or start)
+    validate_resample(interval, resample, bool(date or start))
+    indicators = await load_finance("app.indicators")
+    try:
+        response = await indicators.afetch_indicators(
+            ticker, country, date, start=start, end=end, interval=interval, resample=resample, since=since,
+            window=window, rsi_period=rsi_period, bollinger_std=bollinger_std
+        )
+        return json_response(response)
+    except UpstreamBusyError as e:
+        raise upstream_busy(e)
+    except TickerNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error computing indicators: {str(e)}"
+        )
+
+@app.post("/tickers/batch", response_model=BatchTickerResponse)
+async def get_ticker_data_batch(
+    batch_request: BatchTickerRequest,
+    api_key: bool = Depends(verify_api_key)
+):
+    """
+    Get historical price data for many tickers in one request
+
+    - **tickers**: List of tickers, each with optional `date` and `country`
+    - **date**: Optional default date for tickers without one
+    - **country**: Optional default country for tickers without one
+    - **metadata**: Set to false to skip the name/sector/industry lookup
+    - **X-API-Key**: Required API key in header
+
+    Tickers that fail are reported with an `error` instead of failing the batch.
+    """
+    finance = await load_finance()
+    if len(batch_request.tickers) > finance.BATCH_MAX_TICKERS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch may contain at most {finance.BATCH_MAX_TICKERS} tickers"
+        )
+
+    requests = [
+        TickerRequest(
+            ticker=item.ticker,
+            date=item.date or batch_request.date,
+            country=item.country or batch_request.country
+        )
+        for item in batch_request.tickers
+    ]
+    results = await afetch_many(requests, include_metadata=batch_request.metadata)
+    return json_response(BatchTickerResponse(results=results))
+
+@app.get("/stream/{ticker}", response_class=StreamingResponse, responses={200: {"content": {"text/event-stream": {}}}})
+async def stream_ticker_events(
+    ticker: str,
+    country: Optional[str] = None,
+    interval: Optional[Interval] = None,
+    api_key: bool = Depends(verify_api_key)
+):
+    """
+    Live intraday bars of a ticker as server-sent events
+
+    The first event is a `snapshot` with the bars of the current session,
+    then each `bars` event carries only the bars that are new (or, for the
+    running bar, changed) since the previous one. All clients of a ticker
+    share one upstream poll every STREAM_POLL_SECONDS. Use the WebSocket on
+    the same path where it is available; this is the fallback for clients
+    and proxies without WebSocket support.
+
+    - **ticker**: The ticker symbol (e.g., AAPL for Apple)
+    - **country**: Optional country override
+    - **interval**: Optional intraday bar interval (defaults to 1m)
+    - **X-API-Key**: Required API key in header
+    """
+    stream = await load_finance("app.stream")
+    return StreamingResponse(
+        stream.sse_events(stream.get_stream_hub(), ticker, country, interval),
+        media_type="text/event-stream",
+        # Deliver every event right away instead of buffering it in a proxy
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/stream/{ticker}")
+async def stream_ticker(
+    websocket: WebSocket,
+    ticker: str,
+    country: Optional[str] = None,
+    interval: Optional[Interval] = None
+):
+    """
+    Live intraday bars of a ticker over a WebSocket
+
+    Sends the same JSON messages as the server-sent events on this path.
+    The API key is taken from the X-API-Key header or, for browsers that
+    cannot set headers on a WebSocket, the `api_key` query parameter.
+    """
+    try:
+        await verify_api_key(websocket.headers.get("X-API-Key") or websocket.query_params.get("api_key"))
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+    stream = await load_finance("app.stream")
+    await websocket.accept()
+    await stream.send_updates(websocket, stream.get_stream_hub(), ticker, country, interval)
+
+def collect_stats() -> Dict[str, Any]:
+    """
+    Runtime statistics of every layer; the finance sections once it is loaded
+    """
+    stats = {
+        "cache": get_cache().stats(),
+        "metadata": get_metadata_store().stats(),
+    }
+    if get_finance_loader().ready:
+        stats["store"] = sys.modules["app.store"].get_price_store().stats()
+        stats["coalescing"] = sys.modules["app.finance"].get_coalescing_stats()
+        stats["providers"] = sys.modules["app.finance"].get_provider_stats()
+        stats["intraday"] = sys.modules["app.intraday"].get_intraday_buffers().stats()
+    if "app.stream" in sys.modules:
+        stats["stream"] = sys.modules["app.stream"].get_stream_hub().stats()
+    if "app.indicators" in sys.modules:
+        stats["indicators"] = sys.modules["app.indicators"].get_indicator_states().stats()
+    stats.update({
+        "upstream": get_upstream_limiter().stats(),
+        "circuit": get_circuit_breaker().stats(),
+        "api_keys": get_api_key_registry().stats(),
+        "warmup": get_finance_loader().stats(),
+    })
+    return stats
+
+def stats_gauges() -> Dict[str, Any]:
+    """
+    Export the numeric /stats values (cache hit ratios, limiter state, ...) as gauges
+    """
+    return {
+        name: (f"{name.split('_', 1)[0]} value from /stats", [({}, value)])
+        for name, value in flatten_stats(collect_stats()).items()
+    }
+
+REGISTRY.register_collector(stats_gauges)
+
+@app.get("/stats")
+async def get_stats(api_key: bool = Depends(verify_api_key)) -> Dict[str, Any]:
+    """
+    Get runtime statistics of the data collection layer
+
+    - **X-API-Key**: Required API key in header
+    """
+    await get_finance_loader().wait()
+    return collect_stats()
+
+@app.get("/metrics", response_class=Response, responses={200: {"content": {PROMETHEUS_MEDIA_TYPE: {}}}})
+async def metrics(api_key: bool = Depends(verify_api_key)) -> Response:
+    """
+    Metrics of this process in the Prometheus text format
+
+    Latency histograms of upstream calls, DataFrame conversion, response
+    serialization and every endpoint, plus the /stats values as gauges.
+    With several workers each process reports its own metrics.
+
+    - **X-API-Key**: Required API key in header, as for /stats
+    """
+    content = await run_in_threadpool(REGISTRY.render)
+    return Response(content=content, media_type=PROMETHEUS_MEDIA_TYPE)
+
+@app.get("/health")
+async def health() -> Dict[str, str]:
+    """
+    Liveness check; answers as soon as the process accepts connections
+    """
+    return {"status": "ok"}
+
+@app.get("/ready", responses={503: {"description": "The finance subsystem is still loading"}})
+async def ready() -> Dict[str, Any]:
+    """
+    Readiness check; 503 until pandas and yfinance are loaded
+    """
+    loader = get_finance_loader()
+    if not loader.ready:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Loading")
+    return {"status": "ready", "warmup_seconds": loader.seconds}
+
 def main():
     """Run the application with uvicorn"""
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    parser = argparse.ArgumentParser(description="Run the Finance Collector API")
+    parser.add_argument(
+        "--production", action="store_true", default=SERVER_MODE == "production",
+        help="run several workers without reloading (default: SERVER_MODE)"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+    serve("main:app", production=args.production, host=args.host, port=args.port, workers=args.workers)
 
 if __name__ == "__main__":
     main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import pytest
 from dotenv import load_dotenv
 
@@ -17,6 +18,9 @@ if not os.getenv("JWT_ALGORITHM"):
 if not os.getenv("JWT_EXPIRATION_MINUTES"):
     os.environ["JWT_EXPIRATION_MINUTES"] = "30"
 
+# Keep on-disk stores created by the tests out of the working tree
+os.environ["FINANCE_DATA_DIR"] = tempfile.mkdtemp(prefix="finance-collector-tests-")
+
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_environment():
@@ -29,3 +33,28 @@ def setup_test_environment():
     
     # Clean up after tests if needed
     pass
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """Start every test with empty caches and stores"""
+    from app.auth import token_cache
+    from app.breaker import get_circuit_breaker
+    from app.cache import get_cache
+    from app.finance import last_good_responses
+    from app.indicators import get_indicator_states
+    from app.intraday import get_intraday_buffers
+    from app.metadata import get_metadata_store
+    from app.metrics import REGISTRY
+    from app.store import get_price_store
+
+    get_circuit_breaker().reset()
+    stores = [
+        get_cache(), last_good_responses, token_cache, get_metadata_store(), get_price_store(), REGISTRY,
+        get_intraday_buffers(), get_indicator_states(),
+    ]
+    for store in stores:
+        store.clear()
+    yield
+    for store in stores:
+        store.clear()
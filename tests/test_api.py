@@ -1,11 +1,16 @@
+import io
+import json
 import pytest
 from datetime import date
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
 
+import pandas as pd
+
 from main import app
 from app.models import HistoricalPrice, TickerResponse
 from app.auth import API_KEY
+from app.limiter import UpstreamBusyError
 
 client = TestClient(app)
 
@@ -16,7 +21,7 @@ def auth_headers():
     return {"X-API-Key": API_KEY}
 
 
-@patch('main.fetch_historical_data')
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
 def test_get_ticker_data(mock_fetch_historical_data, auth_headers):
     """Test getting ticker data"""
     # Mock the finance module response
@@ -49,10 +54,12 @@ def test_get_ticker_data(mock_fetch_historical_data, auth_headers):
     assert data["prices"][0]["close"] == 153.0
     
     # Verify the function was called with the right parameters
-    mock_fetch_historical_data.assert_called_once_with("AAPL", None, None)
+    mock_fetch_historical_data.assert_called_once_with(
+        "AAPL", None, None, include_metadata=True, start=None, end=None, interval=None, since=None, resample=None
+    )
 
 
-@patch('main.fetch_historical_data')
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
 def test_get_ticker_data_without_api_key(mock_fetch_historical_data):
     """Test getting ticker data without API key"""
     # Call the API without API key
@@ -66,7 +73,7 @@ def test_get_ticker_data_without_api_key(mock_fetch_historical_data):
     mock_fetch_historical_data.assert_not_called()
 
 
-@patch('main.fetch_historical_data')
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
 def test_get_ticker_data_with_invalid_api_key(mock_fetch_historical_data):
     """Test getting ticker data with invalid API key"""
     # Call the API with invalid API key
@@ -80,7 +87,7 @@ def test_get_ticker_data_with_invalid_api_key(mock_fetch_historical_data):
     mock_fetch_historical_data.assert_not_called()
 
 
-@patch('main.fetch_historical_data')
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
 def test_get_ticker_data_with_date(mock_fetch_historical_data, auth_headers):
     """Test getting ticker data for a specific date"""
     # Mock the finance module response
@@ -116,10 +123,12 @@ def test_get_ticker_data_with_date(mock_fetch_historical_data, auth_headers):
     assert data["prices"][0]["date"] == specific_date.isoformat()
     
     # Verify the function was called with the right parameters
-    mock_fetch_historical_data.assert_called_once_with("AAPL", specific_date, None)
+    mock_fetch_historical_data.assert_called_once_with(
+        "AAPL", specific_date, None, include_metadata=True, start=None, end=None, interval=None, since=None, resample=None
+    )
 
 
-@patch('main.fetch_historical_data')
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
 def test_get_ticker_data_with_country(mock_fetch_historical_data, auth_headers):
     """Test getting ticker data with country override"""
     # Mock the finance module response
@@ -155,10 +164,12 @@ def test_get_ticker_data_with_country(mock_fetch_historical_data, auth_headers):
     assert "Japan" in data["metadata"]["note"]
     
     # Verify the function was called with the right parameters
-    mock_fetch_historical_data.assert_called_once_with("AAPL", None, "Japan")
+    mock_fetch_historical_data.assert_called_once_with(
+        "AAPL", None, "Japan", include_metadata=True, start=None, end=None, interval=None, since=None, resample=None
+    )
 
 
-@patch('main.fetch_historical_data')
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
 def test_get_ticker_data_error_handling(mock_fetch_historical_data, auth_headers):
     """Test error handling when fetching ticker data"""
     # Mock the finance module to raise an exception
@@ -170,3 +181,173 @@ def test_get_ticker_data_error_handling(mock_fetch_historical_data, auth_headers
     # Verify the response
     assert response.status_code == 500
     assert "Error fetching data" in response.json()["detail"]
+
+
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
+def test_get_ticker_data_without_metadata(mock_fetch_historical_data, auth_headers):
+    """Test skipping the metadata lookup with metadata=false"""
+    mock_fetch_historical_data.return_value = TickerResponse(
+        ticker="AAPL",
+        country="US",
+        prices=[],
+        metadata={"data_source": "Yahoo Finance"}
+    )
+
+    response = client.get("/ticker/AAPL?metadata=false", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["metadata"] == {"data_source": "Yahoo Finance"}
+    mock_fetch_historical_data.assert_called_once_with(
+        "AAPL", None, None, include_metadata=False, start=None, end=None, interval=None, since=None, resample=None
+    )
+
+
+@patch('main.afetch_many', new_callable=AsyncMock)
+def test_get_ticker_data_batch(mock_fetch_many, auth_headers):
+    """Test the batch endpoint with per-ticker results and errors"""
+    from app.models import BatchTickerResult, TickerRequest
+
+    specific_date = date(2023, 1, 3)
+    mock_fetch_many.return_value = [
+        BatchTickerResult(
+            ticker="AAPL",
+            date=specific_date,
+            data=TickerResponse(ticker="AAPL", country="US", prices=[], metadata={})
+        ),
+        BatchTickerResult(ticker="BAD", date=specific_date, error="No data found"),
+    ]
+
+    response = client.post(
+        "/tickers/batch",
+        json={"tickers": [{"ticker": "AAPL"}, {"ticker": "BAD"}], "date": specific_date.isoformat()},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["data"]["ticker"] == "AAPL"
+    assert results[1]["error"] == "No data found"
+    mock_fetch_many.assert_called_once_with(
+        [
+            TickerRequest(ticker="AAPL", date=specific_date),
+            TickerRequest(ticker="BAD", date=specific_date),
+        ],
+        include_metadata=True
+    )
+
+
+@patch('main.afetch_many', new_callable=AsyncMock)
+def test_get_ticker_data_batch_requires_api_key(mock_fetch_many):
+    """Test that the batch endpoint requires an API key"""
+    response = client.post("/tickers/batch", json={"tickers": [{"ticker": "AAPL"}]})
+
+    assert response.status_code == 401
+    mock_fetch_many.assert_not_called()
+
+
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
+def test_get_ticker_data_range(mock_fetch_historical_data, auth_headers):
+    """Test a start/end/interval range query"""
+    mock_fetch_historical_data.return_value = TickerResponse(ticker="AAPL", country="US", prices=[])
+
+    response = client.get(
+        "/ticker/AAPL?start=2023-01-03&end=2023-01-31&interval=1d",
+        headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    mock_fetch_historical_data.assert_called_once_with(
+        "AAPL", None, None, include_metadata=True,
+        start=date(2023, 1, 3), end=date(2023, 1, 31), interval="1d", since=None, resample=None
+    )
+
+
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
+def test_get_ticker_data_invalid_range(mock_fetch_historical_data, auth_headers):
+    """Test that contradictory range parameters are rejected"""
+    assert client.get(
+        "/ticker/AAPL?date=2023-01-03&start=2023-01-01", headers=auth_headers
+    ).status_code == 400
+    assert client.get("/ticker/AAPL?end=2023-01-03", headers=auth_headers).status_code == 400
+    assert client.get(
+        "/ticker/AAPL?start=2023-01-05&end=2023-01-03", headers=auth_headers
+    ).status_code == 400
+    assert client.get("/ticker/AAPL?start=2023-01-05&interval=7m", headers=auth_headers).status_code == 422
+    # Yahoo only keeps intraday bars for a limited number of days
+    assert client.get("/ticker/AAPL?start=2023-01-05&interval=5m", headers=auth_headers).status_code == 400
+    mock_fetch_historical_data.assert_not_called()
+
+
+@patch('main.afetch_history_frame', new_callable=AsyncMock)
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
+def test_get_ticker_data_streams_ndjson(mock_fetch_historical_data, mock_fetch_frame, auth_headers):
+    """Test that Accept: application/x-ndjson streams the prices line by line"""
+    mock_fetch_frame.return_value = pd.DataFrame(
+        {"Open": [150.0, 151.0], "High": [155.0, 156.0], "Low": [149.0, 150.0],
+         "Close": [153.0, 154.0], "Volume": [1000000, 2000000]},
+        index=pd.DatetimeIndex([
+            pd.Timestamp("2023-01-03", tz="America/New_York"),
+            pd.Timestamp("2023-01-04", tz="America/New_York"),
+        ])
+    )
+
+    response = client.get(
+        "/ticker/AAPL?start=2023-01-03&end=2023-01-04",
+        headers={**auth_headers, "Accept": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["close"] for line in lines] == [153.0, 154.0]
+    assert lines[0]["date"] == "2023-01-03"
+    mock_fetch_frame.assert_called_once_with(
+        "AAPL", None, None, start=date(2023, 1, 3), end=date(2023, 1, 4), interval=None, since=None, resample=None
+    )
+    mock_fetch_historical_data.assert_not_called()
+
+
+@patch('main.afetch_history_frame', new_callable=AsyncMock)
+def test_get_ticker_data_streams_csv(mock_fetch_frame, auth_headers):
+    """Test that Accept: text/csv returns a CSV body with a header row"""
+    mock_fetch_frame.return_value = pd.DataFrame(
+        {"Open": [150.0], "High": [155.0], "Low": [149.0], "Close": [153.0], "Volume": [1000000]},
+        index=pd.DatetimeIndex([pd.Timestamp("2023-01-03", tz="America/New_York")])
+    )
+
+    response = client.get("/ticker/AAPL", headers={**auth_headers, "Accept": "text/csv"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.splitlines() == [
+        "date,time,open,high,low,close,volume",
+        "2023-01-03,00:00:00,150.0,155.0,149.0,153.0,1000000",
+    ]
+
+
+@patch('main.afetch_history_frame', new_callable=AsyncMock)
+def test_get_ticker_data_parquet(mock_fetch_frame, auth_headers):
+    """Test that Accept: application/vnd.apache.parquet returns a Parquet file"""
+    pytest.importorskip("pyarrow")
+    mock_fetch_frame.return_value = pd.DataFrame(
+        {"Open": [150.0], "High": [155.0], "Low": [149.0], "Close": [153.0], "Volume": [1000000]},
+        index=pd.DatetimeIndex([pd.Timestamp("2023-01-03", tz="America/New_York")])
+    )
+
+    response = client.get("/ticker/AAPL", headers={**auth_headers, "Accept": "application/vnd.apache.parquet"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    frame = pd.read_parquet(io.BytesIO(response.content))
+    assert frame["close"].tolist() == [153.0]
+
+
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
+def test_get_ticker_data_upstream_busy(mock_fetch_historical_data, auth_headers):
+    """Test that a call rejected by the upstream limiter is a retryable 503"""
+    mock_fetch_historical_data.side_effect = UpstreamBusyError("Upstream is busy", retry_after=10)
+
+    response = client.get("/ticker/AAPL", headers=auth_headers)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "10"
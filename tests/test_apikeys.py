@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+import app.apikeys as apikeys
+import app.auth as auth
+from app.apikeys import APIKeyRegistry, QuotaExceededError, hash_key, parse_key_line
+from main import app
+
+client = TestClient(app)
+
+
+def write_keys(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_parse_key_line():
+    """Test plain and pre-hashed keys, quotas and comments"""
+    assert parse_key_line("# comment") is None
+    assert parse_key_line("   ") is None
+    assert parse_key_line("alice, secret-a, 5, 10") == ("alice", hash_key("secret-a"), 5.0, 10)
+    digest = hash_key("secret-b")
+    assert parse_key_line(f"bob, sha256:{digest.upper()}  # no quota") == ("bob", digest, 0.0, 0)
+    with pytest.raises(ValueError):
+        parse_key_line("missing-key")
+
+
+def test_registry_hot_reload(tmp_path):
+    """Test that keys follow the file and unchanged quotas keep their bucket"""
+    path = str(tmp_path / "keys.txt")
+    write_keys(path, "alice, secret-a, 1, 1\nbob, secret-b\n")
+    now = [0.0]
+    registry = APIKeyRegistry(path, reload_seconds=5, clock=lambda: now[0])
+
+    alice = registry.authorize("secret-a")
+    assert alice.name == "alice"
+    assert registry.authorize("secret-b").name == "bob"
+    assert registry.authorize("secret-c") is None
+
+    write_keys(path, "alice, secret-a, 1, 1\ncarol, secret-c\n")
+    os.utime(path, (1, 1))
+    registry.maybe_reload()
+    assert registry.lookup("secret-c") is None  # not checked yet
+
+    now[0] = 5.0
+    registry.maybe_reload()
+    assert registry.lookup("secret-c").name == "carol"
+    assert registry.lookup("secret-b") is None
+    assert registry.lookup("secret-a") is alice
+    assert registry.stats()["reloads"] == 2
+
+
+def test_registry_keeps_keys_on_bad_file(tmp_path):
+    """Test that a broken file does not drop the loaded keys"""
+    path = str(tmp_path / "keys.txt")
+    write_keys(path, "alice, secret-a\n")
+    registry = APIKeyRegistry(path, reload_seconds=0)
+
+    write_keys(path, "broken\n")
+    os.utime(path, (1, 1))
+    registry.maybe_reload()
+
+    assert registry.lookup("secret-a").name == "alice"
+
+
+def test_registry_from_sqlite(tmp_path):
+    """Test loading hashed keys from an SQLite table"""
+    path = str(tmp_path / "keys.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE api_keys (name TEXT, key_hash TEXT, rate REAL, burst INTEGER)")
+    conn.execute("INSERT INTO api_keys VALUES (?, ?, ?, ?)", ("alice", hash_key("secret-a"), 2, 3))
+    conn.execute("INSERT INTO api_keys VALUES (?, ?, NULL, NULL)", ("bob", hash_key("secret-b")))
+    conn.commit()
+    conn.close()
+
+    registry = APIKeyRegistry(path)
+
+    alice = registry.lookup("secret-a")
+    assert (alice.name, alice.rate, alice.burst) == ("alice", 2.0, 3)
+    assert registry.lookup("secret-b").bucket is None
+
+
+def test_quota_exceeded(tmp_path):
+    """Test that a key is rejected once its burst is used up"""
+    path = str(tmp_path / "keys.txt")
+    write_keys(path, "alice, secret-a, 0.5, 2\n")
+    registry = APIKeyRegistry(path)
+
+    registry.authorize("secret-a")
+    registry.authorize("secret-a")
+    with pytest.raises(QuotaExceededError) as excinfo:
+        registry.authorize("secret-a")
+
+    assert excinfo.value.retry_after == pytest.approx(2, abs=0.1)
+    assert registry.stats()["rejected"] == 1
+
+
+def test_quota_is_split_between_workers(tmp_path):
+    """Test that each of several workers enforces its share of a key's quota"""
+    path = str(tmp_path / "keys.txt")
+    write_keys(path, "alice, secret-a, 4, 6\n")
+    registry = APIKeyRegistry(path, workers=4)
+
+    alice = registry.lookup("secret-a")
+    assert (alice.rate, alice.burst) == (4.0, 6)
+    assert (alice.bucket.rate, alice.bucket.burst) == (1.0, 2)
+    registry.authorize("secret-a")
+    registry.authorize("secret-a")
+    with pytest.raises(QuotaExceededError) as excinfo:
+        registry.authorize("secret-a")
+    assert excinfo.value.retry_after == pytest.approx(1, abs=0.1)
+
+
+def test_endpoint_enforces_quota(tmp_path, monkeypatch):
+    """Test that registry keys are accepted and answered with 429 over quota"""
+    path = str(tmp_path / "keys.txt")
+    write_keys(path, "alice, secret-a, 0.5, 1\n")
+    monkeypatch.setattr(apikeys, "_api_key_registry", APIKeyRegistry(path))
+
+    assert client.get("/stats", headers={"X-API-Key": "secret-a"}).status_code == 200
+    response = client.get("/stats", headers={"X-API-Key": "secret-a"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    assert client.get("/stats", headers={"X-API-Key": "unknown"}).status_code == 401
+
+
+def test_endpoint_reloads_keys_in_the_threadpool(tmp_path, monkeypatch):
+    """Test that requests only look keys up in memory and the file check runs in the threadpool"""
+    path = str(tmp_path / "keys.txt")
+    write_keys(path, "alice, secret-a\n")
+    registry = APIKeyRegistry(path, reload_seconds=0)
+    monkeypatch.setattr(apikeys, "_api_key_registry", registry)
+    write_keys(path, "alice, secret-a\nbob, secret-b\n")
+    os.utime(path, (1, 1))
+
+    with patch("app.auth.run_in_threadpool", wraps=auth.run_in_threadpool) as threadpool:
+        assert client.get("/stats", headers={"X-API-Key": "secret-b"}).status_code == 200
+
+    threadpool.assert_any_call(registry.refresh)
+    with patch("app.apikeys.os.path.exists", side_effect=AssertionError("file check on lookup")):
+        assert registry.lookup("secret-a").name == "alice"
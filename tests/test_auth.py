@@ -1,10 +1,17 @@
 import os
+import time
 import pytest
+from datetime import timedelta
+from unittest.mock import patch
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
-from jose import jwt
+from jose import JWTError, jwt
 
 from main import app
-from app.auth import CLIENT_ID, CLIENT_SECRET, SECRET_KEY, ALGORITHM, API_KEY
+from app import auth
+from app.auth import (
+    CLIENT_ID, CLIENT_SECRET, SECRET_KEY, ALGORITHM, API_KEY, create_access_token, verify_token
+)
 
 client = TestClient(app)
 
@@ -69,3 +76,50 @@ def test_access_protected_endpoint_with_invalid_api_key():
     )
     assert response.status_code == 401
     assert "Invalid API Key" in response.json()["detail"]
+
+
+def test_verify_token_caches_verified_tokens():
+    """Test that a repeated token skips jwt.decode"""
+    token = create_access_token({"sub": CLIENT_ID}, expires_delta=timedelta(minutes=5))
+
+    with patch("app.auth.jwt.decode", wraps=jwt.decode) as decode:
+        first = verify_token(token)
+        second = verify_token(token)
+
+    assert first == second
+    assert first["sub"] == CLIENT_ID
+    assert decode.call_count == 1
+
+
+def test_verify_token_cache_honors_exp():
+    """Test that a cached token is verified again once its exp has passed"""
+    token = create_access_token({"sub": CLIENT_ID}, expires_delta=timedelta(seconds=30))
+    verify_token(token)
+
+    later = time.time() + 60
+    with patch("app.auth.jwt.decode", side_effect=JWTError("expired")) as decode, \
+            patch("time.time", return_value=later):
+        with pytest.raises(HTTPException) as excinfo:
+            verify_token(token)
+
+    assert decode.call_count == 1
+    assert excinfo.value.status_code == 401
+
+
+def test_load_keys_asymmetric(monkeypatch):
+    """Test RS256 keys parsed once from a PEM private key"""
+    rsa = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.rsa")
+    from cryptography.hazmat.primitives import serialization
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    monkeypatch.setattr(auth, "JWT_PRIVATE_KEY", pem)
+    monkeypatch.setattr(auth, "JWT_PUBLIC_KEY", "")
+
+    signing_key, verifying_key = auth.load_keys("RS256")
+    token = jwt.encode({"sub": CLIENT_ID}, signing_key, algorithm="RS256")
+
+    assert jwt.decode(token, verifying_key, algorithms=["RS256"])["sub"] == CLIENT_ID
+    assert verifying_key.is_public()
@@ -0,0 +1,175 @@
+import pytest
+from datetime import date
+from unittest.mock import patch, MagicMock
+
+import pandas as pd
+from fastapi.testclient import TestClient
+from yfinance.exceptions import YFTzMissingError
+
+from app.auth import API_KEY
+from app.breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN, get_circuit_breaker
+from app.cache import get_cache
+from app.finance import fetch_from_yahoo
+from app.limiter import AdaptiveConcurrencyLimiter, UpstreamLimiter
+from main import app
+
+client = TestClient(app)
+
+
+def fail():
+    raise RuntimeError("upstream down")
+
+
+def yahoo_down(raise_errors=False, **kwargs):
+    """Ticker.history() of yfinance while Yahoo is down: an empty frame unless errors are raised"""
+    if raise_errors:
+        raise RuntimeError("*** YAHOO! FINANCE IS CURRENTLY DOWN! ***")
+    return pd.DataFrame()
+
+
+def make_breaker(now):
+    return CircuitBreaker(
+        window_seconds=60, min_calls=4, failure_rate=0.5,
+        slow_call_seconds=5, open_seconds=30, half_open_probes=1,
+        clock=lambda: now[0]
+    )
+
+
+def test_breaker_opens_on_failure_rate():
+    """Test that the circuit opens once enough calls in the window fail"""
+    now = [0.0]
+    breaker = make_breaker(now)
+
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.call(lambda: "ok") == "ok"
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == CLOSED
+
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.call(lambda: "not called")
+    assert excinfo.value.retry_after == 30
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_breaker_counts_slow_calls_as_failures():
+    """Test that calls over the latency threshold trip the circuit too"""
+    now = [0.0]
+    breaker = make_breaker(now)
+
+    def slow():
+        now[0] += 10
+        return "slow"
+
+    for _ in range(4):
+        assert breaker.call(slow) == "slow"
+    assert breaker.state == OPEN
+
+
+def test_breaker_half_open_probe_recovers():
+    """Test that a good probe closes the circuit and a bad one reopens it"""
+    now = [0.0]
+    breaker = make_breaker(now)
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+    assert breaker.state == OPEN
+
+    now[0] = 31
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+
+    now[0] = 62
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+    assert breaker.stats()["opened"] == 2
+
+
+@patch('yfinance.Ticker')
+def test_fetch_from_yahoo_serves_stale_response_while_open(mock_ticker_class):
+    """Test that the last good response is served, marked stale, when upstream fails"""
+    mock_ticker = MagicMock()
+    mock_ticker_class.return_value = mock_ticker
+    mock_ticker.history.return_value = pd.DataFrame(
+        {"Open": [150.0], "High": [155.0], "Low": [149.0], "Close": [153.0], "Volume": [1000000]},
+        index=pd.DatetimeIndex([pd.Timestamp("2023-01-03", tz="America/New_York")])
+    )
+
+    fresh = fetch_from_yahoo("AAPL", "US", start=date(2023, 1, 3), end=date(2023, 1, 3),
+                             include_metadata=False, interval="1wk")
+    assert "stale" not in fresh.metadata
+
+    # Weekly bars are not stored, so the next fetch has to go upstream
+    get_cache().clear()
+    mock_ticker.history.side_effect = yahoo_down
+    breaker = get_circuit_breaker()
+    for _ in range(breaker.min_calls):
+        stale = fetch_from_yahoo("AAPL", "US", start=date(2023, 1, 3), end=date(2023, 1, 3),
+                                 include_metadata=False, interval="1wk")
+    assert breaker.state == OPEN
+
+    assert stale.prices == fresh.prices
+    assert stale.metadata["stale"] is True
+    assert "fetched_at" in stale.metadata
+
+    # While open, upstream is not called at all
+    calls = mock_ticker.history.call_count
+    fetch_from_yahoo("AAPL", "US", start=date(2023, 1, 3), end=date(2023, 1, 3),
+                     include_metadata=False, interval="1wk")
+    assert mock_ticker.history.call_count == calls
+
+    with pytest.raises(CircuitOpenError):
+        fetch_from_yahoo("MSFT", "US", start=date(2023, 1, 3), end=date(2023, 1, 3),
+                         include_metadata=False, interval="1wk")
+
+
+@patch('yfinance.Ticker')
+def test_fetch_from_yahoo_keeps_the_stale_response_with_prices(mock_ticker_class):
+    """Test that a response without prices does not replace the last good one with prices"""
+    mock_ticker = MagicMock()
+    mock_ticker_class.return_value = mock_ticker
+    mock_ticker.history.return_value = pd.DataFrame(
+        {"Open": [150.0], "High": [155.0], "Low": [149.0], "Close": [153.0], "Volume": [1000000]},
+        index=pd.DatetimeIndex([pd.Timestamp("2023-01-03", tz="America/New_York")])
+    )
+    fresh = fetch_from_yahoo("AAPL", "US", start=date(2023, 1, 3), end=date(2023, 1, 3),
+                             include_metadata=False, interval="1wk")
+
+    get_cache().clear()
+    mock_ticker.history.return_value = pd.DataFrame()
+    empty = fetch_from_yahoo("AAPL", "US", start=date(2023, 1, 3), end=date(2023, 1, 3),
+                             include_metadata=False, interval="1wk")
+    assert empty.prices == []
+
+    get_cache().clear()
+    mock_ticker.history.side_effect = yahoo_down
+    stale = fetch_from_yahoo("AAPL", "US", start=date(2023, 1, 3), end=date(2023, 1, 3),
+                             include_metadata=False, interval="1wk")
+    assert stale.prices == fresh.prices
+    assert stale.metadata["stale"] is True
+
+
+@patch('yfinance.Ticker')
+def test_unknown_tickers_do_not_trip_the_breaker(mock_ticker_class):
+    """Test that unknown symbols are a 404 and count as successes for the breaker and the limiter"""
+    mock_ticker = MagicMock()
+    mock_ticker_class.return_value = mock_ticker
+    mock_ticker.history.side_effect = YFTzMissingError("TYPO")
+    limiter = UpstreamLimiter(concurrency=AdaptiveConcurrencyLimiter(initial=8, min_limit=1, max_limit=16))
+    breaker = get_circuit_breaker()
+
+    with patch("app.providers.get_upstream_limiter", return_value=limiter):
+        for i in range(breaker.min_calls * 2):
+            response = client.get(f"/ticker/TYPO{i}?metadata=false", headers={"X-API-Key": API_KEY})
+            assert response.status_code == 404
+
+    assert breaker.state == CLOSED
+    assert breaker.stats()["failure_rate"] == 0.0
+    assert limiter.stats()["errors"] == 0
+    assert limiter.stats()["limit"] >= 8
@@ -0,0 +1,120 @@
+import time
+import pytest
+from datetime import date, timedelta
+from unittest.mock import patch, MagicMock
+
+import pandas as pd
+
+from app.cache import (
+    LRUCache, SQLiteCache, TieredCache, create_cache, get_cache,
+    history_cache_key, history_ttl, INTRADAY_TTL
+)
+from app.finance import fetch_from_yahoo
+from app.models import PriceSeries
+
+
+def test_lru_cache_get_and_set():
+    """Test basic LRU cache hits and misses"""
+    cache = LRUCache(max_entries=2)
+    assert cache.get("missing") is None
+
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test that the size bound evicts the least recently used entry"""
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # Touch "a" so "b" becomes the least recently used entry
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_ttl_expiry():
+    """Test that entries expire after their TTL"""
+    cache = LRUCache()
+    cache.set("short", "value", ttl=0.05)
+    cache.set("permanent", "value", ttl=None)
+
+    time.sleep(0.1)
+
+    assert cache.get("short") is None
+    assert cache.get("permanent") == "value"
+    assert cache.stats()["expirations"] == 1
+
+
+def test_sqlite_cache_shared_between_instances(tmp_path):
+    """Test that two SQLite caches on the same file share entries"""
+    path = str(tmp_path / "cache.sqlite3")
+    first = SQLiteCache(path)
+    second = SQLiteCache(path)
+
+    frame = pd.DataFrame({"Close": [1.0, 2.0]})
+    first.set(history_cache_key("AAPL", None, "US"), frame, ttl=60)
+
+    cached = second.get(history_cache_key("AAPL", None, "US"))
+    assert cached is not None
+    assert cached["Close"].tolist() == [1.0, 2.0]
+    assert second.stats()["hits"] == 1
+
+    first.set("expired", "value", ttl=-1)
+    assert second.get("expired") is None
+
+
+def test_tiered_cache_promotes_shared_hits(tmp_path):
+    """Test that shared hits are copied into the local LRU cache"""
+    path = str(tmp_path / "cache.sqlite3")
+    writer = create_cache(max_entries=4, sqlite_path=path)
+    reader = create_cache(max_entries=4, sqlite_path=path)
+    assert isinstance(reader, TieredCache)
+
+    writer.set("key", "value", ttl=60)
+
+    assert reader.get("key") == "value"
+    assert len(reader.local) == 1
+    assert reader.local.get("key") == "value"
+
+
+def test_history_ttl():
+    """Test TTL selection for intraday, today's and past daily data"""
+    today = date(2024, 1, 10)
+    assert history_ttl(None, today) == INTRADAY_TTL
+    assert history_ttl(today, today) == INTRADAY_TTL
+    assert history_ttl(today - timedelta(days=1), today) is None
+
+
+@patch('yfinance.Ticker')
+def test_fetch_from_yahoo_uses_cache(mock_ticker_class):
+    """Test that repeated fetches for a past date only hit Yahoo once"""
+    specific_date = date(2023, 1, 3)
+    mock_ticker = MagicMock()
+    mock_ticker_class.return_value = mock_ticker
+    mock_ticker.history.return_value = pd.DataFrame(
+        {"Open": [150.0], "High": [155.0], "Low": [149.0], "Close": [153.0], "Volume": [1000000]},
+        index=pd.DatetimeIndex([pd.Timestamp("2023-01-03", tz="America/New_York")])
+    )
+    mock_ticker.info = {"shortName": "Apple Inc."}
+
+    first = fetch_from_yahoo("AAPL", "US", specific_date)
+    second = fetch_from_yahoo("AAPL", "US", specific_date)
+
+    assert first == second
+    assert len(second.prices) == 1
+    assert second.metadata["name"] == "Apple Inc."
+    mock_ticker.history.assert_called_once()
+    assert get_cache().stats()["hits"] == 1
+    # The history is cached as a compact PriceSeries, not a DataFrame
+    assert isinstance(get_cache().get(history_cache_key("AAPL", specific_date, "US")), PriceSeries)
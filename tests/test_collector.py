@@ -0,0 +1,93 @@
+import pytest
+from datetime import date, datetime
+from unittest.mock import patch, MagicMock
+
+import pandas as pd
+import pytz
+
+from app.collector import Collector, collect_ticker, last_closed_session, load_watchlist, next_session
+from app.store import get_price_store
+
+NEW_YORK = pytz.timezone("America/New_York")
+
+
+def test_load_watchlist(tmp_path):
+    """Test parsing tickers, country overrides, comments and duplicates"""
+    path = tmp_path / "watchlist.txt"
+    path.write_text("# US\naapl\nMSFT  # software\n\n005930.KS\nAAPL\nXYZ, Japan\n")
+
+    assert load_watchlist(str(path)) == [
+        ("AAPL", "US"),
+        ("MSFT", "US"),
+        ("005930.KS", "South Korea"),
+        ("XYZ", "Japan"),
+    ]
+
+
+def test_session_schedule_follows_exchange_close():
+    """Test picking the last and next session around the close and the weekend"""
+    # Monday before the close: the last collected session is Friday's
+    before_close = NEW_YORK.localize(datetime(2024, 1, 8, 15, 0))
+    assert last_closed_session("US", before_close, delay_minutes=30) == date(2024, 1, 5)
+    assert next_session("US", before_close, delay_minutes=30) == date(2024, 1, 8)
+
+    # Friday after close + delay: the next session is Monday
+    after_close = NEW_YORK.localize(datetime(2024, 1, 12, 16, 45))
+    assert last_closed_session("US", after_close, delay_minutes=30) == date(2024, 1, 12)
+    assert next_session("US", after_close, delay_minutes=30) == date(2024, 1, 15)
+
+    # 17:00 in New York is already the next morning in Seoul
+    assert last_closed_session("South Korea", before_close, delay_minutes=30) == date(2024, 1, 8)
+
+
+def test_collector_jitters_fetches_after_close():
+    """Test that every ticker is collected once, spread over the jitter window"""
+    now = [NEW_YORK.localize(datetime(2024, 1, 8, 12, 0)).timestamp()]
+    collected = []
+
+    def fake_collect(ticker, country, session):
+        collected.append((ticker, country, session))
+        return 1
+
+    collector = Collector(
+        [("AAPL", "US"), ("MSFT", "US"), ("GOOG", "US")],
+        max_workers=2, jitter_seconds=60, delay_minutes=30,
+        collect=fake_collect, clock=lambda: now[0]
+    )
+    collector.start(catch_up=False)
+
+    run_at = NEW_YORK.localize(datetime(2024, 1, 8, 16, 30)).timestamp()
+    assert collector.run_pending() == run_at
+
+    # The session starts and schedules its fetches inside the jitter window
+    now[0] = run_at
+    first_fetch = collector.run_pending()
+    assert run_at <= first_fetch < run_at + 60
+    assert collected == []
+
+    now[0] = run_at + 60
+    next_due = collector.run_pending()
+    collector.stop()
+
+    assert sorted(collected) == [(t, "US", date(2024, 1, 8)) for t in ("AAPL", "GOOG", "MSFT")]
+    assert next_due == NEW_YORK.localize(datetime(2024, 1, 9, 16, 30)).timestamp()
+    assert collector.stats()["collected"] == 3
+
+
+@patch('yfinance.Ticker')
+def test_collect_ticker_stores_closed_session(mock_ticker_class):
+    """Test that the collected session is final and written to the store"""
+    session = date(2024, 1, 8)
+    mock_ticker = MagicMock()
+    mock_ticker_class.return_value = mock_ticker
+    mock_ticker.history.return_value = pd.DataFrame(
+        {"Open": [150.0], "High": [155.0], "Low": [149.0], "Close": [153.0], "Volume": [1000000]},
+        index=pd.DatetimeIndex([pd.Timestamp(session, tz="America/New_York")])
+    )
+    mock_ticker.info = {"shortName": "Apple Inc."}
+
+    assert collect_ticker("AAPL", "US", session, intervals=["1d"], lookback_days=3) == 1
+    assert get_price_store().covers("AAPL", "1d", date(2024, 1, 5), date(2024, 1, 9))
+    mock_ticker.history.assert_called_once_with(
+        start=date(2024, 1, 5), end=date(2024, 1, 9), interval="1d", raise_errors=True
+    )
@@ -1,8 +1,10 @@
+import asyncio
+import time
 import pytest
 from datetime import date, timedelta
 from unittest.mock import patch, MagicMock
 
-from app.finance import get_ticker_country, fetch_historical_data, fetch_from_yahoo
+from app.finance import get_ticker_country, fetch_historical_data, fetch_from_yahoo, afetch_historical_data
 from app.models import HistoricalPrice, TickerResponse
 
 
@@ -205,3 +207,189 @@ def test_fetch_from_yahoo(mock_ticker_class):
     assert result.metadata["name"] == "Apple Inc."
     assert result.metadata["sector"] == "Technology"
     assert result.metadata["data_source"] == "Yahoo Finance"
+
+
+@patch('app.finance.fetch_historical_data')
+def test_afetch_historical_data_runs_off_event_loop(mock_fetch_historical_data):
+    """Test that slow upstream fetches run concurrently instead of blocking the loop"""
+    def slow_fetch(ticker, specific_date=None, country=None, include_metadata=True, **range_options):
+        time.sleep(0.2)
+        return TickerResponse(ticker=ticker, country="US", prices=[])
+
+    mock_fetch_historical_data.side_effect = slow_fetch
+
+    async def fetch_all():
+        return await asyncio.gather(
+            *(afetch_historical_data(ticker) for ticker in ["AAPL", "MSFT", "GOOG", "AMZN"])
+        )
+
+    started = time.perf_counter()
+    results = asyncio.run(fetch_all())
+    elapsed = time.perf_counter() - started
+
+    # Four 200ms fetches in parallel should take far less than 800ms
+    assert elapsed < 0.6
+    assert [result.ticker for result in results] == ["AAPL", "MSFT", "GOOG", "AMZN"]
+    mock_fetch_historical_data.assert_any_call(
+        "AAPL", None, None, include_metadata=True, start=None, end=None, interval=None, since=None, resample=None
+    )
+
+
+def test_frame_to_prices():
+    """Test the columnar DataFrame conversion and date filter"""
+    import pandas as pd
+    from datetime import time as dt_time
+    from app.finance import frame_to_prices
+
+    index = pd.DatetimeIndex([
+        pd.Timestamp("2023-01-03 09:30", tz="America/New_York"),
+        pd.Timestamp("2023-01-03 09:31", tz="America/New_York"),
+        pd.Timestamp("2023-01-04 09:30", tz="America/New_York"),
+    ])
+    hist_data = pd.DataFrame(
+        {
+            "Open": [150.0, 151.0, 152.0],
+            "High": [155.0, 156.0, 157.0],
+            "Low": [149.0, 150.0, 151.0],
+            "Close": [153.0, 154.0, 155.0],
+            "Volume": [1000000, 2000000, 3000000],
+        },
+        index=index
+    )
+
+    prices = frame_to_prices(hist_data)
+    assert len(prices) == 3
+    assert prices[0] == HistoricalPrice(
+        date=date(2023, 1, 3), time=dt_time(9, 30), open=150.0, high=155.0,
+        low=149.0, close=153.0, volume=1000000
+    )
+    assert type(prices[0].volume) is int
+    assert type(prices[0].close) is float
+
+    filtered = frame_to_prices(hist_data, date(2023, 1, 4))
+    assert [price.close for price in filtered] == [155.0]
+    assert filtered[0].model_dump_json() == HistoricalPrice(
+        date=date(2023, 1, 4), time=dt_time(9, 30), open=152.0, high=157.0,
+        low=151.0, close=155.0, volume=3000000
+    ).model_dump_json()
+
+    assert frame_to_prices(hist_data, date(2023, 1, 5)) == []
+    assert frame_to_prices(hist_data.iloc[0:0]) == []
+
+
+@patch('yfinance.Ticker')
+@patch('yfinance.download')
+def test_fetch_many(mock_download, mock_ticker_class):
+    """Test batch fetching with one multi-symbol download and per-ticker errors"""
+    import pandas as pd
+    from app.finance import fetch_many
+    from app.models import TickerRequest
+
+    specific_date = date(2023, 1, 3)
+    fields = ["Open", "High", "Low", "Close", "Volume"]
+    mock_download.return_value = pd.DataFrame(
+        [[150.0, 155.0, 149.0, 153.0, 1000000, 250.0, 255.0, 249.0, 253.0, 2000000]],
+        index=pd.DatetimeIndex([pd.Timestamp(specific_date)]),
+        columns=pd.MultiIndex.from_product([["AAPL", "MSFT"], fields])
+    )
+    # Tickers missing from the download fall back to a single-ticker fetch
+    mock_ticker_class.return_value.history.side_effect = Exception("No data found")
+
+    requests = [
+        TickerRequest(ticker="AAPL", date=specific_date),
+        TickerRequest(ticker="MSFT", date=specific_date),
+        TickerRequest(ticker="BAD", date=specific_date),
+    ]
+    results = fetch_many(requests, include_metadata=False)
+
+    mock_download.assert_called_once()
+    assert mock_download.call_args.args[0] == ["AAPL", "MSFT", "BAD"]
+    assert [result.ticker for result in results] == ["AAPL", "MSFT", "BAD"]
+    assert results[0].data.prices[0].close == 153.0
+    assert results[1].data.prices[0].close == 253.0
+    assert results[2].data is None
+    assert "No data found" in results[2].error
+
+
+def test_plan_fetch_ranges():
+    """Test that only uncovered parts of a range are planned for fetching"""
+    from app.finance import plan_fetch_ranges
+
+    covered = [(date(2023, 1, 5), date(2023, 1, 10)), (date(2023, 1, 15), date(2023, 1, 20))]
+
+    assert plan_fetch_ranges([], date(2023, 1, 1), date(2023, 1, 3)) == [(date(2023, 1, 1), date(2023, 1, 3))]
+    assert plan_fetch_ranges(covered, date(2023, 1, 6), date(2023, 1, 9)) == []
+    assert plan_fetch_ranges(covered, date(2023, 1, 1), date(2023, 1, 25)) == [
+        (date(2023, 1, 1), date(2023, 1, 5)),
+        (date(2023, 1, 10), date(2023, 1, 15)),
+        (date(2023, 1, 20), date(2023, 1, 25)),
+    ]
+    assert plan_fetch_ranges(covered, date(2023, 1, 8), date(2023, 1, 16)) == [
+        (date(2023, 1, 10), date(2023, 1, 15)),
+    ]
+    assert plan_fetch_ranges(covered, date(2023, 1, 10), date(2023, 1, 25), max_days=3) == [
+        (date(2023, 1, 10), date(2023, 1, 13)),
+        (date(2023, 1, 13), date(2023, 1, 15)),
+        (date(2023, 1, 20), date(2023, 1, 23)),
+        (date(2023, 1, 23), date(2023, 1, 25)),
+    ]
+
+
+def test_load_history_fetches_only_gaps():
+    """Test that a range query downloads only what the local store lacks"""
+    import pandas as pd
+    from app.finance import load_history
+
+    def history(start, end, interval):
+        days = pd.date_range(start, end, inclusive="left", tz="America/New_York")
+        return pd.DataFrame(
+            {"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": 1.5, "Volume": 100, "Dividends": 0.0},
+            index=days
+        )
+
+    yf_ticker = MagicMock()
+    yf_ticker.history.side_effect = history
+    today = date(2023, 2, 1)
+
+    first = load_history(yf_ticker, "AAPL", date(2023, 1, 10), date(2023, 1, 20), "1d", "America/New_York", today)
+    assert len(first) == 10
+    assert list(first.columns) == ["Open", "High", "Low", "Close", "Volume"]
+
+    yf_ticker.history.reset_mock()
+    wider = load_history(yf_ticker, "AAPL", date(2023, 1, 5), date(2023, 1, 25), "1d", "America/New_York", today)
+
+    assert len(wider) == 20
+    assert [call.kwargs["start"] for call in yf_ticker.history.call_args_list] == [date(2023, 1, 5), date(2023, 1, 20)]
+    assert wider.index.is_monotonic_increasing
+
+    # Days from today on are always fetched live and never stored
+    yf_ticker.history.reset_mock()
+    live = load_history(yf_ticker, "AAPL", date(2023, 1, 30), date(2023, 2, 3), "1d", "America/New_York", today)
+    assert len(live) == 4
+    assert [call.kwargs["start"] for call in yf_ticker.history.call_args_list] == [date(2023, 1, 30), date(2023, 2, 1)]
+
+
+def test_load_history_does_not_store_expired_intraday_ranges():
+    """Test that intraday bars older than Yahoo keeps are not recorded as a range without bars"""
+    import pandas as pd
+    from app.finance import load_history
+    from app.store import get_price_store
+
+    yf_ticker = MagicMock()
+    yf_ticker.history.return_value = pd.DataFrame()
+    today = date(2023, 6, 1)
+
+    expired = load_history(yf_ticker, "AAPL", date(2023, 1, 2), date(2023, 1, 4), "5m", "America/New_York", today)
+    recent = load_history(yf_ticker, "AAPL", date(2023, 5, 29), date(2023, 5, 31), "5m", "America/New_York", today)
+
+    assert expired.empty and recent.empty
+    assert not get_price_store().covers("AAPL", "5m", date(2023, 1, 2), date(2023, 1, 4))
+    # Within the window an empty range is a holiday and is remembered
+    assert get_price_store().covers("AAPL", "5m", date(2023, 5, 29), date(2023, 5, 31))
+
+    # 1 minute bars are requested a week at a time
+    yf_ticker.history.reset_mock()
+    load_history(yf_ticker, "AAPL", date(2023, 5, 10), date(2023, 5, 25), "1m", "America/New_York", today)
+    assert [call.kwargs["start"] for call in yf_ticker.history.call_args_list] == [
+        date(2023, 5, 10), date(2023, 5, 17), date(2023, 5, 24)
+    ]
@@ -0,0 +1,88 @@
+import io
+import json
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from app.formats import (
+    negotiate_format, iter_ndjson, iter_csv, encode_arrow, encode_arrow_file, encode_parquet, JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE, ARROW_MEDIA_TYPE, ARROW_FILE_MEDIA_TYPE, PARQUET_MEDIA_TYPE, CSV_HEADER
+)
+
+
+def minute_frame(rows):
+    """Build a Ticker.history()-shaped 1 minute frame"""
+    return pd.DataFrame(
+        {
+            "Open": np.arange(rows, dtype=float) + 100.0,
+            "High": np.arange(rows, dtype=float) + 101.0,
+            "Low": np.arange(rows, dtype=float) + 99.0,
+            "Close": np.arange(rows, dtype=float) + 100.5,
+            "Volume": np.arange(rows) * 10,
+        },
+        index=pd.date_range("2023-01-03 09:30", periods=rows, freq="1min", tz="America/New_York")
+    )
+
+
+def test_negotiate_format():
+    """Test picking the response type from the Accept header"""
+    assert negotiate_format(None) == JSON_MEDIA_TYPE
+    assert negotiate_format("*/*") == JSON_MEDIA_TYPE
+    assert negotiate_format("application/x-ndjson") == NDJSON_MEDIA_TYPE
+    assert negotiate_format("text/csv; charset=utf-8") == CSV_MEDIA_TYPE
+    assert negotiate_format("application/json;q=0.5, text/csv") == CSV_MEDIA_TYPE
+    assert negotiate_format("text/csv;q=0, application/x-ndjson;q=0.1") == NDJSON_MEDIA_TYPE
+    assert negotiate_format("text/html,application/xhtml+xml,*/*;q=0.8") == JSON_MEDIA_TYPE
+
+
+def test_iter_ndjson_chunks_rows():
+    """Test that NDJSON output is chunked and skips rows without a close"""
+    frame = minute_frame(5)
+    frame.iloc[2, frame.columns.get_loc("Close")] = np.nan
+
+    chunks = list(iter_ndjson(frame, chunk_rows=2))
+    lines = [json.loads(line) for line in "".join(chunks).splitlines()]
+
+    assert len(chunks) == 2
+    assert len(lines) == 4
+    assert lines[0] == {
+        "date": "2023-01-03", "time": "09:30:00",
+        "open": 100.0, "high": 101.0, "low": 99.0, "close": 100.5, "volume": 0,
+    }
+    assert lines[-1]["time"] == "09:34:00"
+
+
+def test_iter_csv():
+    """Test CSV output for a frame and an empty frame"""
+    lines = "".join(iter_csv(minute_frame(2))).splitlines()
+    assert lines == [
+        CSV_HEADER.strip(),
+        "2023-01-03,09:30:00,100.0,101.0,99.0,100.5,0",
+        "2023-01-03,09:31:00,101.0,102.0,100.0,101.5,10",
+    ]
+    assert "".join(iter_csv(pd.DataFrame())) == CSV_HEADER
+
+
+def test_encode_arrow_and_parquet_round_trip():
+    """Test that the columnar formats decode back to the same prices"""
+    pa = pytest.importorskip("pyarrow")
+    frame = minute_frame(3)
+
+    arrow = pa.ipc.open_stream(encode_arrow(frame)).read_pandas()
+    arrow_file = pa.ipc.open_file(encode_arrow_file(frame)).read_pandas()
+    parquet = pd.read_parquet(io.BytesIO(encode_parquet(frame)))
+
+    for decoded in (arrow, arrow_file, parquet):
+        assert decoded.columns.tolist() == ["timestamp", "open", "high", "low", "close", "volume"]
+        assert decoded["close"].tolist() == [100.5, 101.5, 102.5]
+        assert decoded["volume"].tolist() == [0, 10, 20]
+        assert decoded["timestamp"].iloc[0] == pd.Timestamp("2023-01-03 09:30", tz="America/New_York")
+
+
+def test_negotiate_columnar_formats():
+    """Test Arrow and Parquet negotiation including the common aliases"""
+    pytest.importorskip("pyarrow")
+    assert negotiate_format(ARROW_MEDIA_TYPE) == ARROW_MEDIA_TYPE
+    assert negotiate_format(ARROW_FILE_MEDIA_TYPE) == ARROW_FILE_MEDIA_TYPE
+    assert negotiate_format("application/x-parquet") == PARQUET_MEDIA_TYPE
@@ -0,0 +1,178 @@
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app.auth import API_KEY
+from app.indicators import IndicatorState, IndicatorStates, get_indicator_states
+from main import app
+
+client = TestClient(app)
+
+
+def random_bars(count, freq="1min", start="2024-03-05 09:30", tz="America/New_York", seed=0):
+    """Random-walk bars, by default 1 minute bars from 09:30"""
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 0.5, count))
+    return pd.DataFrame(
+        {
+            "Open": closes - 0.1,
+            "High": closes + rng.uniform(0, 1, count),
+            "Low": closes - rng.uniform(0, 1, count),
+            "Close": closes,
+            "Volume": rng.integers(1000, 5000, count),
+        },
+        index=pd.date_range(start, periods=count, freq=freq, tz=tz)
+    )
+
+
+def reference(frame, window=20, rsi_period=14, bollinger_std=2.0):
+    """The indicators computed bar by bar, the textbook way"""
+    close = frame["Close"].to_numpy()
+    count = len(close)
+    ema = np.full(count, np.nan)
+    ema[window - 1] = close[:window].mean()
+    for i in range(window, count):
+        ema[i] = ema[i - 1] + 2 / (window + 1) * (close[i] - ema[i - 1])
+    delta = np.diff(close, prepend=close[0])
+    gain, loss = np.clip(delta, 0, None), np.clip(-delta, 0, None)
+    avg_gain, avg_loss = np.full(count, np.nan), np.full(count, np.nan)
+    avg_gain[rsi_period], avg_loss[rsi_period] = gain[1:rsi_period + 1].mean(), loss[1:rsi_period + 1].mean()
+    for i in range(rsi_period + 1, count):
+        avg_gain[i] = avg_gain[i - 1] + (gain[i] - avg_gain[i - 1]) / rsi_period
+        avg_loss[i] = avg_loss[i - 1] + (loss[i] - avg_loss[i - 1]) / rsi_period
+    sma = frame["Close"].rolling(window).mean()
+    std = frame["Close"].rolling(window).std(ddof=0)
+    typical = (frame["High"] + frame["Low"] + frame["Close"]) / 3 * frame["Volume"]
+    day = frame.index.date
+    return pd.DataFrame(
+        {
+            "Close": close,
+            "SMA": sma,
+            "EMA": ema,
+            "RSI": 100 - 100 / (1 + avg_gain / avg_loss),
+            "VWAP": typical.groupby(day).cumsum() / frame["Volume"].groupby(day).cumsum(),
+            "BollingerUpper": sma + bollinger_std * std,
+            "BollingerLower": sma - bollinger_std * std,
+        },
+        index=frame.index
+    )
+
+
+def test_indicators_match_reference():
+    """Test SMA/EMA/RSI/VWAP/Bollinger against a bar-by-bar computation, VWAP restarting each day"""
+    frame = random_bars(1000)
+    state = IndicatorState(window=20, rsi_period=14, intraday=True)
+
+    state.update(frame)
+    values = state.to_frame()
+
+    expected = reference(frame)
+    assert np.allclose(values.to_numpy(), expected.to_numpy(), equal_nan=True)
+    assert values["SMA"].iloc[:19].isna().all() and values["RSI"].iloc[:14].isna().all()
+    # 1000 bars from 09:30 run past midnight: the VWAP starts over with the first bar of the next day
+    midnight = frame.iloc[870]
+    assert np.isclose(values["VWAP"].iloc[870], (midnight["High"] + midnight["Low"] + midnight["Close"]) / 3)
+
+
+def test_indicators_update_incrementally():
+    """Test that new bars are computed from the stored state and give the same values"""
+    frame = random_bars(500)
+    state = IndicatorState()
+    state.update(frame.iloc[:300])
+
+    assert state.update(frame.iloc[:301]) == 2
+    # The last bar is still running: a changed close replaces its values
+    running = frame.iloc[:301].copy()
+    running.iloc[-1, running.columns.get_loc("Close")] += 5
+    assert state.update(running) == 1
+    assert state.update(frame) == 200
+
+    full = IndicatorState()
+    full.update(frame)
+    assert np.allclose(state.to_frame().to_numpy(), full.to_frame().to_numpy(), equal_nan=True)
+    assert state.recomputed == 1
+
+
+def test_indicators_recompute_a_new_series():
+    """Test that bars that do not continue the stored ones are computed from scratch"""
+    state = IndicatorState()
+    state.update(random_bars(100, start="2024-03-04 09:30"))
+
+    assert state.update(random_bars(60, start="2024-03-05 09:30")) == 60
+    assert len(state) == 60
+    assert state.recomputed == 2
+
+
+def test_indicator_states_are_bounded_by_bars():
+    """Test that least recently used series are dropped once the bars stored exceed the limit"""
+    states = IndicatorStates(max_bars=250)
+    states.update("a", IndicatorState, random_bars(100))
+    states.update("b", IndicatorState, random_bars(100, seed=1))
+    states.update("a", IndicatorState, random_bars(120))
+
+    states.update("c", IndicatorState, random_bars(100, seed=2))
+
+    stats = states.stats()
+    assert (stats["series"], stats["bars"], stats["evictions"]) == (2, 220, 1)
+    # A series larger than the limit is kept until the next one comes in
+    states.update("d", IndicatorState, random_bars(300, seed=3))
+    assert states.stats()["series"] == 1
+    assert states.update("d", IndicatorState, random_bars(300, seed=3)).recomputed == 1
+
+
+@patch('yfinance.Ticker')
+def test_bollinger_width_shares_the_indicator_state(mock_ticker):
+    """Test that requests differing only in bollinger_std use one state, the bands applied when rendered"""
+    frame = random_bars(60, freq="1D", start="2023-01-02 00:00")
+    mock_instance = MagicMock()
+    mock_instance.history.return_value = frame
+    mock_ticker.return_value = mock_instance
+    url = "/ticker/AAPL/indicators?start=2023-01-02&end=2023-03-02"
+
+    narrow = client.get(url + "&bollinger_std=1", headers={"X-API-Key": API_KEY}).json()["values"][-1]
+    wide = client.get(url + "&bollinger_std=3", headers={"X-API-Key": API_KEY}).json()["values"][-1]
+
+    assert get_indicator_states().stats()["series"] == 1
+    expected = reference(frame, bollinger_std=3.0)
+    assert np.isclose(wide["bollinger_upper"], expected["BollingerUpper"].iloc[-1])
+    assert np.isclose(wide["bollinger_upper"] - wide["sma"], 3 * (narrow["bollinger_upper"] - narrow["sma"]))
+
+
+@patch('yfinance.Ticker')
+def test_ticker_indicators_endpoint(mock_ticker):
+    """Test /ticker/{ticker}/indicators over a daily range"""
+    frame = random_bars(60, freq="1D", start="2023-01-02 00:00")
+    mock_instance = MagicMock()
+    mock_instance.history.return_value = frame
+    mock_ticker.return_value = mock_instance
+
+    response = client.get(
+        "/ticker/AAPL/indicators?start=2023-01-02&end=2023-03-02&window=10&rsi_period=5",
+        headers={"X-API-Key": API_KEY}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["interval"] == "1d"
+    assert data["parameters"] == {"window": 10, "rsi_period": 5, "bollinger_std": 2.0}
+    values = data["values"]
+    assert len(values) == 60
+    assert values[0]["sma"] is None and values[9]["sma"] is not None
+    assert values[4]["rsi"] is None and values[5]["rsi"] is not None
+    expected = reference(frame, window=10, rsi_period=5)
+    assert np.isclose(values[-1]["sma"], expected["SMA"].iloc[-1])
+    # Daily bars: the VWAP is anchored at the first bar of the range
+    typical = (frame["High"] + frame["Low"] + frame["Close"]) / 3
+    assert np.isclose(values[-1]["vwap"], (typical * frame["Volume"]).sum() / frame["Volume"].sum())
+    assert get_indicator_states().stats()["series"] == 1
+
+
+def test_ticker_indicators_validates_parameters():
+    """Test that bad windows and contradictory parameters are rejected"""
+    headers = {"X-API-Key": API_KEY}
+
+    assert client.get("/ticker/AAPL/indicators?window=1", headers=headers).status_code == 422
+    assert client.get("/ticker/AAPL/indicators?start=2024-03-01&resample=1h", headers=headers).status_code == 400
+    assert client.get("/ticker/AAPL/indicators").status_code == 401
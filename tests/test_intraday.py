@@ -0,0 +1,168 @@
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app.auth import API_KEY
+from app.cache import get_cache
+from app.finance import last_good_responses
+from app.intraday import IntradayBuffer, IntradayBuffers, get_intraday_buffers
+from main import app
+
+client = TestClient(app)
+
+
+def session_bars(count, start="09:30", day=None, tz="America/New_York"):
+    """1 minute bars with closes 100, 101, ... from `start` on `day` (today by default)"""
+    day = day or pd.Timestamp.now(tz=tz).strftime("%Y-%m-%d")
+    closes = [100.0 + i for i in range(count)]
+    return pd.DataFrame(
+        {"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": [1000] * count},
+        index=pd.date_range(f"{day} {start}", periods=count, freq="1min", tz=tz)
+    )
+
+
+def test_buffer_appends_only_new_bars():
+    """Test that merging a longer fetch of the session appends just the new bars"""
+    buffer = IntradayBuffer(capacity=100)
+
+    assert buffer.merge(session_bars(10)) == 10
+    assert buffer.merge(session_bars(10)) == 0
+    assert buffer.merge(session_bars(13)) == 3
+
+    assert len(buffer) == 13
+    assert buffer.since().equals(session_bars(13).astype({"Volume": "int64"}))
+
+
+def test_buffer_replaces_the_running_bar():
+    """Test that the last bar is updated in place when a fetch changes it"""
+    buffer = IntradayBuffer(capacity=100)
+    buffer.merge(session_bars(5))
+    frame = session_bars(5)
+    frame.iloc[-1, frame.columns.get_loc("Close")] = 42.0
+
+    buffer.merge(frame)
+
+    assert len(buffer) == 5
+    assert buffer.since()["Close"].iloc[-1] == 42.0
+
+
+def test_buffer_since_cursor():
+    """Test reading the bars from a cursor on, naive or tz-aware"""
+    buffer = IntradayBuffer(capacity=100)
+    frame = session_bars(30)
+    buffer.merge(frame)
+    cursor = frame.index[25]
+
+    assert list(buffer.since(cursor).index) == list(frame.index[25:])
+    assert list(buffer.since(cursor.tz_localize(None)).index) == list(frame.index[25:])
+    assert list(buffer.since(cursor.tz_convert("UTC")).index) == list(frame.index[25:])
+    assert buffer.since(frame.index[-1] + pd.Timedelta(minutes=1)).empty
+
+
+def test_buffer_wraps_around():
+    """Test that past its capacity the buffer keeps the newest bars in order"""
+    buffer = IntradayBuffer(capacity=8)
+    frame = session_bars(20)
+    for count in range(5, 21, 5):
+        buffer.merge(frame.iloc[:count])
+
+    assert len(buffer) == 8
+    assert list(buffer.since().index) == list(frame.index[12:])
+    assert list(buffer.since(frame.index[15]).index) == list(frame.index[15:])
+
+
+def test_buffer_starts_over_on_a_new_session():
+    """Test that bars of a new session date replace the previous session"""
+    buffer = IntradayBuffer(capacity=100)
+    buffer.merge(session_bars(10, day="2024-03-04"))
+
+    buffer.merge(session_bars(3, day="2024-03-05"))
+
+    assert len(buffer) == 3
+    assert buffer.since().index[0].date().isoformat() == "2024-03-05"
+
+
+def test_buffers_evict_least_recently_used():
+    """Test the bound on the number of buffered symbols"""
+    buffers = IntradayBuffers(max_tickers=2, capacity=10)
+    first = buffers.get("AAPL", "US", "1m")
+    buffers.get("MSFT", "US", "1m")
+    buffers.get("AAPL", "US", "1m")
+    buffers.get("GOOG", "US", "1m")
+
+    assert buffers.get("AAPL", "US", "1m") is first
+    assert buffers.stats()["evictions"] == 1
+
+
+@patch('yfinance.Ticker')
+def test_ticker_since_returns_only_newer_bars(mock_ticker):
+    """Test that /ticker?since= returns the bars from the cursor on, from the intraday buffer"""
+    frame = session_bars(390)
+    mock_instance = MagicMock()
+    mock_instance.history.return_value = frame
+    mock_instance.info = {"shortName": "Apple Inc."}
+    mock_ticker.return_value = mock_instance
+    cursor = frame.index[387].tz_localize(None).isoformat()
+
+    full = client.get("/ticker/AAPL?metadata=false", headers={"X-API-Key": API_KEY})
+    delta = client.get(f"/ticker/AAPL?metadata=false&since={cursor}", headers={"X-API-Key": API_KEY})
+
+    assert len(full.json()["prices"]) == 390
+    assert delta.status_code == 200
+    assert [price["close"] for price in delta.json()["prices"]] == [487.0, 488.0, 489.0]
+    assert delta.json()["prices"][0]["time"] == frame.index[387].strftime("%H:%M:%S")
+    # The delta was served from the buffer filled by the first request
+    assert mock_instance.history.call_count == 1
+    assert get_intraday_buffers().stats()["bars"] == 390
+
+
+@patch('yfinance.Ticker')
+def test_ticker_since_polls_share_the_stale_fallback(mock_ticker):
+    """Test that polls do not keep stale fallbacks of their own but are served from the full response's"""
+    frame = session_bars(390)
+    mock_instance = MagicMock()
+    mock_instance.history.return_value = frame
+    mock_ticker.return_value = mock_instance
+
+    client.get("/ticker/AAPL?metadata=false", headers={"X-API-Key": API_KEY})
+    for minute in range(380, 390):
+        cursor = frame.index[minute].tz_localize(None).isoformat()
+        client.get(f"/ticker/AAPL?metadata=false&since={cursor}", headers={"X-API-Key": API_KEY})
+    assert len(last_good_responses) == 1
+
+    get_cache().clear()
+    mock_instance.history.side_effect = RuntimeError("upstream down")
+    cursor = frame.index[387].tz_localize(None).isoformat()
+    stale = client.get(f"/ticker/AAPL?metadata=false&since={cursor}", headers={"X-API-Key": API_KEY})
+
+    assert stale.status_code == 200
+    assert stale.json()["metadata"]["stale"] is True
+    assert [price["close"] for price in stale.json()["prices"]] == [487.0, 488.0, 489.0]
+
+
+def test_ticker_since_accepts_epoch_seconds():
+    """Test that the cursor may be given in epoch seconds"""
+    frame = session_bars(10)
+    buffer = get_intraday_buffers().get("AAPL", "US", "1m")
+    buffer.merge(frame)
+
+    with patch("app.finance.get_cache") as mock_cache:
+        mock_cache.return_value.get.return_value = frame
+        response = client.get(
+            f"/ticker/AAPL?metadata=false&since={int(frame.index[8].timestamp())}", headers={"X-API-Key": API_KEY}
+        )
+
+    assert response.status_code == 200
+    assert len(response.json()["prices"]) == 2
+
+
+def test_since_rejected_with_a_date_or_range():
+    """Test that since only applies to the latest trading day"""
+    response = client.get(
+        f"/ticker/AAPL?date=2024-03-05&since={datetime(2024, 3, 5, 10).isoformat()}",
+        headers={"X-API-Key": API_KEY}
+    )
+
+    assert response.status_code == 400
@@ -0,0 +1,122 @@
+import threading
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+
+import pandas as pd
+from yfinance.exceptions import YFPricesMissingError
+
+from app.limiter import AdaptiveConcurrencyLimiter, TokenBucket, UpstreamBusyError, UpstreamLimiter
+from app.providers import YahooProvider
+
+
+def test_token_bucket_reserves_in_order():
+    """Test that the burst is free and later tokens are spaced by the rate"""
+    now = [0.0]
+    bucket = TokenBucket(rate=10, burst=2, clock=lambda: now[0])
+
+    assert bucket.reserve(timeout=0) == 0
+    assert bucket.reserve(timeout=0) == 0
+    assert bucket.reserve(timeout=0.05) is None
+    assert bucket.reserve(timeout=1) == pytest.approx(0.1)
+    assert bucket.reserve(timeout=1) == pytest.approx(0.2)
+
+    now[0] = 1.0
+    assert bucket.available() == pytest.approx(2)
+
+
+def test_adaptive_limit_increases_and_backs_off():
+    """Test additive increase on fast successes and multiplicative decrease otherwise"""
+    limiter = AdaptiveConcurrencyLimiter(initial=4, min_limit=1, max_limit=8, latency_target=1.0)
+
+    for _ in range(4):
+        assert limiter.acquire(timeout=0)
+        limiter.release(latency=0.1, ok=True)
+    assert limiter.limit == pytest.approx(5, abs=0.1)
+
+    assert limiter.acquire(timeout=0)
+    limiter.release(latency=0.1, ok=False)
+    assert limiter.limit == pytest.approx(2.5, abs=0.1)
+
+    assert limiter.acquire(timeout=0)
+    limiter.release(latency=5.0, ok=True)
+    assert limiter.limit == pytest.approx(1.25, abs=0.1)
+
+    for _ in range(3):
+        assert limiter.acquire(timeout=0)
+        limiter.release(latency=5.0, ok=True)
+    assert limiter.limit == 1
+
+
+def test_upstream_limiter_rejects_after_max_wait():
+    """Test that callers queue for a slot and are rejected after max_wait"""
+    limiter = UpstreamLimiter(
+        rate=1000, burst=1000, max_wait=0.1,
+        concurrency=AdaptiveConcurrencyLimiter(initial=1, min_limit=1, max_limit=1)
+    )
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_call():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    worker = threading.Thread(target=limiter.call, args=(slow_call,))
+    worker.start()
+    started.wait(5)
+
+    with pytest.raises(UpstreamBusyError) as excinfo:
+        limiter.call(lambda: "never")
+    assert excinfo.value.retry_after == 0.1
+
+    release.set()
+    worker.join()
+    assert limiter.call(lambda: "after") == "after"
+
+    stats = limiter.stats()
+    assert stats["rejected"] == 1
+    assert stats["calls"] == 2
+    assert stats["in_flight"] == 0
+    assert stats["queued"] == 0
+
+
+def test_upstream_limiter_counts_errors():
+    """Test that upstream errors propagate and shrink the limit"""
+    limiter = UpstreamLimiter(concurrency=AdaptiveConcurrencyLimiter(initial=8, min_limit=1, max_limit=16))
+
+    def failing_call():
+        raise RuntimeError("Too Many Requests")
+
+    with pytest.raises(RuntimeError):
+        limiter.call(failing_call)
+
+    assert limiter.stats()["errors"] == 1
+    assert limiter.stats()["limit"] == 4
+
+
+@patch('yfinance.Ticker')
+def test_upstream_limiter_counts_yahoo_failures(mock_ticker_class):
+    """Test that a failed Yahoo download shrinks the limit, a range without prices does not"""
+    limiter = UpstreamLimiter(concurrency=AdaptiveConcurrencyLimiter(initial=8, min_limit=1, max_limit=16))
+    mock_ticker = MagicMock()
+    mock_ticker_class.return_value = mock_ticker
+
+    def yahoo_down(raise_errors=False, **kwargs):
+        # yfinance only raises when asked to, otherwise it returns an empty frame
+        if raise_errors:
+            raise RuntimeError("*** YAHOO! FINANCE IS CURRENTLY DOWN! ***")
+        return pd.DataFrame()
+
+    mock_ticker.history.side_effect = yahoo_down
+    with patch("app.providers.get_upstream_limiter", return_value=limiter):
+        with pytest.raises(RuntimeError):
+            YahooProvider().history("AAPL", period="1d", interval="1m")
+        assert limiter.stats()["errors"] == 1
+        assert limiter.stats()["limit"] == 4
+
+        mock_ticker.history.side_effect = YFPricesMissingError("AAPL", "(period=1d)")
+        assert YahooProvider().history("AAPL", period="1d", interval="1m").empty
+
+    assert limiter.stats()["calls"] == 2
+    assert limiter.stats()["errors"] == 1
@@ -0,0 +1,97 @@
+import time
+import pytest
+from datetime import date
+from unittest.mock import patch, MagicMock
+
+import pandas as pd
+
+from app.finance import fetch_from_yahoo
+from app.metadata import MetadataStore
+
+APPLE_INFO = {
+    "shortName": "Apple Inc.",
+    "sector": "Technology",
+    "industry": "Consumer Electronics",
+    "currency": "USD",
+    "exchange": "NMS",
+    "longBusinessSummary": "Not kept in the store",
+}
+
+
+def wait_for_refresh(store: MetadataStore, timeout: float = 1.0):
+    """Wait until no background refresh is running"""
+    deadline = time.time() + timeout
+    while store.stats()["refreshing"] and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_metadata_store_loads_once_and_trims_fields(tmp_path):
+    """Test that metadata is loaded once and only the used fields are kept"""
+    store = MetadataStore(str(tmp_path / "metadata.sqlite3"))
+    loader = MagicMock(return_value=APPLE_INFO)
+
+    first = store.get("AAPL", loader)
+    second = store.get("AAPL", loader)
+
+    assert first == second
+    assert first["shortName"] == "Apple Inc."
+    assert "longBusinessSummary" not in first
+    loader.assert_called_once_with("AAPL")
+    assert store.stats()["hits"] == 1
+    assert store.stats()["misses"] == 1
+
+
+def test_metadata_store_persists_to_disk(tmp_path):
+    """Test that a new store instance reads metadata saved by a previous one"""
+    path = str(tmp_path / "metadata.sqlite3")
+    MetadataStore(path).put("AAPL", APPLE_INFO)
+
+    loader = MagicMock(return_value={})
+    info = MetadataStore(path).get("AAPL", loader)
+
+    assert info["sector"] == "Technology"
+    loader.assert_not_called()
+
+
+def test_metadata_store_refreshes_ahead_in_background(tmp_path):
+    """Test that aging entries are served immediately and refreshed in the background"""
+    store = MetadataStore(str(tmp_path / "metadata.sqlite3"), refresh_seconds=100, refresh_ahead=0.5)
+    store.put("AAPL", {"shortName": "Old Name"}, fetched_at=time.time() - 60)
+    loader = MagicMock(return_value=APPLE_INFO)
+
+    info = store.get("AAPL", loader)
+    wait_for_refresh(store)
+
+    assert info["shortName"] == "Old Name"
+    loader.assert_called_once_with("AAPL")
+    assert store.get("AAPL", loader)["shortName"] == "Apple Inc."
+    assert store.stats()["refreshes"] == 1
+
+
+def test_metadata_store_reloads_expired_entries(tmp_path):
+    """Test that expired entries are reloaded, falling back to the old value on errors"""
+    store = MetadataStore(str(tmp_path / "metadata.sqlite3"), refresh_seconds=10)
+    store.put("AAPL", {"shortName": "Old Name"}, fetched_at=time.time() - 20)
+
+    failing_loader = MagicMock(side_effect=Exception("upstream down"))
+    assert store.get("AAPL", failing_loader)["shortName"] == "Old Name"
+    assert store.stats()["refresh_errors"] == 1
+
+    assert store.get("AAPL", MagicMock(return_value=APPLE_INFO))["shortName"] == "Apple Inc."
+
+
+@patch('yfinance.Ticker')
+def test_fetch_from_yahoo_skips_metadata(mock_ticker_class):
+    """Test that include_metadata=False never touches Ticker.info"""
+    mock_ticker = MagicMock()
+    mock_ticker_class.return_value = mock_ticker
+    mock_ticker.history.return_value = pd.DataFrame(
+        {"Open": [150.0], "High": [155.0], "Low": [149.0], "Close": [153.0], "Volume": [1000000]},
+        index=pd.DatetimeIndex([pd.Timestamp("2023-01-03", tz="America/New_York")])
+    )
+    type(mock_ticker).info = property(lambda self: pytest.fail("info should not be fetched"))
+
+    result = fetch_from_yahoo("AAPL", "US", date(2023, 1, 3), include_metadata=False)
+
+    assert len(result.prices) == 1
+    assert result.metadata == {"data_source": "Yahoo Finance"}
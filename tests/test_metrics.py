@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from app.metrics import Registry, UPSTREAM_ERRORS, UPSTREAM_SECONDS, flatten_stats, track_upstream
+from app.auth import API_KEY
+from benchmarks.synthetic import make_history_frame
+from main import app
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test the Prometheus text format of a histogram"""
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5, route="/a")
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE finance_collector_latency_seconds histogram" in lines
+    assert 'finance_collector_latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'finance_collector_latency_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'finance_collector_latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'finance_collector_latency_seconds_sum{route="/a"} 5.55' in lines
+    assert 'finance_collector_latency_seconds_count{route="/a"} 3' in lines
+
+
+def test_counter_and_collectors():
+    """Test counters, label escaping and collector gauges"""
+    registry = Registry()
+    counter = registry.counter("errors_total", "Errors", ("provider",))
+    counter.inc(provider='a "b"')
+    counter.inc(2, provider='a "b"')
+    registry.register_collector(lambda: {"cache_hits": ("Hits", [({}, 7)])})
+
+    text = registry.render()
+
+    assert 'finance_collector_errors_total{provider="a \\"b\\""} 3' in text
+    assert "# TYPE finance_collector_cache_hits gauge\nfinance_collector_cache_hits 7" in text
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+
+
+def test_track_upstream_counts_errors():
+    """Test that failed provider calls are timed and counted"""
+    with pytest.raises(RuntimeError):
+        with track_upstream("Test", "history"):
+            raise RuntimeError("down")
+
+    assert UPSTREAM_ERRORS.value(provider="Test", call="history") == 1
+    assert UPSTREAM_SECONDS.count(provider="Test", call="history") == 1
+
+
+def test_flatten_stats():
+    """Test that only numeric leaves become gauges"""
+    stats = {"cache": {"backend": "memory", "hits": 3, "hit_ratio": 0.5}, "warmup": {"ready": True}}
+
+    assert flatten_stats(stats) == {"cache_hits": 3.0, "cache_hit_ratio": 0.5, "warmup_ready": 1.0}
+
+
+@patch("yfinance.Ticker")
+def test_metrics_endpoint(mock_ticker):
+    """Test that a ticker request shows up in the endpoint, upstream and serialization metrics"""
+    mock_ticker.return_value.history.return_value = make_history_frame(5, "1D", start="2024-01-02")
+    mock_ticker.return_value.info = {"shortName": "Apple Inc."}
+
+    response = client.get("/ticker/AAPL?date=2024-01-03", headers={"X-API-Key": API_KEY})
+    assert response.status_code == 200
+
+    assert client.get("/metrics").status_code == 401
+    metrics = client.get("/metrics", headers={"X-API-Key": API_KEY})
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain")
+    text = metrics.text
+    assert 'http_request_seconds_count{method="GET",route="/ticker/{ticker}",status="200"} 1' in text
+    assert 'upstream_seconds_count{provider="Yahoo Finance",call="history"} 1' in text
+    assert 'serialization_seconds_count{format="json"} 1' in text
+    assert "conversion_seconds_count 1" in text
+    assert "finance_collector_cache_misses 1" in text
@@ -1,8 +1,12 @@
+import pickle
+
 import pytest
 from datetime import date
+
+import pandas as pd
 from pydantic import ValidationError
 
-from app.models import TokenRequest, Token, TickerRequest, HistoricalPrice, TickerResponse
+from app.models import TokenRequest, Token, TickerRequest, HistoricalPrice, TickerResponse, PriceSeries
 
 
 def test_token_request_model():
@@ -169,3 +173,41 @@ def test_ticker_response_model():
         prices=[price]
     )
     assert response.metadata == {}
+
+
+def test_price_series_round_trip():
+    """Test that a PriceSeries gives back the bars and time zone of its DataFrame"""
+    frame = pd.DataFrame(
+        {
+            "Open": [150.0, 151.0],
+            "High": [155.0, 156.0],
+            "Low": [149.0, 150.0],
+            "Close": [153.0, 154.5],
+            "Volume": [1000000, 2000000],
+        },
+        index=pd.date_range("2024-03-05 09:30", periods=2, freq="1min", tz="America/New_York")
+    )
+
+    series = PriceSeries.from_frame(frame)
+
+    assert len(series) == 2
+    assert series.tz == "America/New_York"
+    assert series.nbytes == 2 * 48
+    assert series.to_frame().equals(frame)
+    assert pickle.loads(pickle.dumps(series)) == series
+
+
+def test_price_series_naive_and_empty_frames():
+    """Test that a naive index takes the given time zone, also for an empty frame"""
+    frame = pd.DataFrame(
+        {"Open": [1.0], "High": [1.0], "Low": [1.0], "Close": [1.0], "Volume": [float("nan")]},
+        index=pd.DatetimeIndex([pd.Timestamp("2024-03-05")])
+    )
+
+    series = PriceSeries.from_frame(frame, "Europe/London")
+    empty = PriceSeries.from_frame(frame.iloc[:0], "Europe/London")
+
+    assert series.to_frame().index[0] == pd.Timestamp("2024-03-05", tz="Europe/London")
+    assert series.volume[0] == 0
+    assert empty.empty and empty.tz == "Europe/London"
+    assert empty.to_frame().empty
@@ -0,0 +1,161 @@
+import threading
+import pytest
+from datetime import date
+
+import httpx
+import pandas as pd
+
+from app.finance import (
+    fetch_historical_data, get_provider, get_provider_stats, get_providers, register_provider, set_provider_routes
+)
+from app.providers import FileProvider, HTTPProvider, HedgedProvider, Provider, PROVIDER_ROUTES
+
+
+class StaticProvider(Provider):
+    """Provider returning a fixed frame after an optional delay, or raising"""
+
+    def __init__(self, name, frame=None, delay=0.0, error=None):
+        self.name = name
+        self.frame = frame
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self._released = threading.Event()
+
+    def history(self, ticker, start=None, end=None, interval="1d", period=None):
+        self.calls += 1
+        if self.delay:
+            self._released.wait(self.delay)
+        if self.error:
+            raise self.error
+        return self.frame
+
+
+def daily_frame(closes, tz="Asia/Seoul"):
+    return pd.DataFrame(
+        {"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": [100] * len(closes)},
+        index=pd.date_range("2024-01-02", periods=len(closes), freq="1D", tz=tz)
+    )
+
+
+@pytest.fixture
+def provider_routes():
+    """Restore the provider registry and routes after a test"""
+    providers = dict(get_providers())
+    yield set_provider_routes
+    get_providers().clear()
+    get_providers().update(providers)
+    set_provider_routes(PROVIDER_ROUTES)
+
+
+def test_file_provider_reads_csv(tmp_path):
+    """Test reading, localizing and filtering bars from a CSV file"""
+    (tmp_path / "1d").mkdir()
+    (tmp_path / "1d" / "005930.KS.csv").write_text(
+        "date,open,high,low,close,volume\n"
+        "2024-01-02,100,110,90,105,1000\n"
+        "2024-01-03,105,115,95,110,2000\n"
+        "2024-01-04,110,120,100,115,3000\n"
+    )
+    provider = FileProvider(str(tmp_path), timezone_for=lambda ticker: "Asia/Seoul")
+
+    frame = provider.history("005930.KS", start=date(2024, 1, 3), end=date(2024, 1, 5))
+    assert frame["Close"].tolist() == [110, 115]
+    assert str(frame.index.tz) == "Asia/Seoul"
+
+    latest = provider.history("005930.KS", period="1d")
+    assert latest.index[0].date() == date(2024, 1, 4)
+
+    with pytest.raises(FileNotFoundError):
+        provider.history("MISSING")
+    assert provider.info("005930.KS") == {}
+
+
+def test_http_provider_against_mock_service():
+    """Test the JSON protocol of the HTTP provider against a mock transport"""
+    def handler(request):
+        if request.url.path == "/history/AAPL":
+            assert request.url.params["start"] == "2024-01-02"
+            return httpx.Response(200, json={
+                "tz": "America/New_York",
+                "bars": [{"timestamp": 1704205800, "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10}],
+            })
+        if request.url.path == "/info/AAPL":
+            return httpx.Response(200, json={"shortName": "Apple Inc."})
+        return httpx.Response(404)
+
+    client = httpx.Client(base_url="http://mock", transport=httpx.MockTransport(handler))
+    provider = HTTPProvider(client=client)
+
+    frame = provider.history("AAPL", start=date(2024, 1, 2), end=date(2024, 1, 3))
+    assert frame["Close"].tolist() == [1.5]
+    assert frame.index[0] == pd.Timestamp("2024-01-02 09:30", tz="America/New_York")
+    assert provider.info("AAPL") == {"shortName": "Apple Inc."}
+    assert provider.history("MSFT").empty
+
+
+def test_hedged_provider_takes_the_first_answer():
+    """Test that a slow primary is hedged by the secondary after the budget"""
+    slow = StaticProvider("slow", daily_frame([1.0]), delay=2.0)
+    fast = StaticProvider("fast", daily_frame([2.0]))
+    hedged = HedgedProvider([slow, fast], hedge_after=0.05)
+
+    frame = hedged.history("AAPL", period="1d")
+    slow._released.set()
+
+    assert frame["Close"].tolist() == [2.0]
+    assert hedged.stats() == {"hedged": 1, "failovers": 0}
+    assert hedged.name == "slow / fast"
+
+
+def test_hedged_provider_fails_over_on_error():
+    """Test failover without hedging and the error when all providers fail"""
+    broken = StaticProvider("broken", error=RuntimeError("down"))
+    backup = StaticProvider("backup", daily_frame([3.0]))
+
+    assert HedgedProvider([broken, backup], hedge_after=0).history("AAPL")["Close"].tolist() == [3.0]
+    assert HedgedProvider([broken, backup], hedge_after=0.05).history("AAPL")["Close"].tolist() == [3.0]
+    with pytest.raises(RuntimeError):
+        HedgedProvider([broken, broken], hedge_after=0.05).history("AAPL")
+
+
+def test_hedged_provider_fails_over_on_missing_file(tmp_path):
+    """Test that a ticker without a local file is fetched from the next provider"""
+    backup = StaticProvider("backup", daily_frame([3.0]))
+    hedged = HedgedProvider([FileProvider(str(tmp_path)), backup], hedge_after=0)
+
+    assert hedged.history("005930.KS", period="1d")["Close"].tolist() == [3.0]
+    assert hedged.stats()["failovers"] == 1
+
+
+def test_fetch_historical_data_uses_country_route(provider_routes):
+    """Test that a country routed to another provider never reaches Yahoo"""
+    local = StaticProvider("Local files", daily_frame([105.0, 110.0]))
+    register_provider("local", local)
+    provider_routes("South Korea=local;*=yahoo")
+
+    response = fetch_historical_data(
+        "005930.KS", start=date(2024, 1, 2), end=date(2024, 1, 3), include_metadata=False, interval="1wk"
+    )
+
+    assert [price.close for price in response.prices] == [105.0, 110.0]
+    assert response.metadata == {"data_source": "Local files"}
+    assert local.calls == 1
+
+
+def test_route_keeps_its_hedged_provider(provider_routes):
+    """Test that a multi-provider route reuses one HedgedProvider and reports its counters"""
+    register_provider("broken", StaticProvider("broken", error=RuntimeError("down")))
+    register_provider("backup", StaticProvider("backup", daily_frame([3.0])))
+    provider_routes("South Korea=broken,backup;*=yahoo")
+
+    hedged = get_provider("South Korea")
+    hedged.history("005930.KS", period="1d")
+    get_provider("South Korea").history("005930.KS", period="1d")
+
+    assert get_provider("South Korea") is hedged
+    assert get_provider_stats() == {"broken_backup": {"hedged": 0, "failovers": 2}}
+
+    provider_routes("South Korea=backup,broken;*=yahoo")
+    assert get_provider("South Korea") is not hedged
+    assert get_provider_stats() == {"backup_broken": {"hedged": 0, "failovers": 0}}
@@ -0,0 +1,72 @@
+import pytest
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from app.auth import API_KEY
+from app.finance import get_providers, set_provider_routes
+from app.providers import PROVIDER_ROUTES
+from benchmarks.replay import InjectedUpstreamError, ReplayProvider, install_replay, replay_provider_for
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def replay():
+    """Install a ReplayProvider as "yahoo" and restore the providers afterwards"""
+    providers = dict(get_providers())
+    provider = replay_provider_for()
+    install_replay(provider)
+    yield provider
+    get_providers().clear()
+    get_providers().update(providers)
+    set_provider_routes(PROVIDER_ROUTES)
+
+
+def test_synthetic_bars_are_deterministic():
+    """Test that a session has the same bars whatever range it is requested in"""
+    provider = ReplayProvider()
+
+    day = provider.history("AAPL", start=date(2024, 3, 5), end=date(2024, 3, 6), interval="5m")
+    week = provider.history("AAPL", start=date(2024, 3, 4), end=date(2024, 3, 9), interval="5m")
+
+    assert len(day) == 78
+    assert len(week) == 5 * 78
+    assert str(day.index[0]) == "2024-03-05 09:30:00-05:00"
+    assert week.loc[day.index].equals(day)
+    assert (day["High"] >= day[["Open", "Close"]].max(axis=1)).all()
+
+
+def test_download_groups_columns_by_ticker():
+    """Test that download() returns (ticker, field) columns like yf.download"""
+    provider = ReplayProvider()
+
+    frame = provider.download(["AAPL", "MSFT"], start=date(2024, 3, 4), end=date(2024, 3, 6), interval="1d")
+
+    assert set(frame.columns.get_level_values(0)) == {"AAPL", "MSFT"}
+    assert len(frame["AAPL"]) == 2
+
+
+def test_error_injection():
+    """Test that every call fails with an error rate of 1"""
+    provider = ReplayProvider(error_rate=1.0)
+
+    with pytest.raises(InjectedUpstreamError):
+        provider.history("AAPL", start=date(2024, 3, 5), end=date(2024, 3, 6))
+    assert provider.stats() == {"calls": 1, "errors": 1}
+
+
+def test_batch_through_replay(replay):
+    """Test a batch request end to end against the replayed upstream"""
+    response = client.post(
+        "/tickers/batch",
+        headers={"X-API-Key": API_KEY},
+        json={"tickers": [{"ticker": "AAPL", "date": "2024-03-05"}, {"ticker": "MSFT", "date": "2024-03-05"}]}
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["error"] for result in results] == [None, None]
+    assert results[0]["data"]["prices"][0]["date"] == "2024-03-05"
+    assert replay.stats()["calls"] > 0
@@ -0,0 +1,118 @@
+from unittest.mock import patch, MagicMock
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app.auth import API_KEY
+from app.cache import get_cache, history_cache_key, resample_cache_key
+from app.resample import bucket_start, resample_frame
+from main import app
+
+client = TestClient(app)
+
+
+def session_bars(count, start="09:30", day=None, tz="America/New_York"):
+    """1 minute bars with closes 100, 101, ... from `start` on `day` (today by default)"""
+    day = day or pd.Timestamp.now(tz=tz).strftime("%Y-%m-%d")
+    closes = [100.0 + i for i in range(count)]
+    return pd.DataFrame(
+        {
+            "Open": [close - 0.5 for close in closes],
+            "High": [close + 1.0 for close in closes],
+            "Low": [close - 1.0 for close in closes],
+            "Close": closes,
+            "Volume": [1000] * count,
+        },
+        index=pd.date_range(f"{day} {start}", periods=count, freq="1min", tz=tz)
+    )
+
+
+def test_resample_frame_matches_pandas():
+    """Test first/max/min/last/sum aggregation against pandas' resample"""
+    frame = session_bars(390, day="2024-03-05")
+
+    for rule, offset in [("5m", "5min"), ("1h", "1h"), ("1d", "1D")]:
+        expected = frame.resample(offset).agg(
+            {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+        ).dropna()
+        assert resample_frame(frame, rule).equals(expected)
+
+
+def test_resample_frame_uses_exchange_local_time():
+    """Test that buckets follow the exchange's local hours and days, not UTC"""
+    frame = session_bars(6 * 60, start="09:00", day="2024-03-05", tz="Asia/Seoul")
+
+    hourly = resample_frame(frame, "1h")
+    daily = resample_frame(frame, "1d")
+
+    assert [stamp.hour for stamp in hourly.index] == [9, 10, 11, 12, 13, 14]
+    assert list(daily.index) == [pd.Timestamp("2024-03-05", tz="Asia/Seoul")]
+    assert daily["Volume"].iloc[0] == 360 * 1000
+    assert daily["Open"].iloc[0] == frame["Open"].iloc[0]
+    assert daily["Close"].iloc[0] == frame["Close"].iloc[-1]
+
+
+def test_bucket_start():
+    """Test mapping a cursor to the start of its bucket"""
+    assert bucket_start(pd.Timestamp("2024-03-05 10:07"), "5m", "America/New_York") == \
+        pd.Timestamp("2024-03-05 10:05", tz="America/New_York")
+    assert bucket_start(pd.Timestamp("2024-03-05 15:07", tz="UTC"), "1h", "America/New_York") == \
+        pd.Timestamp("2024-03-05 10:00", tz="America/New_York")
+
+
+@patch('yfinance.Ticker')
+def test_ticker_resample_is_cached_separately(mock_ticker):
+    """Test that /ticker?resample= returns aggregated bars and caches them under their own key"""
+    mock_instance = MagicMock()
+    mock_instance.history.return_value = session_bars(390)
+    mock_ticker.return_value = mock_instance
+
+    with patch("app.finance.resample_frame", wraps=resample_frame) as spy:
+        first = client.get("/ticker/AAPL?metadata=false&resample=15m", headers={"X-API-Key": API_KEY})
+        second = client.get("/ticker/AAPL?metadata=false&resample=15m", headers={"X-API-Key": API_KEY})
+        full = client.get("/ticker/AAPL?metadata=false", headers={"X-API-Key": API_KEY})
+
+    assert first.status_code == 200
+    prices = first.json()["prices"]
+    assert len(prices) == 26
+    assert prices[0]["time"] == "09:30:00"
+    assert prices[0]["volume"] == 15 * 1000
+    assert second.json() == first.json()
+    assert len(full.json()["prices"]) == 390
+    # The second view came from the resampled entry, the raw bars from the history entry
+    assert spy.call_count == 1
+    assert mock_instance.history.call_count == 1
+    assert get_cache().get(resample_cache_key(history_cache_key("AAPL", None, "US"), "15m")) is not None
+
+
+@patch('yfinance.Ticker')
+def test_ticker_resample_since_starts_at_the_cursor_bucket(mock_ticker):
+    """Test that with since, the bucket holding the cursor is rebuilt from all its bars"""
+    frame = session_bars(390)
+    mock_instance = MagicMock()
+    mock_instance.history.return_value = frame
+    mock_ticker.return_value = mock_instance
+    cursor = frame.index[-3].tz_localize(None).isoformat()
+
+    response = client.get(
+        f"/ticker/AAPL?metadata=false&resample=5m&since={cursor}", headers={"X-API-Key": API_KEY}
+    )
+
+    assert response.status_code == 200
+    prices = response.json()["prices"]
+    assert len(prices) == 1
+    assert prices[0]["time"] == "15:55:00"
+    assert prices[0]["volume"] == 5 * 1000
+
+
+def test_resample_must_be_a_multiple_of_the_interval():
+    """Test that resample is rejected when it is not larger than a fixed-length interval"""
+    headers = {"X-API-Key": API_KEY}
+
+    daily = client.get("/ticker/AAPL?start=2024-03-01&resample=1h", headers=headers)
+    weekly = client.get("/ticker/AAPL?interval=1wk&resample=1d", headers=headers)
+    uneven = client.get("/ticker/AAPL?interval=2m&resample=5m", headers=headers)
+
+    assert daily.status_code == 400
+    assert weekly.status_code == 400
+    assert uneven.status_code == 400
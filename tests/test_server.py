@@ -0,0 +1,67 @@
+import os
+import socket
+import threading
+from unittest.mock import patch
+
+from app import server
+
+
+def test_development_mode_reloads():
+    """Test that the default mode is a single reloading worker"""
+    with patch("app.server.uvicorn.run") as run:
+        server.serve("main:app", production=False, host="127.0.0.1", port=8001)
+
+    run.assert_called_once_with("main:app", host="127.0.0.1", port=8001, reload=True)
+
+
+def test_production_mode_starts_supervisor():
+    """Test that production mode forks the requested number of workers"""
+    with patch("app.server.Supervisor") as supervisor, patch.dict(os.environ):
+        os.environ.pop("API_KEY_QUOTA_WORKERS", None)
+        server.serve("main:app", production=True, host="127.0.0.1", port=8001, workers=3)
+        # The workers split the API key quotas between them
+        assert os.environ["API_KEY_QUOTA_WORKERS"] == "3"
+
+    supervisor.assert_called_once_with("main:app", "127.0.0.1", 8001, 3)
+    supervisor.return_value.run.assert_called_once()
+
+
+def test_production_options():
+    """Test the uvicorn settings of production workers"""
+    options = server.production_options()
+
+    assert options["timeout_keep_alive"] == server.SERVER_KEEPALIVE_SECONDS
+    assert options["backlog"] == server.SERVER_BACKLOG
+    assert options["loop"] == "auto"
+    assert options["limit_concurrency"] is None
+
+
+def test_bind_socket_is_shared_with_workers():
+    """Test that the listening socket survives into forked workers"""
+    sock = server.bind_socket("127.0.0.1", 0, 16)
+    try:
+        assert sock.get_inheritable()
+        client = socket.create_connection(sock.getsockname(), timeout=1)
+        client.close()
+    finally:
+        sock.close()
+
+
+def test_supervisor_does_not_restart_workers_after_stop():
+    """Test that a stop signal during the restart pause does not fork a new worker"""
+    supervisor = server.Supervisor("main:app", "127.0.0.1", 8001, workers=1)
+    supervisor._children = {4242: 0}
+    waits = iter([(4242, 256)])
+
+    def wait():
+        try:
+            return next(waits)
+        except StopIteration:
+            raise ChildProcessError
+
+    stop = threading.Timer(0.1, supervisor._stop, args=(None, None))
+    with patch("app.server.os.wait", side_effect=wait), patch.object(supervisor, "_spawn") as spawn:
+        stop.start()
+        supervisor._supervise(app=None, sock=None)
+
+    spawn.assert_not_called()
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from app.finance import afetch_historical_data, request_flights
+from app.models import TickerResponse
+from app.singleflight import SingleFlight
+
+
+def test_do_coalesces_concurrent_threads():
+    """Test that concurrent threads with the same key share one call"""
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow_call():
+        calls.append(1)
+        release.wait(1)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(flights.do, "AAPL", slow_call) for _ in range(5)]
+        # Give every thread time to join the in-flight call
+        time.sleep(0.1)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert flights.stats() == {"originated": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_do_shares_exceptions_and_forgets_key():
+    """Test that errors reach every waiter and the next call runs again"""
+    flights = SingleFlight()
+
+    def failing_call():
+        raise ValueError("upstream down")
+
+    with pytest.raises(ValueError):
+        flights.do("AAPL", failing_call)
+
+    assert flights.do("AAPL", lambda: "recovered") == "recovered"
+    assert flights.stats()["originated"] == 2
+
+
+def test_ado_coalesces_concurrent_tasks():
+    """Test that concurrent coroutines with the same key share one call"""
+    flights = SingleFlight()
+    calls = []
+
+    async def slow_call(ticker):
+        calls.append(ticker)
+        await asyncio.sleep(0.05)
+        return ticker.lower()
+
+    async def run():
+        return await asyncio.gather(
+            flights.ado("AAPL", slow_call, "AAPL"),
+            flights.ado("AAPL", slow_call, "AAPL"),
+            flights.ado("MSFT", slow_call, "MSFT"),
+        )
+
+    assert asyncio.run(run()) == ["aapl", "aapl", "msft"]
+    assert calls == ["AAPL", "MSFT"]
+    assert flights.stats() == {"originated": 2, "coalesced": 1, "in_flight": 0}
+
+
+@patch('app.finance.fetch_historical_data')
+def test_afetch_historical_data_coalesces_identical_requests(mock_fetch_historical_data):
+    """Test that identical concurrent requests trigger one fetch with independent copies"""
+    def slow_fetch(ticker, specific_date=None, country=None, include_metadata=True, **range_options):
+        time.sleep(0.1)
+        return TickerResponse(ticker=ticker, country="US", prices=[], metadata={"name": "Apple Inc."})
+
+    mock_fetch_historical_data.side_effect = slow_fetch
+    request_flights.reset()
+
+    async def run():
+        return await asyncio.gather(*(afetch_historical_data("AAPL") for _ in range(10)))
+
+    results = asyncio.run(run())
+
+    mock_fetch_historical_data.assert_called_once_with(
+        "AAPL", None, None, include_metadata=True, start=None, end=None, interval=None, since=None, resample=None
+    )
+    assert request_flights.stats()["coalesced"] == 9
+
+    # Callers may annotate their own copy without affecting the others
+    results[0].metadata["note"] = "changed"
+    assert "note" not in results[1].metadata
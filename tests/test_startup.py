@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import types
+import pytest
+from fastapi.testclient import TestClient
+
+import app.warmup as warmup
+import main
+from app.warmup import FinanceLoader
+from main import app
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Cumulative `import main` time in milliseconds; pandas and yfinance alone take longer
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1000"))
+HEAVY_MODULES = ("pandas", "numpy", "yfinance", "pyarrow", "app.finance")
+
+client = TestClient(app)
+
+
+def test_import_main_within_budget():
+    """Test that importing the API leaves the finance subsystem to the warm-up"""
+    code = (
+        "import sys, main; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == ""
+    main_line = [line for line in result.stderr.splitlines() if line.rstrip().endswith("| main")][-1]
+    cumulative_us = int(main_line.split("|")[1])
+    assert cumulative_us / 1000 < IMPORT_TIME_BUDGET_MS
+
+
+def test_health_and_ready(monkeypatch):
+    """Test that health answers right away and ready waits for the finance subsystem"""
+    loader = FinanceLoader(modules=())
+    monkeypatch.setattr(warmup, "_finance_loader", loader)
+
+    assert client.get("/health").json() == {"status": "ok"}
+    assert client.get("/ready").status_code == 503
+
+    loader.load()
+
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+
+def test_shutdown_while_the_finance_subsystem_is_loading(monkeypatch):
+    """Test that stopping before the warm-up has finished skips the finance shutdown hooks"""
+    monkeypatch.setattr(warmup, "_finance_loader", FinanceLoader(modules=()))
+    monkeypatch.setattr(main, "FINANCE_WARMUP", "lazy")
+    # What a background import leaves in sys.modules halfway through
+    monkeypatch.setitem(sys.modules, "app.finance", types.ModuleType("app.finance"))
+    monkeypatch.setitem(sys.modules, "app.stream", types.ModuleType("app.stream"))
+
+    with TestClient(app) as lifespan_client:
+        assert lifespan_client.get("/health").status_code == 200
+
+
+def test_loader_loads_in_background():
+    """Test that start() imports the modules in a thread"""
+    loader = FinanceLoader(modules=("json",))
+    loader.start()
+    loader._thread.join(timeout=10)
+
+    assert loader.ready
+    assert loader.stats()["error"] is None
+
+
+def test_loader_reports_import_errors():
+    """Test that a failed import is reported and retried on the next load"""
+    loader = FinanceLoader(modules=("app.does_not_exist",))
+
+    with pytest.raises(ImportError):
+        loader.load()
+
+    assert not loader.ready
+    assert "does_not_exist" in loader.stats()["error"]
@@ -0,0 +1,139 @@
+import pytest
+from datetime import date
+from unittest.mock import patch, MagicMock
+
+import pandas as pd
+from yfinance.exceptions import YFPricesMissingError
+
+from app.cache import get_cache
+from app.finance import fetch_from_yahoo
+from app.store import PriceStore, get_price_store, merge_ranges
+
+
+def daily_frame(days, tz="America/New_York"):
+    """Build a Ticker.history()-shaped daily frame for the given dates"""
+    return pd.DataFrame(
+        {
+            "Open": [150.0 + i for i in range(len(days))],
+            "High": [155.0 + i for i in range(len(days))],
+            "Low": [149.0 + i for i in range(len(days))],
+            "Close": [153.0 + i for i in range(len(days))],
+            "Volume": [1000000 * (i + 1) for i in range(len(days))],
+        },
+        index=pd.DatetimeIndex([pd.Timestamp(day, tz=tz) for day in days])
+    )
+
+
+def test_merge_ranges():
+    """Test merging overlapping and touching date ranges"""
+    assert merge_ranges([
+        (date(2023, 1, 10), date(2023, 1, 12)),
+        (date(2023, 1, 1), date(2023, 1, 5)),
+        (date(2023, 1, 5), date(2023, 1, 7)),
+        (date(2023, 1, 11), date(2023, 1, 15)),
+    ]) == [
+        (date(2023, 1, 1), date(2023, 1, 7)),
+        (date(2023, 1, 10), date(2023, 1, 15)),
+    ]
+
+
+def test_price_store_round_trip(tmp_path):
+    """Test writing and reading bars in the exchange time zone"""
+    store = PriceStore(str(tmp_path / "prices.sqlite3"))
+    frame = daily_frame([date(2023, 1, 3), date(2023, 1, 4), date(2023, 1, 5)], tz="Asia/Seoul")
+    store.write("005930.KS", "1d", frame, date(2023, 1, 3), date(2023, 1, 6), "Asia/Seoul")
+
+    result = store.read("005930.KS", "1d", date(2023, 1, 4), date(2023, 1, 5))
+
+    assert len(result) == 1
+    assert result.index[0] == pd.Timestamp("2023-01-04", tz="Asia/Seoul")
+    assert result["Close"].tolist() == [154.0]
+    assert result["Volume"].tolist() == [2000000]
+    assert store.covers("005930.KS", "1d", date(2023, 1, 3), date(2023, 1, 6))
+    assert not store.covers("005930.KS", "1d", date(2023, 1, 3), date(2023, 1, 7))
+
+
+def test_price_store_counts_bars_and_tickers(tmp_path):
+    """Test that the stats follow writes, overwrites and a reopened store"""
+    store = PriceStore(str(tmp_path / "prices.sqlite3"))
+    store.write("AAPL", "1d", daily_frame([date(2023, 1, 3), date(2023, 1, 4)]),
+                date(2023, 1, 3), date(2023, 1, 5), "America/New_York")
+    store.write("AAPL", "1d", daily_frame([date(2023, 1, 4), date(2023, 1, 5)]),
+                date(2023, 1, 4), date(2023, 1, 6), "America/New_York")
+    store.write("MSFT", "1d", pd.DataFrame(), date(2023, 1, 2), date(2023, 1, 3), "America/New_York")
+
+    assert store.stats() == {"bars": 3, "tickers": 2, "reads": 0, "writes": 3}
+    assert PriceStore(str(tmp_path / "prices.sqlite3")).stats()["bars"] == 3
+
+    store.clear()
+    assert store.stats()["bars"] == 0
+
+
+def test_price_store_remembers_empty_ranges(tmp_path):
+    """Test that a downloaded range without bars counts as covered"""
+    store = PriceStore(str(tmp_path / "prices.sqlite3"))
+    store.write("AAPL", "1d", pd.DataFrame(), date(2023, 1, 2), date(2023, 1, 3), "America/New_York")
+
+    assert store.covers("AAPL", "1d", date(2023, 1, 2), date(2023, 1, 3))
+    assert store.read("AAPL", "1d", date(2023, 1, 2), date(2023, 1, 3)).empty
+
+
+@patch('yfinance.Ticker')
+def test_fetch_from_yahoo_serves_past_dates_from_store(mock_ticker_class):
+    """Test that a past date is downloaded once and then read from disk"""
+    specific_date = date(2023, 1, 3)
+    mock_ticker = MagicMock()
+    mock_ticker_class.return_value = mock_ticker
+    mock_ticker.history.return_value = daily_frame([specific_date])
+
+    first = fetch_from_yahoo("AAPL", "US", specific_date, include_metadata=False)
+    # Drop the in-memory copy so the second call has to go to the store
+    get_cache().clear()
+    second = fetch_from_yahoo("AAPL", "US", specific_date, include_metadata=False)
+
+    mock_ticker.history.assert_called_once()
+    assert first.prices == second.prices
+    assert second.prices[0].close == 153.0
+
+
+def yahoo_history(frame):
+    """Ticker.history() like yfinance's: errors are only raised with raise_errors=True"""
+    def history(raise_errors=False, **kwargs):
+        if raise_errors:
+            raise RuntimeError("Yahoo Finance is currently down")
+        # The default logs the error and returns an empty frame
+        return frame
+    return history
+
+
+@patch('yfinance.Ticker')
+def test_fetch_from_yahoo_does_not_store_a_failed_download(mock_ticker_class):
+    """Test that an empty frame from a failed download is neither stored nor cached"""
+    mock_ticker = MagicMock()
+    mock_ticker_class.return_value = mock_ticker
+    mock_ticker.history.side_effect = yahoo_history(pd.DataFrame())
+
+    with pytest.raises(RuntimeError):
+        fetch_from_yahoo("AAPL", "US", date(2023, 1, 3), include_metadata=False)
+
+    assert not get_price_store().covers("AAPL", "1d", date(2023, 1, 3), date(2023, 1, 4))
+    assert len(get_cache()) == 0
+
+    mock_ticker.history.side_effect = None
+    mock_ticker.history.return_value = daily_frame([date(2023, 1, 3)])
+    response = fetch_from_yahoo("AAPL", "US", date(2023, 1, 3), include_metadata=False)
+    assert response.prices[0].close == 153.0
+
+
+@patch('yfinance.Ticker')
+def test_fetch_from_yahoo_stores_a_range_without_prices(mock_ticker_class):
+    """Test that a range Yahoo has no prices for (a holiday) is still covered"""
+    mock_ticker = MagicMock()
+    mock_ticker_class.return_value = mock_ticker
+    mock_ticker.history.side_effect = YFPricesMissingError("AAPL", "(1d 2023-01-02 -> 2023-01-03)")
+
+    response = fetch_from_yahoo("AAPL", "US", date(2023, 1, 2), include_metadata=False)
+
+    assert response.prices == []
+    assert get_price_store().covers("AAPL", "1d", date(2023, 1, 2), date(2023, 1, 3))
+    assert mock_ticker.history.call_args.kwargs["raise_errors"] is True
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import pytest
+
+import pandas as pd
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.auth import API_KEY
+from app.finance import get_providers, register_provider, set_provider_routes
+from app.providers import PROVIDER_ROUTES, Provider
+from app.stream import StreamHub, TickerFeed, get_stream_hub, new_bars, sse_events
+from main import app
+
+
+def session_bars(count, close=100.0):
+    """1 minute bars of today's New York session"""
+    start = pd.Timestamp.now(tz="America/New_York").normalize() + pd.Timedelta(hours=9, minutes=30)
+    closes = [close + i for i in range(count)]
+    return pd.DataFrame(
+        {"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": [100] * count},
+        index=pd.date_range(start, periods=count, freq="1min")
+    )
+
+
+class GrowingProvider(Provider):
+    """Provider whose session gains one bar per history call"""
+
+    name = "growing"
+
+    def __init__(self, bars=2):
+        self.bars = bars
+        self.calls = 0
+
+    def history(self, ticker, start=None, end=None, interval="1d", period=None):
+        self.calls += 1
+        frame = session_bars(self.bars)
+        self.bars += 1
+        return frame
+
+
+@pytest.fixture
+def provider():
+    """Route every country to a GrowingProvider and poll it quickly"""
+    providers = dict(get_providers())
+    growing = GrowingProvider()
+    register_provider("growing", growing)
+    set_provider_routes("*=growing")
+    hub = get_stream_hub()
+    poll_seconds, hub.poll_seconds = hub.poll_seconds, 0.05
+    yield growing
+    hub.poll_seconds = poll_seconds
+    get_providers().clear()
+    get_providers().update(providers)
+    set_provider_routes(PROVIDER_ROUTES)
+
+
+def test_new_bars_only_returns_new_and_changed_bars():
+    """Test that unchanged bars are not sent again and the running bar is resent when it changes"""
+    previous = session_bars(3)
+    current = session_bars(5)
+    current.iloc[2, current.columns.get_loc("Close")] = 99.0
+
+    delta = new_bars(previous, current)
+
+    assert list(delta.index) == list(current.index[2:])
+    assert new_bars(current, current).empty
+    assert len(new_bars(None, current)) == 5
+
+
+def test_websocket_sends_snapshot_then_new_bars(provider):
+    """Test that a WebSocket subscriber gets the session first and then only new bars"""
+    with TestClient(app) as client:
+        with client.websocket_connect(f"/stream/AAPL?api_key={API_KEY}") as websocket:
+            snapshot = json.loads(websocket.receive_text())
+            update = json.loads(websocket.receive_text())
+
+    assert snapshot["type"] == "snapshot"
+    assert snapshot["ticker"] == "AAPL"
+    assert len(snapshot["prices"]) == 2
+    assert update["type"] == "bars"
+    assert [price["close"] for price in update["prices"]] == [102.0]
+
+
+def test_subscribers_share_one_poller(provider):
+    """Test that two clients of the same ticker cause one upstream poll per interval"""
+    with TestClient(app) as client:
+        with client.websocket_connect("/stream/AAPL", headers={"X-API-Key": API_KEY}) as first:
+            first.receive_text()
+            with client.websocket_connect("/stream/AAPL", headers={"X-API-Key": API_KEY}) as second:
+                # The late subscriber starts from the feed's snapshot
+                assert json.loads(second.receive_text())["type"] == "snapshot"
+                first_update = first.receive_text()
+                assert second.receive_text() == first_update
+                stats = get_stream_hub().stats()
+                assert stats["feeds"] == 1
+                assert stats["subscribers"] == 2
+                assert provider.calls == stats["polls"]
+
+    assert get_stream_hub().stats()["feeds"] == 0
+
+
+def test_late_subscribers_share_one_encoded_snapshot(provider):
+    """Test that the snapshot is encoded once per change of the bars, not once per subscriber"""
+    async def subscribe_after_polls():
+        feed = TickerFeed("AAPL", "US", "1m", poll_seconds=60, queue_size=10)
+        encoded = []
+        encode = feed._encode
+        feed._encode = lambda *args, **kwargs: encoded.append(args[0]) or encode(*args, **kwargs)
+        await feed.poll()
+        queues = [feed.subscribe(), feed.subscribe()]
+        feed.stop()
+        await feed.poll()
+        queues += [feed.subscribe(), feed.subscribe()]
+        feed.stop()
+        return encoded, [queue.get_nowait() for queue in queues]
+
+    encoded, snapshots = asyncio.run(subscribe_after_polls())
+
+    assert encoded == ["snapshot", "bars", "snapshot"]
+    assert snapshots[0] is snapshots[1] and snapshots[2] is snapshots[3]
+    assert [len(json.loads(snapshot)["prices"]) for snapshot in snapshots] == [2, 2, 3, 3]
+
+
+def test_websocket_requires_api_key(provider):
+    """Test that a WebSocket without a valid API key is closed"""
+    client = TestClient(app)
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect("/stream/AAPL?api_key=wrong") as websocket:
+            websocket.receive_text()
+
+    assert exc_info.value.code == 1008
+
+
+def test_sse_events(provider):
+    """Test that the SSE fallback frames the same messages as events"""
+    async def first_events(count):
+        events = sse_events(StreamHub(poll_seconds=0.05), "AAPL")
+        try:
+            return [await anext(events) for _ in range(count)]
+        finally:
+            await events.aclose()
+
+    events = asyncio.run(first_events(2))
+
+    assert all(event.startswith("data: ") and event.endswith("\n\n") for event in events)
+    assert json.loads(events[0][len("data: "):])["type"] == "snapshot"
+    assert json.loads(events[1][len("data: "):])["prices"][0]["close"] == 102.0
+
+
+def test_sse_requires_api_key():
+    """Test that the SSE endpoint requires an API key"""
+    response = TestClient(app).get("/stream/AAPL")
+
+    assert response.status_code == 401
@@ -1,6 +1,6 @@
 import pytest
 from datetime import date, time
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
 
 from main import app
@@ -19,7 +19,7 @@ def token_headers():
 
 
 @patch('app.auth.verify_token')
-@patch('main.fetch_historical_data')
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
 def test_get_ticker_data_by_date(mock_fetch_historical_data, mock_verify_token, token_headers):
     """Test getting ticker data for a specific date with token authentication"""
     # Mock the token verification
@@ -61,10 +61,12 @@ def test_get_ticker_data_by_date(mock_fetch_historical_data, mock_verify_token,
     assert data["prices"][0]["close"] == 153.0
     
     # Verify the function was called with the right parameters
-    mock_fetch_historical_data.assert_called_once_with("AAPL", specific_date, None)
+    mock_fetch_historical_data.assert_called_once_with(
+        "AAPL", specific_date, None, include_metadata=True, interval=None, resample=None
+    )
 
 
-@patch('main.fetch_historical_data')
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
 def test_get_ticker_data_by_date_without_token(mock_fetch_historical_data):
     """Test getting ticker data for a specific date without token"""
     specific_date = date(2023, 1, 3)
@@ -81,7 +83,7 @@ def test_get_ticker_data_by_date_without_token(mock_fetch_historical_data):
 
 
 @patch('app.auth.verify_token')
-@patch('main.fetch_historical_data')
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
 def test_get_ticker_data_by_date_with_invalid_token(mock_fetch_historical_data, mock_verify_token):
     """Test getting ticker data for a specific date with invalid token"""
     # Mock the token verification to raise an exception
@@ -103,7 +105,7 @@ def test_get_ticker_data_by_date_with_invalid_token(mock_fetch_historical_data,
 
 
 @patch('app.auth.verify_token')
-@patch('main.fetch_historical_data')
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
 def test_get_ticker_data_by_date_with_country(mock_fetch_historical_data, mock_verify_token, token_headers):
     """Test getting ticker data for a specific date with country override"""
     # Mock the token verification
@@ -146,11 +148,13 @@ def test_get_ticker_data_by_date_with_country(mock_fetch_historical_data, mock_v
     assert "South Korea" in data["metadata"]["note"]
     
     # Verify the function was called with the right parameters
-    mock_fetch_historical_data.assert_called_once_with("005930.KS", specific_date, "South Korea")
+    mock_fetch_historical_data.assert_called_once_with(
+        "005930.KS", specific_date, "South Korea", include_metadata=True, interval=None, resample=None
+    )
 
 
 @patch('app.auth.verify_token')
-@patch('main.fetch_historical_data')
+@patch('main.afetch_historical_data', new_callable=AsyncMock)
 def test_get_ticker_data_by_date_error_handling(mock_fetch_historical_data, mock_verify_token, token_headers):
     """Test error handling when fetching ticker data for a specific date"""
     # Mock the token verification